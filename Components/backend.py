@@ -0,0 +1,27 @@
+"""Origem dos documentos usada pela interface: o banco local ou o servidor.
+
+Com SERVIDOR_URL configurado (variável DIPCELL_SERVIDOR), as funções abaixo são as
+de Components.cliente, que falam com Components.servidor; sem ele, são as de
+Components.database. Nomes, argumentos e retornos são os mesmos nos dois casos.
+As ferramentas de linha de comando continuam usando o banco local.
+"""
+
+from .config import SERVIDOR_URL
+
+REMOTO = bool(SERVIDOR_URL)
+
+if REMOTO:
+    from .cliente import (
+        count_documents, delete_document, fetch_document, find_page_anchor,
+        get_next_document_number, insert_document, iterar_documentos, list_documents,
+        list_documents_page, preparar, resumo_financeiro, update_document, versao_da_ultima_escrita,
+        versao_dados
+    )
+else:
+    from .database import (
+        count_documents, delete_document, fetch_document, find_page_anchor,
+        get_next_document_number, insert_document, iterar_documentos, list_documents,
+        list_documents_page, update_document, versao_da_ultima_escrita, versao_dados
+    )
+    from .database import criar_banco as preparar
+    from .relatorios import resumo_financeiro
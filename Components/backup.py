@@ -0,0 +1,340 @@
+"""Backup do banco e dos PDFs com o programa aberto.
+
+Uso:
+    python -m Components.backup                 # faz um backup agora
+    python -m Components.backup --verificar     # restaura o último backup numa pasta temporária e confere
+    python -m Components.backup --verificar backups/banco/os_dipcell-20250310-120000.db
+
+O banco é copiado com a API de backup online do SQLite, poucas páginas por vez e
+com pausas entre os passos, para não segurar a interface nem as gravações. Cada
+cópia vira um snapshot com data e hora em PASTA_BACKUPS/banco; só os MANTER_SNAPSHOTS
+mais recentes são mantidos.
+
+Os PDFs de PASTA_OS são espelhados em PASTA_BACKUPS/pdfs de forma incremental: o
+manifesto guarda tamanho, data de modificação e SHA-256 de cada arquivo, e só
+arquivos novos ou alterados são copiados. PDFs apagados da origem continuam no backup.
+
+Com o programa aberto, um backup roda em segundo plano a cada INTERVALO_HORAS
+(DIPCELL_BACKUP_HORAS; 0 desliga), começando alguns minutos depois da abertura.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from . import database
+from .config import PASTA_BACKUPS, PASTA_OS
+from .metricas import instrumentar
+
+INTERVALO_HORAS = float(os.environ.get("DIPCELL_BACKUP_HORAS", "12"))
+ATRASO_INICIAL_S = 300
+MANTER_SNAPSHOTS = 10
+
+# Passos curtos com pausa: cada passo segura a leitura do banco só por alguns ms
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS_S = 0.005
+
+PREFIXO_SNAPSHOT = "os_dipcell-"
+ARQUIVO_MANIFESTO = "manifesto.json"
+BLOCO_HASH = 1024 * 1024
+
+
+def _pasta_banco(pasta):
+    return os.path.join(pasta, "banco")
+
+
+def _pasta_pdfs(pasta):
+    return os.path.join(pasta, "pdfs")
+
+
+def listar_snapshots(pasta=PASTA_BACKUPS):
+    """Caminhos dos snapshots do banco, do mais antigo para o mais recente."""
+    # O nome tem data e hora fixas (AAAAMMDD-HHMMSS): a ordem alfabética é a cronológica
+    return sorted(glob.glob(os.path.join(_pasta_banco(pasta), f"{PREFIXO_SNAPSHOT}*.db")))
+
+
+def _copiar_online(origem, destino, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS_S, ao_progredir=None):
+    """Copia o banco `origem` (conexão aberta) para o arquivo `destino` via API de backup."""
+    def progresso(status, restantes, total):
+        if ao_progredir:
+            ao_progredir(total - restantes, total)
+        # Libera o banco (e o GIL) entre os passos
+        time.sleep(pausa)
+
+    parcial = destino + ".parcial"
+    if os.path.exists(parcial):
+        os.remove(parcial)
+    conn_destino = sqlite3.connect(parcial)
+    try:
+        origem.backup(conn_destino, pages=paginas, progress=progresso)
+    finally:
+        conn_destino.close()
+    os.replace(parcial, destino)
+
+
+@instrumentar("backup.banco")
+def copiar_banco(pasta=PASTA_BACKUPS, ao_progredir=None):
+    """Cria um snapshot do banco atual e retorna o caminho."""
+    os.makedirs(_pasta_banco(pasta), exist_ok=True)
+    destino = os.path.join(
+        _pasta_banco(pasta), f"{PREFIXO_SNAPSHOT}{datetime.now():%Y%m%d-%H%M%S}.db"
+    )
+    # Conexão própria: o backup não usa (nem trava) as conexões das outras threads
+    origem = sqlite3.connect(database.DB_NAME, timeout=database.BUSY_TIMEOUT_MS / 1000)
+    try:
+        # Transação de leitura aberta durante toda a cópia: em WAL ela fixa um retrato
+        # do banco, e as gravações das outras conexões não fazem o backup recomeçar
+        origem.execute("BEGIN")
+        origem.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        _copiar_online(origem, destino, ao_progredir=ao_progredir)
+    finally:
+        origem.close()
+    return destino
+
+
+def rotacionar(pasta=PASTA_BACKUPS, manter=MANTER_SNAPSHOTS):
+    """Apaga os snapshots mais antigos, deixando os `manter` mais recentes. Retorna os apagados."""
+    antigos = listar_snapshots(pasta)[:-manter] if manter > 0 else []
+    for caminho in antigos:
+        os.remove(caminho)
+    return antigos
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(BLOCO_HASH), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _ler_manifesto(pasta_pdfs):
+    try:
+        with open(os.path.join(pasta_pdfs, ARQUIVO_MANIFESTO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _salvar_manifesto(pasta_pdfs, manifesto):
+    caminho = os.path.join(pasta_pdfs, ARQUIVO_MANIFESTO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=0, sort_keys=True)
+    os.replace(caminho + ".tmp", caminho)
+
+
+@instrumentar("backup.pdfs", linhas=lambda resumo: resumo["copiados"])
+def copiar_pdfs(pasta=PASTA_BACKUPS, origem=PASTA_OS):
+    """Espelha os PDFs novos ou alterados de `origem`. Retorna um dict com as contagens."""
+    destino = _pasta_pdfs(pasta)
+    os.makedirs(destino, exist_ok=True)
+    manifesto = _ler_manifesto(destino)
+    resumo = {"copiados": 0, "inalterados": 0, "bytes_copiados": 0}
+
+    try:
+        entradas = [e for e in os.scandir(origem) if e.is_file() and e.name.lower().endswith(".pdf")]
+    except FileNotFoundError:
+        entradas = []
+
+    for entrada in entradas:
+        info = entrada.stat()
+        anterior = manifesto.get(entrada.name)
+        if anterior and anterior["tamanho"] == info.st_size and anterior["mtime_ns"] == info.st_mtime_ns \
+                and os.path.exists(os.path.join(destino, entrada.name)):
+            resumo["inalterados"] += 1
+            continue
+
+        sha = _sha256(entrada.path)
+        if not (anterior and anterior["sha256"] == sha and os.path.exists(os.path.join(destino, entrada.name))):
+            temporario = os.path.join(destino, entrada.name + ".tmp")
+            shutil.copy2(entrada.path, temporario)
+            os.replace(temporario, os.path.join(destino, entrada.name))
+            resumo["copiados"] += 1
+            resumo["bytes_copiados"] += info.st_size
+        else:
+            # Só a data mudou (arquivo regravado com o mesmo conteúdo)
+            resumo["inalterados"] += 1
+        manifesto[entrada.name] = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": sha}
+
+    _salvar_manifesto(destino, manifesto)
+    resumo["total"] = len(manifesto)
+    return resumo
+
+
+def fazer_backup(pasta=PASTA_BACKUPS, manter=MANTER_SNAPSHOTS, ao_progredir=None):
+    """Snapshot do banco, rotação e cópia incremental dos PDFs. Retorna um resumo."""
+    inicio = time.perf_counter()
+    snapshot = copiar_banco(pasta, ao_progredir)
+    apagados = rotacionar(pasta, manter)
+    pdfs = copiar_pdfs(pasta)
+    return {
+        "snapshot": snapshot,
+        "snapshots_apagados": len(apagados),
+        "pdfs": pdfs,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+# ==========================================================
+# VERIFICAÇÃO
+# ==========================================================
+
+def verificar_backup(snapshot=None, pasta=PASTA_BACKUPS):
+    """Restaura o snapshot (o mais recente se omitido) numa pasta temporária e confere tudo.
+
+    A cópia restaurada passa por integrity_check, foreign_key_check e pelas migrações
+    deste programa; os PDFs do backup são conferidos com o SHA-256 do manifesto.
+    Retorna (detalhes, problemas); o backup está íntegro se `problemas` for vazio.
+    """
+    from .migracoes import migrar
+
+    problemas = []
+    detalhes = {}
+    if snapshot is None:
+        snapshots = listar_snapshots(pasta)
+        if not snapshots:
+            return detalhes, [f"Nenhum snapshot em {_pasta_banco(pasta)}."]
+        snapshot = snapshots[-1]
+    detalhes["snapshot"] = snapshot
+    if not os.path.isfile(snapshot):
+        return detalhes, [f"Snapshot não encontrado: {snapshot}"]
+
+    with tempfile.TemporaryDirectory(prefix="restauracao_") as temporaria:
+        restaurado = os.path.join(temporaria, "os_dipcell.db")
+        try:
+            origem = sqlite3.connect(snapshot)
+            try:
+                _copiar_online(origem, restaurado, paginas=-1, pausa=0)
+            finally:
+                origem.close()
+        except sqlite3.Error as e:
+            return detalhes, [f"Não foi possível ler o snapshot: {e}"]
+
+        conn = sqlite3.connect(restaurado)
+        try:
+            integridade = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            if integridade != ["ok"]:
+                problemas.extend(f"integrity_check: {linha}" for linha in integridade[:20])
+            chaves = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if chaves:
+                problemas.append(f"foreign_key_check: {len(chaves)} referências inválidas")
+            detalhes["versao_esquema"] = conn.execute("PRAGMA user_version").fetchone()[0]
+            detalhes["migracoes_aplicadas"] = migrar(conn)
+            detalhes["documentos"] = conn.execute("SELECT COUNT(*) FROM os").fetchone()[0]
+            detalhes["parcelas"] = conn.execute("SELECT COUNT(*) FROM parcelas").fetchone()[0]
+        except sqlite3.Error as e:
+            problemas.append(f"Erro ao abrir a cópia restaurada: {e}")
+        finally:
+            conn.close()
+
+    pasta_pdfs = _pasta_pdfs(pasta)
+    manifesto = _ler_manifesto(pasta_pdfs)
+    detalhes["pdfs"] = len(manifesto)
+    for nome, info in manifesto.items():
+        caminho = os.path.join(pasta_pdfs, nome)
+        if not os.path.exists(caminho):
+            problemas.append(f"PDF ausente no backup: {nome}")
+        elif os.path.getsize(caminho) != info["tamanho"] or _sha256(caminho) != info["sha256"]:
+            problemas.append(f"PDF diferente do manifesto: {nome}")
+    return detalhes, problemas
+
+
+# ==========================================================
+# AGENDAMENTO
+# ==========================================================
+
+class AgendadorBackup:
+    """Thread que faz o backup periodicamente enquanto o programa está aberto.
+
+    Não repete o backup se o último snapshot tiver menos de `intervalo_horas`
+    (abrir e fechar o programa várias vezes no dia não gera vários backups).
+    """
+
+    def __init__(self, intervalo_horas=INTERVALO_HORAS, pasta=PASTA_BACKUPS, atraso_inicial=ATRASO_INICIAL_S):
+        self.intervalo = intervalo_horas * 3600
+        self.pasta = pasta
+        self.atraso_inicial = atraso_inicial
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self.intervalo <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, name="backup", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _segundos_desde_ultimo(self):
+        snapshots = listar_snapshots(self.pasta)
+        return time.time() - os.path.getmtime(snapshots[-1]) if snapshots else None
+
+    def _executar(self):
+        espera = self.atraso_inicial
+        while not self._parar.wait(espera):
+            decorrido = self._segundos_desde_ultimo()
+            if decorrido is not None and decorrido < self.intervalo:
+                espera = self.intervalo - decorrido
+                continue
+            try:
+                resumo = fazer_backup(self.pasta)
+                print(
+                    f"Backup: {os.path.basename(resumo['snapshot'])}, "
+                    f"{resumo['pdfs']['copiados']} PDFs copiados em {resumo['segundos']:.1f}s"
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"Aviso: Falha no backup automático: {e}")
+            espera = self.intervalo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backup e verificação do banco e dos PDFs.")
+    parser.add_argument("--pasta", default=PASTA_BACKUPS, help="Pasta dos backups.")
+    parser.add_argument("--banco", help="Arquivo do banco (padrão: o mesmo da interface).")
+    parser.add_argument("--manter", type=int, default=MANTER_SNAPSHOTS, help="Snapshots mantidos.")
+    parser.add_argument("--verificar", nargs="?", const="", metavar="SNAPSHOT",
+                        help="Conferir um snapshot (padrão: o mais recente) em vez de fazer backup.")
+    args = parser.parse_args(argv)
+
+    if args.banco:
+        database.definir_caminho_banco(args.banco)
+
+    if args.verificar is not None:
+        detalhes, problemas = verificar_backup(args.verificar or None, args.pasta)
+        for chave, valor in detalhes.items():
+            print(f"{chave}: {valor}")
+        for problema in problemas:
+            print(f"PROBLEMA: {problema}")
+        print("Backup íntegro." if not problemas else f"{len(problemas)} problemas encontrados.")
+        return 1 if problemas else 0
+
+    def mostrar(copiadas, total):
+        print(f"\rBanco: {copiadas}/{total} páginas", end="", flush=True)
+
+    try:
+        resumo = fazer_backup(args.pasta, args.manter, mostrar)
+    except (OSError, sqlite3.Error) as e:
+        print(f"\nErro: {e}")
+        return 1
+
+    pdfs = resumo["pdfs"]
+    print(f"\nSnapshot: {resumo['snapshot']} ({resumo['snapshots_apagados']} antigos apagados)")
+    print(
+        f"PDFs: {pdfs['copiados']} copiados ({pdfs['bytes_copiados'] / 1024 / 1024:.1f} MB), "
+        f"{pdfs['inalterados']} inalterados. Concluído em {resumo['segundos']:.1f}s."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Cache em disco dos PDFs gerados sob demanda (config.PDF_SOB_DEMANDA).
+
+Tudo o que o PDF mostra está na linha da tabela os, então o arquivo não precisa
+ser guardado: é gerado quando o documento é aberto e fica em PASTA_CACHE_PDF. O
+nome leva um hash do conteúdo da linha; alterar o documento muda o nome, e a
+versão anterior é apagada na próxima geração.
+
+O cache tem no máximo LIMITE_MB (DIPCELL_CACHE_PDF_MB). Passando disso, saem os
+arquivos usados há mais tempo: cada uso renova a data de modificação do arquivo.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .config import LOGO_PADRAO, PASTA_CACHE_PDF
+from .documentos import CAMPOS_EDITAVEIS
+from .metricas import instrumentar
+from .utils import caminho_pdf_documento
+
+LIMITE_MB = float(os.environ.get("DIPCELL_CACHE_PDF_MB", "200"))
+
+# Aumente ao mudar o layout em pdf_generator: os PDFs antigos deixam de ser usados
+VERSAO_MODELO = 1
+
+# Campos que aparecem no PDF (id, arquivo, versao e as colunas tipadas não aparecem)
+CAMPOS_PDF = ("numero", "tipo_documento") + CAMPOS_EDITAVEIS
+
+# Sobras de gerações interrompidas são apagadas depois deste tempo
+IDADE_MAXIMA_PARCIAL_S = 3600
+
+_lock = threading.Lock()
+_acertos = 0
+_faltas = 0
+
+
+def chave_registro(registro):
+    """Hash do conteúdo do registro (e do modelo do PDF) que entra no nome do arquivo."""
+    conteudo = {campo: "" if registro.get(campo) is None else str(registro.get(campo)) for campo in CAMPOS_PDF}
+    try:
+        info = os.stat(LOGO_PADRAO)
+        logo = (info.st_size, info.st_mtime_ns)
+    except OSError:
+        logo = None
+    texto = json.dumps([VERSAO_MODELO, logo, conteudo], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def _prefixo(tipo_documento, numero):
+    """OS-0042 -> OS_0042, o mesmo nome do PDF em PASTA_OS."""
+    return os.path.splitext(os.path.basename(caminho_pdf_documento(tipo_documento, numero)))[0]
+
+
+def caminho_no_cache(registro, pasta=PASTA_CACHE_PDF):
+    prefixo = _prefixo(registro["tipo_documento"], registro["numero"])
+    return os.path.join(pasta, f"{prefixo}-{chave_registro(registro)}.pdf")
+
+
+@instrumentar("pdf.cache")
+def obter_pdf(registro, pasta=PASTA_CACHE_PDF, limite_mb=LIMITE_MB):
+    """Caminho do PDF do registro, gerando-o se ainda não estiver no cache.
+
+    Lança ErroGeracaoPDF como renderizar_documento.
+    """
+    global _acertos, _faltas
+    caminho = caminho_no_cache(registro, pasta)
+    try:
+        os.utime(caminho)  # Marca como usado agora
+    except FileNotFoundError:
+        pass
+    else:
+        with _lock:
+            _acertos += 1
+        return caminho
+
+    from .pdf_generator import argumentos_de_registro, renderizar_documento
+
+    with _lock:
+        _faltas += 1
+    os.makedirs(pasta, exist_ok=True)
+    # Nome único por thread e processo: dois terminais podem gerar o mesmo PDF ao mesmo tempo
+    parcial = f"{caminho}.{os.getpid()}-{threading.get_ident()}.parcial"
+    try:
+        renderizar_documento(*argumentos_de_registro(registro), destino=parcial)
+        os.replace(parcial, caminho)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+
+    descartar(registro["tipo_documento"], registro["numero"], pasta, manter=caminho)
+    podar(pasta, limite_mb, manter=caminho)
+    return caminho
+
+
+def descartar(tipo_documento, numero, pasta=PASTA_CACHE_PDF, manter=None):
+    """Apaga do cache os PDFs do documento (exceto `manter`). Retorna quantos apagou."""
+    apagados = 0
+    for caminho in glob.glob(os.path.join(pasta, f"{_prefixo(tipo_documento, numero)}-*.pdf")):
+        if caminho == manter:
+            continue
+        try:
+            os.remove(caminho)
+            apagados += 1
+        except OSError:
+            pass  # Aberto no leitor de PDF (Windows): sai numa próxima poda
+    return apagados
+
+
+def podar(pasta=PASTA_CACHE_PDF, limite_mb=LIMITE_MB, manter=None):
+    """Apaga os PDFs usados há mais tempo até o cache caber em `limite_mb`. Retorna quantos apagou."""
+    agora = time.time()
+    arquivos = []
+    total = 0
+    apagados = 0
+    try:
+        entradas = list(os.scandir(pasta))
+    except FileNotFoundError:
+        return 0
+
+    for entrada in entradas:
+        try:
+            info = entrada.stat()
+        except OSError:
+            continue
+        if entrada.name.endswith(".parcial"):
+            if agora - info.st_mtime > IDADE_MAXIMA_PARCIAL_S:
+                try:
+                    os.remove(entrada.path)
+                except OSError:
+                    pass
+            continue
+        if entrada.name.endswith(".pdf"):
+            arquivos.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+    limite = limite_mb * 1024 * 1024
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        if caminho == manter:
+            continue
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        apagados += 1
+    return apagados
+
+
+def estatisticas(pasta=PASTA_CACHE_PDF):
+    """Arquivos e tamanho do cache, com acertos e faltas desde a abertura do programa."""
+    try:
+        tamanhos = [e.stat().st_size for e in os.scandir(pasta) if e.name.endswith(".pdf")]
+    except FileNotFoundError:
+        tamanhos = []
+    with _lock:
+        acertos, faltas = _acertos, _faltas
+    return {
+        "arquivos": len(tamanhos),
+        "bytes": sum(tamanhos),
+        "limite_bytes": int(LIMITE_MB * 1024 * 1024),
+        "acertos": acertos,
+        "faltas": faltas,
+    }
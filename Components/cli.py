@@ -0,0 +1,233 @@
+"""Linha de comando sobre a camada de dados e de PDF, sem interface gráfica.
+
+Uso:
+    python -m Components.cli criar --cliente "Maria" --telefone "(11) 99999-0000" --modelo "Galaxy A12" --valor 150,00
+    python -m Components.cli situacao OS-0042 CONCLUÍDA --pdf
+    python -m Components.cli buscar samsung --limite 20
+    python -m Components.cli mostrar VENDA-0007 --json
+    python -m Components.cli pdf OS-0042 --destino /tmp/OS_0042.pdf
+    python -m Components.cli exportar documentos.csv --busca samsung
+    python -m Components.cli --banco outra_base.db buscar maria
+
+Usa as mesmas regras da interface (Components.documentos). Nenhum diálogo é aberto:
+erros são escritos na saída de erro e o código de saída indica o resultado
+(0 sucesso, 1 documento não encontrado ou falha, 2 dados inválidos).
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+
+from . import database
+from .cache_pdf import obter_pdf
+from .config import PDF_SOB_DEMANDA
+from .database import (
+    TIPOS_DOCUMENTO, ConflitoEdicao, ErroBanco, criar_banco, fechar_conexoes, fetch_document, insert_document,
+    list_documents, update_document
+)
+from .documentos import (
+    CHECKLIST_ITENS, METODOS_PAGAMENTO, SITUACOES, TIPOS_GARANTIA, DocumentoInvalido,
+    montar_documento, mudanca_de_situacao
+)
+
+OK, FALHA, INVALIDO = 0, 1, 2
+
+# Colunas mostradas por `buscar` (a senha do aparelho nunca é mostrada)
+COLUNAS_BUSCA = ("numero", "cliente", "telefone", "modelo", "situacao", "valor", "entrada")
+
+
+class FalhaComando(Exception):
+    """Documento não encontrado ou PDF não gerado: encerra com código 1."""
+
+
+def _erro(mensagem):
+    print(f"Erro: {mensagem}", file=sys.stderr)
+
+
+def _sem_senha(registro):
+    return {k: v for k, v in registro.items() if k != "senha"}
+
+
+def _tipo_do_numero(numero):
+    """OS-0042 -> OS. O prefixo do número identifica o tipo do documento."""
+    tipo = numero.partition("-")[0].upper()
+    if tipo not in TIPOS_DOCUMENTO:
+        raise DocumentoInvalido(f"Número inválido: {numero}. Use o formato OS-0001 ou VENDA-0001.")
+    return tipo
+
+
+def _buscar(numero):
+    numero = numero.upper()
+    registro = fetch_document(numero, _tipo_do_numero(numero))
+    if registro is None:
+        raise FalhaComando(f"Documento {numero} não encontrado.")
+    return registro
+
+
+def _gerar_pdf(registro, destino=None):
+    """Renderiza o PDF do registro e retorna o caminho (no cache, com PDF_SOB_DEMANDA)."""
+    try:
+        from .pdf_generator import ErroGeracaoPDF, argumentos_de_registro, renderizar_documento
+    except ImportError as e:
+        raise FalhaComando(f"Geração de PDF indisponível: {e}") from None
+
+    try:
+        if destino is None and PDF_SOB_DEMANDA:
+            return obter_pdf(registro)
+        return renderizar_documento(*argumentos_de_registro(registro), destino=destino)
+    except ErroGeracaoPDF as e:
+        raise FalhaComando(f"{e.titulo}: {e}") from None
+
+
+# ==========================================================
+# SUBCOMANDOS
+# ==========================================================
+
+def _cmd_criar(args):
+    dados_db = montar_documento(
+        args.cliente, args.telefone, args.modelo, args.valor,
+        tipo_documento=args.tipo, situacao=args.situacao, entrada=args.entrada,
+        imei=args.imei, senha=args.senha, acessorios=args.acessorios, problemas=args.problemas,
+        tipo_garantia=args.tipo_garantia, dias_garantia=args.dias_garantia,
+        metodo_pagamento=args.pagamento, parcelas=args.parcelas, checklist=args.checklist,
+    )
+    numero = insert_document(dados_db)
+    print(numero)
+    if args.pdf:
+        print(_gerar_pdf(_buscar(numero)))
+    return OK
+
+
+def _cmd_situacao(args):
+    registro = _buscar(args.numero)
+    update_document(
+        registro["numero"], registro["tipo_documento"], mudanca_de_situacao(registro, args.situacao),
+        versao=registro["versao"],
+    )
+    if args.pdf:
+        print(_gerar_pdf(_buscar(registro["numero"])))
+    return OK
+
+
+def _cmd_buscar(args):
+    rows, total = list_documents(args.termo, args.limite, 0)
+    if args.json:
+        for row in rows:
+            print(json.dumps(_sem_senha(row), ensure_ascii=False))
+    else:
+        for row in rows:
+            print("\t".join(str(row.get(col) or "") for col in COLUNAS_BUSCA))
+        print(f"{len(rows)} de {total} documentos.", file=sys.stderr)
+    return OK
+
+
+def _cmd_mostrar(args):
+    registro = _sem_senha(_buscar(args.numero))
+    if args.json:
+        print(json.dumps(registro, ensure_ascii=False, indent=2))
+    else:
+        largura = max(len(col) for col in registro)
+        for col, valor in registro.items():
+            print(f"{col.ljust(largura)}  {'' if valor is None else valor}")
+    return OK
+
+
+def _cmd_pdf(args):
+    print(_gerar_pdf(_buscar(args.numero), args.destino))
+    return OK
+
+
+def _cmd_exportar(args):
+    from .exportacao import exportar
+
+    try:
+        exportados = exportar(args.destino, args.busca, args.formato)
+    except ValueError as e:
+        raise DocumentoInvalido(str(e)) from None
+    print(f"{exportados} documentos exportados para {args.destino}")
+    return OK
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description="Opera os documentos sem a interface gráfica.")
+    parser.add_argument("--banco", help="Arquivo do banco (padrão: o mesmo da interface).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("criar", help="Cria uma OS ou venda e imprime o número reservado.")
+    p.add_argument("--tipo", choices=TIPOS_DOCUMENTO, default="OS")
+    p.add_argument("--cliente", required=True)
+    p.add_argument("--telefone", required=True)
+    p.add_argument("--modelo", required=True, help="Modelo (OS) ou produto (venda).")
+    p.add_argument("--valor", required=True, help="Valor em reais, ex.: 1.250,00")
+    p.add_argument("--situacao", choices=SITUACOES, default=None,
+                   help="Padrão: EM ABERTO (OS) ou CONCLUÍDA (venda).")
+    p.add_argument("--entrada", default=None, help="Data de entrada dd/mm/aaaa (padrão: hoje).")
+    p.add_argument("--imei", default="")
+    p.add_argument("--senha", default="")
+    p.add_argument("--acessorios", default="")
+    p.add_argument("--problemas", default="")
+    p.add_argument("--tipo-garantia", choices=TIPOS_GARANTIA, default="Com Garantia")
+    p.add_argument("--dias-garantia", type=int, choices=(30, 90), default=90)
+    p.add_argument("--pagamento", choices=METODOS_PAGAMENTO, default="CARTÃO")
+    p.add_argument("--parcelas", type=int, default=1, help="Parcelas do crediário (só vendas).")
+    p.add_argument("--checklist", action="append", default=[], choices=CHECKLIST_ITENS, metavar="ITEM",
+                   help="Item do checklist com defeito (pode repetir).")
+    p.add_argument("--pdf", action="store_true", help="Gerar o PDF e imprimir o caminho.")
+    p.set_defaults(executar=_cmd_criar)
+
+    p = sub.add_parser("situacao", help="Muda a situação (recalcula saída e garantia).")
+    p.add_argument("numero", help="Ex.: OS-0042")
+    p.add_argument("situacao", choices=SITUACOES)
+    p.add_argument("--pdf", action="store_true", help="Regerar o PDF e imprimir o caminho.")
+    p.set_defaults(executar=_cmd_situacao)
+
+    p = sub.add_parser("buscar", help="Busca como na Lista (mais recentes primeiro).")
+    p.add_argument("termo", nargs="?", default="")
+    p.add_argument("--limite", type=int, default=50)
+    p.add_argument("--json", action="store_true", help="Um documento JSON por linha.")
+    p.set_defaults(executar=_cmd_buscar)
+
+    p = sub.add_parser("mostrar", help="Mostra todos os campos de um documento.")
+    p.add_argument("numero")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(executar=_cmd_mostrar)
+
+    p = sub.add_parser("pdf", help="Gera o PDF de um documento e imprime o caminho.")
+    p.add_argument("numero")
+    p.add_argument("--destino", default=None,
+                   help="Outro caminho para o PDF (o padrão fica em PASTA_OS, ou no cache com PDFs sob demanda).")
+    p.set_defaults(executar=_cmd_pdf)
+
+    p = sub.add_parser("exportar", help="Exporta uma busca para CSV, JSON Lines ou XLSX.")
+    p.add_argument("destino")
+    p.add_argument("--busca", default="")
+    p.add_argument("--formato", default=None, help="csv, jsonl ou xlsx (padrão: pela extensão).")
+    p.set_defaults(executar=_cmd_exportar)
+
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.banco:
+        database.definir_caminho_banco(args.banco)
+
+    try:
+        criar_banco()
+        return args.executar(args)
+    except DocumentoInvalido as e:
+        _erro(e)
+        return INVALIDO
+    except ErroBanco as e:
+        _erro(f"{e.titulo}: {e}")
+        return FALHA
+    except (FalhaComando, ConflitoEdicao, OSError, sqlite3.Error) as e:
+        _erro(e)
+        return FALHA
+    finally:
+        fechar_conexoes()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
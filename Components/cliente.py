@@ -0,0 +1,239 @@
+"""Cliente do servidor de documentos (Components.servidor).
+
+As funções têm os mesmos nomes, argumentos e retornos das de Components.database
+(e de relatorios.resumo_financeiro), mas fazem as operações por HTTP. Cada thread
+mantém a sua conexão com o servidor aberta (keep-alive).
+
+Erros de validação do servidor chegam como ValueError e conflitos de edição como
+ConflitoEdicao, como no banco local; falhas de comunicação lançam ErroServidor.
+"""
+
+import http.client
+import json
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+from .config import SERVIDOR_URL
+from .database import ConflitoEdicao, ErroBanco
+from .metricas import instrumentar
+
+TEMPO_LIMITE_S = 15
+# Um pouco menos que o TEMPO_OCIOSO_S do servidor: conexões mais antigas são refeitas
+# antes de usar, em vez de descobrir na hora que o servidor já as fechou
+REUSO_MAXIMO_S = 25
+
+_url = SERVIDOR_URL
+_local = threading.local()
+
+# Versão dos dados vista no servidor e o contador local equivalente (ver versao_dados)
+_lock_versao = threading.Lock()
+_versao_servidor = None
+_versao_local = 0
+
+
+class ErroServidor(ErroBanco):
+    """Servidor inacessível ou com erro interno."""
+
+    def __init__(self, mensagem):
+        super().__init__(mensagem, "Erro de Conexão com o Servidor")
+
+
+def definir_servidor(url):
+    """Passa a usar outro servidor (benchmarks, testes contra localhost)."""
+    global _url
+    _url = url.rstrip("/")
+    fechar_conexao_da_thread()
+
+
+def fechar_conexao_da_thread():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _conexao():
+    conn = getattr(_local, "conn", None)
+    if conn is not None and (_local.url != _url or time.monotonic() - _local.uso > REUSO_MAXIMO_S):
+        fechar_conexao_da_thread()
+        conn = None
+    if conn is None:
+        partes = urlsplit(_url)
+        if partes.scheme != "http" or not partes.hostname:
+            raise ErroServidor(f"Endereço do servidor inválido: {_url!r} (ex.: http://192.168.0.10:8765)")
+        conn = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=TEMPO_LIMITE_S)
+        _local.conn, _local.url, _local.reusada = conn, _url, False
+    return conn
+
+
+def _observar_versao(cabecalho):
+    """Avança o contador local quando a versão dos dados no servidor muda. Retorna o contador."""
+    global _versao_servidor, _versao_local
+    if not cabecalho:
+        return _versao_local
+    instancia, _, versao = cabecalho.partition(":")
+    versao = int(versao)
+    with _lock_versao:
+        anterior = _versao_servidor
+        if anterior is not None and anterior[0] == instancia:
+            if versao <= anterior[1]:
+                return _versao_local  # Resposta atrasada de outra thread
+            _versao_local += versao - anterior[1]
+        else:
+            # Primeira resposta ou servidor reiniciado
+            _versao_local += 1
+        _versao_servidor = (instancia, versao)
+        return _versao_local
+
+
+def _requisitar(metodo, caminho, consulta=None, corpo=None):
+    """Faz a requisição e retorna (status, resposta JSON)."""
+    if consulta:
+        caminho += "?" + urlencode({k: v for k, v in consulta.items() if v is not None})
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+    cabecalhos = {"Content-Type": "application/json"} if dados is not None else {}
+
+    for tentativa in range(2):
+        conn = _conexao()
+        reusada = _local.reusada
+        try:
+            conn.request(metodo, caminho, body=dados, headers=cabecalhos)
+            resposta = conn.getresponse()
+            conteudo = resposta.read()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+            fechar_conexao_da_thread()
+            # Conexão reaproveitada que o servidor fechou antes de ler o pedido: refaz uma vez.
+            # POST só se o pedido nem foi enviado: o servidor pode já ter inserido o documento
+            if reusada and tentativa == 0 and (metodo != "POST" or isinstance(e, BrokenPipeError)):
+                continue
+            raise ErroServidor(f"O servidor {_url} fechou a conexão: {e}") from e
+        except (OSError, http.client.HTTPException) as e:
+            fechar_conexao_da_thread()
+            raise ErroServidor(f"Não foi possível falar com o servidor {_url}: {e}") from e
+        break
+
+    _local.reusada = True
+    _local.uso = time.monotonic()
+    versao = _observar_versao(resposta.getheader("X-Versao-Dados"))
+    if metodo != "GET":
+        _local.versao_escrita = versao
+
+    try:
+        resultado = json.loads(conteudo) if conteudo else {}
+    except ValueError:
+        raise ErroServidor(f"Resposta inválida do servidor ({resposta.status}).") from None
+    if resposta.status == 409 and "conflito" in resultado:
+        conflito = resultado["conflito"]
+        raise ConflitoEdicao(conflito["numero"], conflito["tipo_documento"], conflito["atual"])
+    if resposta.status in (400, 409):
+        raise ValueError(resultado.get("erro"))
+    if resposta.status >= 500 or (resposta.status >= 400 and resposta.status != 404):
+        raise ErroServidor(resultado.get("erro") or f"Erro {resposta.status} do servidor.")
+    return resposta.status, resultado
+
+
+def _caminho_documento(numero, tipo_documento):
+    return f"/documentos/{quote(tipo_documento, safe='')}/{quote(numero, safe='')}"
+
+
+def preparar():
+    """Confere se o servidor responde (equivale a criar_banco no modo local)."""
+    _requisitar("GET", "/saude")
+
+
+def versao_dados():
+    """Como database.versao_dados: muda a cada escrita vista no servidor, de qualquer terminal."""
+    return _versao_local
+
+
+def versao_da_ultima_escrita():
+    """Como database.versao_da_ultima_escrita, pela resposta da última escrita desta thread."""
+    return getattr(_local, "versao_escrita", None)
+
+
+@instrumentar("cliente.proximo_numero")
+def get_next_document_number(tipo_documento):
+    _, resultado = _requisitar("GET", f"/numeracao/{quote(tipo_documento, safe='')}")
+    return resultado["numero"]
+
+
+@instrumentar("cliente.inserir")
+def insert_document(dados_db, caminho_pdf=None):
+    # O número é reservado pelo servidor; o servidor só aceita os campos do formulário
+    dados = {k: v for k, v in dados_db.items() if k not in ("numero", "versao")}
+    _, resultado = _requisitar("POST", "/documentos", corpo={"dados": dados, "caminho_pdf": caminho_pdf})
+    return resultado["numero"]
+
+
+@instrumentar("cliente.buscar_registro")
+def fetch_document(numero, tipo_documento):
+    status, resultado = _requisitar("GET", _caminho_documento(numero, tipo_documento))
+    return None if status == 404 else resultado
+
+
+@instrumentar("cliente.atualizar")
+def update_document(numero, tipo_documento, fields, versao=None):
+    # O caminho do PDF é de cada terminal: não vai para o servidor
+    fields = {k: v for k, v in fields.items() if k not in ("arquivo", "versao")}
+    if not fields:
+        return versao
+    _, resultado = _requisitar(
+        "PATCH", _caminho_documento(numero, tipo_documento), {"versao": versao}, corpo=fields
+    )
+    return resultado["versao"]
+
+
+@instrumentar("cliente.excluir")
+def delete_document(numero, tipo_documento):
+    _requisitar("DELETE", _caminho_documento(numero, tipo_documento))
+
+
+@instrumentar("cliente.contar")
+def count_documents(search=""):
+    _, resultado = _requisitar("GET", "/documentos/total", {"busca": search})
+    return resultado["total"]
+
+
+@instrumentar("cliente.listar_offset", linhas=lambda resultado: len(resultado[0]))
+def list_documents(search="", limit=50, offset=0):
+    _, resultado = _requisitar("GET", "/documentos", {"busca": search, "limite": limit, "offset": offset})
+    return resultado["linhas"], resultado["total"]
+
+
+@instrumentar("cliente.listar_pagina", linhas=len)
+def list_documents_page(search="", limit=50, after_id=None, from_id=None):
+    _, resultado = _requisitar(
+        "GET", "/documentos/pagina",
+        {"busca": search, "limite": limit, "after_id": after_id, "from_id": from_id},
+    )
+    return resultado["linhas"]
+
+
+@instrumentar("cliente.ancora_pagina")
+def find_page_anchor(search="", skip=0, after_id=None):
+    _, resultado = _requisitar(
+        "GET", "/documentos/ancora", {"busca": search, "pular": skip, "after_id": after_id}
+    )
+    return resultado["id"]
+
+
+def iterar_documentos(search="", after_id=None, lote=1000, decrescente=False):
+    """Percorre a busca em lotes keyset, um pedido ao servidor por lote."""
+    cursor = after_id
+    while True:
+        _, resultado = _requisitar(
+            "GET", "/documentos/lote",
+            {"busca": search, "after_id": cursor, "lote": lote, "decrescente": int(decrescente)},
+        )
+        rows = resultado["linhas"]
+        yield from rows
+        if len(rows) < lote:
+            return
+        cursor = rows[-1]["id"]
+
+
+@instrumentar("cliente.resumo_financeiro")
+def resumo_financeiro(inicio, fim):
+    _, resultado = _requisitar("GET", "/resumo", {"inicio": inicio, "fim": fim})
+    return resultado
@@ -63,4 +63,14 @@ def get_app_directory():
 APP_DIR = get_app_directory()
 DB_NAME = os.path.join(APP_DIR, "os_dipcell.db")
 PASTA_OS = os.path.join(APP_DIR, "OS_DIPCELL")
+PASTA_BACKUPS = os.path.join(APP_DIR, "backups")
+PASTA_CACHE_PDF = os.path.join(APP_DIR, "cache_pdf")
 LOGO_PADRAO = resource_path(os.path.join("public", "logo2.png"))
+
+# Servidor de documentos (Components.servidor). Vazio: cada terminal abre o banco
+# diretamente. Ex.: DIPCELL_SERVIDOR=http://192.168.0.10:8765
+SERVIDOR_URL = os.environ.get("DIPCELL_SERVIDOR", "").strip().rstrip("/")
+
+# PDFs sob demanda (Components.cache_pdf): nada é gravado em PASTA_OS ao salvar; o PDF
+# é gerado ao abrir e fica num cache de tamanho limitado. DIPCELL_PDF_SOB_DEMANDA=1 liga
+PDF_SOB_DEMANDA = os.environ.get("DIPCELL_PDF_SOB_DEMANDA", "0") == "1"
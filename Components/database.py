@@ -1,227 +1,838 @@
+import json
+import re
 import sqlite3
-import sys
-from tkinter import messagebox
+import threading
+from collections import OrderedDict
+from datetime import datetime
 
 from .config import APP_DIR, DB_NAME
+from .metricas import instrumentar
+from .utils import arquivo_documento, data_br_para_iso, monetario_para_centavos
+
+
+# ==========================================================
+# CONEXÕES
+# ==========================================================
+
+BUSY_TIMEOUT_MS = 5000
+CACHE_PAGINAS_KB = 32 * 1024  # cache_size negativo = KiB
+MMAP_BYTES = 256 * 1024 * 1024
+CACHE_STATEMENTS = 256
+
+
+class _GerenciadorConexoes:
+    """Mantém uma conexão SQLite por thread, aberta uma única vez e reaproveitada.
+
+    Evita pagar abertura, leitura do schema e cache de páginas frio a cada operação.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._todas = []
+        # Conexão só de leitura, comum ao processo, usada para ler o PRAGMA data_version
+        self._monitor = None
+        self._lock_monitor = threading.Lock()
+        self._data_version_visto = None
+
+    def obter(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                DB_NAME,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                check_same_thread=False,  # Permite fechar todas a partir da thread principal
+                cached_statements=CACHE_STATEMENTS,
+            )
+            conn.row_factory = sqlite3.Row
+            self._configurar(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._todas.append(conn)
+        return conn
+
+    @staticmethod
+    def _configurar(conn):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            print(f"Aviso: Não foi possível ativar o modo WAL: {e}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_PAGINAS_KB}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+    def _data_version(self):
+        """PRAGMA data_version do monitor. Chamar com _lock_monitor."""
+        if self._monitor is None:
+            self._monitor = sqlite3.connect(
+                DB_NAME, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, isolation_level=None
+            )
+        return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def mudou_externamente(self):
+        """Indica se alguém gravou no banco sem passar por registrar_escrita_local.
+
+        O `PRAGMA data_version` do monitor muda a cada commit de qualquer outra
+        conexão, inclusive as das threads deste processo; os commits deste processo
+        são descontados por registrar_escrita_local. Na primeira leitura só guarda o
+        valor: não há caches anteriores a ele.
+        """
+        with self._lock_monitor:
+            versao = self._data_version()
+            anterior, self._data_version_visto = self._data_version_visto, versao
+            return anterior is not None and versao != anterior
+
+    def registrar_escrita_local(self):
+        """Marca como visto o data_version atual, logo após um commit deste processo."""
+        with self._lock_monitor:
+            if self._data_version_visto is not None:
+                self._data_version_visto = self._data_version()
+
+    def fechar_da_thread(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._todas:
+                self._todas.remove(conn)
+        conn.close()
 
+    def fechar_todas(self):
+        with self._lock:
+            conexoes, self._todas = self._todas, []
+            self._local = threading.local()
 
-def criar_banco():
-    # Código da função criar_banco (mantido inalterado)
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS os (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                numero TEXT,
-                cliente TEXT,
-                telefone TEXT,
-                modelo TEXT,
-                imei TEXT,
-                senha TEXT,
-                acessorios TEXT,
-                problemas TEXT,
-                situacao TEXT,
-                valor TEXT,
-                entrada TEXT,
-                saida TEXT,
-                garantia TEXT,
-                arquivo TEXT,
-                tipo_garantia TEXT,
-                metodo_pagamento TEXT,
-                checklist TEXT,
-                dias_garantia INTEGER,
-                tipo_documento TEXT
-            )
-            """
-        )
-        conn.commit()
-
-        # Verificar colunas e adicionar caso faltem (MIGRAÇÃO)
-        c.execute("PRAGMA table_info(os)")
-        cols = [row[1] for row in c.fetchall()]
-
-        obrig = {
-            "garantia": "TEXT",
-            "saida": "TEXT",
-            "tipo_garantia": "TEXT",
-            "metodo_pagamento": "TEXT",
-            "checklist": "TEXT",
-            "dias_garantia": "INTEGER",
-            "tipo_documento": "TEXT",
-            "parcelas": "INTEGER",
-            "detalhes_parcelas": "TEXT",
-        }
-
-        for col, tipo in obrig.items():
-            if col not in cols:
-                try:
-                    if col == "dias_garantia":
-                        default_val = "90"
-                    elif col == "tipo_documento":
-                        default_val = "'OS'"
-                    elif col == "parcelas":
-                        default_val = "1"
-                    else:
-                        default_val = "'Com Garantia'"
-
-                    c.execute(
-                        f"ALTER TABLE os ADD COLUMN {col} {tipo} DEFAULT {default_val}"
-                    )
-                    conn.commit()
-                except sqlite3.Error as e:
-                    print(f"Aviso: Não foi possível adicionar coluna {col}: {e}")
-                    pass
-
-        # Adicionar índices para melhor performance
-        indices = [
-            "CREATE INDEX IF NOT EXISTS idx_numero ON os (numero)",
-            "CREATE INDEX IF NOT EXISTS idx_cliente ON os (cliente)",
-            "CREATE INDEX IF NOT EXISTS idx_modelo ON os (modelo)",
-            "CREATE INDEX IF NOT EXISTS idx_imei ON os (imei)",
-            "CREATE INDEX IF NOT EXISTS idx_problemas ON os (problemas)",
-            "CREATE INDEX IF NOT EXISTS idx_tipo_documento ON os (tipo_documento)",
-            "CREATE INDEX IF NOT EXISTS idx_situacao ON os (situacao)",
-            "CREATE INDEX IF NOT EXISTS idx_entrada ON os (entrada)",
-        ]
-        for idx in indices:
+        for conn in conexoes:
             try:
-                c.execute(idx)
-                conn.commit()
+                conn.execute("PRAGMA optimize")
+                conn.close()
             except sqlite3.Error as e:
-                print(f"Aviso: Não foi possível criar índice: {e}")
+                print(f"Aviso: Erro ao fechar conexão com o banco: {e}")
 
-        conn.close()
+        with self._lock_monitor:
+            if self._monitor is not None:
+                self._monitor.close()
+            self._monitor = None
+            self._data_version_visto = None
+
+
+_conexoes = _GerenciadorConexoes()
+
+
+def obter_conexao():
+    """Conexão da thread atual. Não deve ser fechada por quem a usa."""
+    return _conexoes.obter()
+
+
+def fechar_conexao_da_thread():
+    """Fecha a conexão da thread atual. Para threads de trabalho que vão terminar."""
+    _conexoes.fechar_da_thread()
+
+
+def fechar_conexoes():
+    """Fecha todas as conexões abertas. Chamado ao encerrar o aplicativo."""
+    _conexoes.fechar_todas()
+
+
+def definir_caminho_banco(caminho):
+    """Passa a usar outro arquivo de banco (ferramentas de linha de comando, benchmarks).
+
+    Fecha as conexões abertas e descarta os caches; chame criar_banco() em seguida.
+    """
+    global DB_NAME
+    fechar_conexoes()
+    DB_NAME = caminho
+    invalidar_caches()
+
+
+class ErroBanco(Exception):
+    """Falha ao abrir ou preparar o banco. A interface mostra `titulo` num diálogo."""
+
+    def __init__(self, mensagem, titulo="Erro Crítico"):
+        super().__init__(mensagem)
+        self.titulo = titulo
+
+
+def criar_banco():
+    """Abre o banco e aplica as migrações de esquema pendentes (ver Components.migracoes).
+
+    Lança ErroBanco se o banco não puder ser criado ou migrado.
+    """
+    from .migracoes import migrar  # migracoes importa este módulo
+
+    try:
+        migrar(obter_conexao())
     except sqlite3.Error as e:
-        messagebox.showerror(
-            "Erro Crítico",
+        raise ErroBanco(
             f"Erro ao criar/acessar o banco de dados:\n{str(e)}\n\n"
-            f"Verifique se você tem permissões de escrita no diretório:\n{APP_DIR}",
-        )
-        sys.exit(1)
+            f"Verifique se você tem permissões de escrita no diretório:\n{APP_DIR}"
+        ) from e
     except Exception as e:
-        messagebox.showerror(
-            "Erro Crítico", f"Erro inesperado ao inicializar o banco de dados:\n{str(e)}"
+        raise ErroBanco(f"Erro inesperado ao inicializar o banco de dados:\n{str(e)}") from e
+
+
+class ConflitoEdicao(Exception):
+    """O registro mudou desde que foi lido (ver update_document).
+
+    `atual` é o registro como está no banco agora, ou None se foi excluído.
+    """
+
+    titulo = "Conflito de Edição"
+
+    def __init__(self, numero, tipo_documento, atual):
+        if atual is None:
+            mensagem = f"{tipo_documento} {numero} foi excluído por outro terminal."
+        else:
+            mensagem = f"{tipo_documento} {numero} foi alterado por outro terminal (versão {atual['versao']})."
+        super().__init__(mensagem)
+        self.numero = numero
+        self.tipo_documento = tipo_documento
+        self.atual = atual
+
+
+def _agora_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+# Campos do formulário de edição, na ordem em que aparecem num conflito
+CAMPOS_EDITAVEIS = (
+    "cliente", "telefone", "modelo", "imei", "senha", "acessorios", "problemas", "situacao",
+    "valor", "entrada", "saida", "garantia", "tipo_garantia", "dias_garantia",
+    "metodo_pagamento", "parcelas", "detalhes_parcelas", "checklist",
+)
+
+# Chaves aceitas por insert_document e update_document. Os nomes entram no texto do
+# SQL: nada fora destas listas chega lá. numero e versao são aceitos e ignorados.
+_CAMPOS_INSERCAO = frozenset(CAMPOS_EDITAVEIS + ("numero", "tipo_documento", "arquivo", "versao"))
+_CAMPOS_ATUALIZACAO = frozenset(CAMPOS_EDITAVEIS + ("arquivo", "versao"))
+
+
+def _exigir_campos(fields, permitidos):
+    desconhecidos = set(fields) - permitidos
+    if desconhecidos:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(map(str, desconhecidos)))}")
+
+
+# Colunas tipadas derivadas das colunas de texto da interface:
+# coluna -> (coluna de origem, conversão). Valores em centavos e datas ISO (YYYY-MM-DD)
+# permitem ordenar, filtrar por intervalo e somar direto no SQL.
+COLUNAS_TIPADAS = {
+    "valor_centavos": ("valor", monetario_para_centavos),
+    "entrada_iso": ("entrada", data_br_para_iso),
+    "saida_iso": ("saida", data_br_para_iso),
+    "garantia_iso": ("garantia", data_br_para_iso),
+}
+
+
+def _com_colunas_tipadas(fields):
+    """Acrescenta a `fields` as colunas tipadas cujas colunas de origem estão presentes."""
+    fields = dict(fields)
+    for col, (origem, conversao) in COLUNAS_TIPADAS.items():
+        if origem in fields:
+            fields[col] = conversao(fields[origem])
+    return fields
+
+
+def migrar_parcelas_json(conn, desde_id=0):
+    """Copia para a tabela parcelas o JSON de detalhes_parcelas dos documentos com id > desde_id."""
+    conn.create_function("_conv_centavos", 1, monetario_para_centavos, deterministic=True)
+    conn.create_function("_conv_data", 1, data_br_para_iso, deterministic=True)
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO parcelas (documento_id, numero, vencimento_iso, valor_centavos, pago)
+        SELECT os.id,
+               json_extract(p.value, '$.numero'),
+               _conv_data(json_extract(p.value, '$.vencimento')),
+               COALESCE(_conv_centavos(json_extract(p.value, '$.valor')), 0),
+               COALESCE(json_extract(p.value, '$.status') = 'PG', 0)
+        FROM os, json_each(
+            CASE WHEN json_valid(os.detalhes_parcelas) THEN os.detalhes_parcelas ELSE '[]' END
+        ) AS p
+        WHERE os.id > ?
+          AND _conv_data(json_extract(p.value, '$.vencimento')) IS NOT NULL
+        """,
+        (desde_id,),
+    )
+
+
+def _sincronizar_parcelas(conn, documento_id, detalhes_parcelas):
+    """Reflete o JSON de detalhes_parcelas na tabela parcelas.
+
+    Pagamentos já marcados são preservados enquanto a parcela mantiver vencimento e
+    valor; uma parcela replanejada volta a ficar em aberto.
+    """
+    try:
+        lista = json.loads(detalhes_parcelas) if detalhes_parcelas else []
+    except ValueError:
+        lista = []
+
+    numeros = []
+    for p in lista:
+        vencimento = data_br_para_iso(p.get("vencimento"))
+        if vencimento is None:
+            continue
+        numeros.append(p["numero"])
+        conn.execute(
+            """
+            INSERT INTO parcelas (documento_id, numero, vencimento_iso, valor_centavos, pago)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (documento_id, numero) DO UPDATE SET
+                pago = CASE WHEN excluded.valor_centavos = parcelas.valor_centavos
+                                 AND excluded.vencimento_iso = parcelas.vencimento_iso
+                            THEN parcelas.pago ELSE 0 END,
+                data_pagamento_iso = CASE WHEN excluded.valor_centavos = parcelas.valor_centavos
+                                               AND excluded.vencimento_iso = parcelas.vencimento_iso
+                                          THEN parcelas.data_pagamento_iso END,
+                vencimento_iso = excluded.vencimento_iso,
+                valor_centavos = excluded.valor_centavos
+            """,
+            (
+                documento_id,
+                p["numero"],
+                vencimento,
+                monetario_para_centavos(p.get("valor")) or 0,
+                1 if p.get("status") == "PG" else 0,
+            ),
         )
-        sys.exit(1)
 
+    placeholders = ", ".join("?" * len(numeros))
+    conn.execute(
+        f"DELETE FROM parcelas WHERE documento_id=? AND numero NOT IN ({placeholders})",
+        [documento_id] + numeros,
+    )
 
-def _connect():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
 
+# Tipos de documento e o prefixo de numeração de cada um (OS-0001, VENDA-0001)
+TIPOS_DOCUMENTO = ("OS", "VENDA")
 
-def get_next_document_number(tipo_documento):
-    conn = sqlite3.connect(DB_NAME)
-    try:
-        c = conn.cursor()
-        if tipo_documento == "OS":
-            c.execute(
-                "SELECT MAX(CAST(SUBSTR(numero, 4) AS INTEGER)) FROM os WHERE tipo_documento='OS'"
-            )
-            max_num = c.fetchone()[0] or 0
-            return f"OS-{max_num+1:04d}"
 
-        if tipo_documento == "VENDA":
-            c.execute(
-                "SELECT MAX(CAST(SUBSTR(numero, 7) AS INTEGER)) FROM os WHERE tipo_documento='VENDA'"
-            )
-            max_num = c.fetchone()[0] or 0
-            return f"VENDA-{max_num+1:04d}"
+def formatar_numero(tipo_documento, sequencial):
+    return f"{tipo_documento}-{sequencial:04d}"
+
+
+def atualizar_sequencias(conn, desde_id=0):
+    """Avança cada sequência até o maior número gravado nos documentos com id > desde_id.
+
+    Usada depois de gravações em lote que trazem números próprios (importação).
+    """
+    for tipo in TIPOS_DOCUMENTO:
+        conn.execute(
+            "UPDATE sequencias SET ultimo = MAX(ultimo, ("
+            "SELECT COALESCE(MAX(CAST(SUBSTR(numero, ?) AS INTEGER)), 0) "
+            "FROM os WHERE tipo_documento=? AND id > ?)) WHERE tipo_documento=?",
+            (len(tipo) + 2, tipo, desde_id, tipo),
+        )
 
+
+def _reservar_numero(conn, tipo_documento):
+    """Reserva o próximo número do tipo. Deve rodar dentro da transação de escrita."""
+    cur = conn.execute(
+        "UPDATE sequencias SET ultimo = ultimo + 1 WHERE tipo_documento=?", (tipo_documento,)
+    )
+    if cur.rowcount != 1:
         raise ValueError(f"Tipo de documento inválido: {tipo_documento}")
-    finally:
-        conn.close()
+    ultimo = conn.execute(
+        "SELECT ultimo FROM sequencias WHERE tipo_documento=?", (tipo_documento,)
+    ).fetchone()[0]
+    return formatar_numero(tipo_documento, ultimo)
 
 
-def insert_document(dados_db, caminho_pdf):
-    conn = sqlite3.connect(DB_NAME)
-    try:
-        c = conn.cursor()
+# Colunas pesquisáveis pela caixa de busca da Lista
+COLUNAS_BUSCA = ("numero", "cliente", "modelo", "imei", "problemas")
 
-        cols = ", ".join(dados_db.keys())
-        placeholders = ", ".join("?" * len(dados_db))
-        values = tuple(dados_db.values()) + (caminho_pdf,)
 
-        c.execute(f"INSERT INTO os ({cols}, arquivo) VALUES ({placeholders}, ?)", values)
+# Índices e gatilhos que a gravação em lote pode suspender: o índice único de número
+# fica (garante a numeração) e os gatilhos de UPDATE/DELETE não disparam em INSERT.
+_MANTER_NA_IMPORTACAO = ("idx_tipo_numero", "os_fts_ad", "os_fts_au", "parcelas_os_ad")
 
-        conn.commit()
-    finally:
-        conn.close()
 
+def suspender_indices(conn):
+    """Remove os índices secundários de os e o gatilho de inserção do FTS.
 
-def list_documents(search="", limit=50, offset=0):
-    """Retorna (rows, total_records). rows é uma lista de dicts com as colunas do DB."""
-    conn = _connect()
-    try:
-        c = conn.cursor()
-
-        count_query = "SELECT COUNT(*) FROM os"
-        count_params = []
-        if search:
-            search_pattern = f"%{search}%"
-            count_query += (
-                " WHERE numero LIKE ? OR cliente LIKE ? OR modelo LIKE ? OR imei LIKE ? OR problemas LIKE ?"
-            )
-            count_params = [search_pattern] * 5
-        c.execute(count_query, count_params)
-        total_records = c.fetchone()[0]
-
-        query = "SELECT * FROM os"
-        params = []
-        if search:
-            search_pattern = f"%{search}%"
-            query += (
-                " WHERE numero LIKE ? OR cliente LIKE ? OR modelo LIKE ? OR imei LIKE ? OR problemas LIKE ?"
-            )
-            params = [search_pattern] * 5
-        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-
-        c.execute(query, params)
-        rows = [dict(row) for row in c.fetchall()]
-        return rows, total_records
-    finally:
-        conn.close()
+    Retorna as definições removidas, para `restaurar_indices`. Deve rodar na mesma
+    transação da gravação em lote, para que uma falha desfaça também a remoção.
+    """
+    definicoes = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name='os' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    definicoes = [tuple(d) for d in definicoes if d[1] not in _MANTER_NA_IMPORTACAO]
+    for tipo, nome, _ in definicoes:
+        conn.execute(f"DROP {tipo.upper()} {nome}")
+    return definicoes
 
 
-def fetch_document(numero, tipo_documento):
-    conn = _connect()
-    try:
-        row = conn.execute(
-            "SELECT * FROM os WHERE numero=? AND tipo_documento=?", (numero, tipo_documento)
-        ).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+def restaurar_indices(conn, definicoes, desde_id=0):
+    """Recria o que `suspender_indices` removeu e indexa no FTS os documentos com id > desde_id."""
+    for _, _, sql in definicoes:
+        conn.execute(sql)
+    if any(nome == "os_fts_ai" for _, nome, _ in definicoes):
+        cols = ", ".join(COLUNAS_BUSCA)
+        conn.execute(
+            f"INSERT INTO os_fts(rowid, {cols}) SELECT id, {cols} FROM os WHERE id > ?",
+            (desde_id,),
+        )
 
 
-def update_document(numero, tipo_documento, fields):
-    """Atualiza colunas em `fields` para o registro (numero, tipo_documento)."""
-    if not fields:
-        return
+def _termo_fts(search):
+    """Converte o texto digitado numa consulta FTS5 com prefixo em cada palavra.
 
-    conn = sqlite3.connect(DB_NAME)
-    try:
-        set_clause = ", ".join(f"{col}=?" for col in fields.keys())
-        params = list(fields.values()) + [numero, tipo_documento]
+    "sams gal" -> '"sams"* "gal"*'. Retorna None se não houver palavras pesquisáveis.
+    """
+    palavras = re.findall(r"\w+", search)
+    if not palavras:
+        return None
+    return " ".join(f'"{p}"*' for p in palavras)
+
+
+def _tem_fts(conn):
+    return (
         conn.execute(
-            f"UPDATE os SET {set_clause} WHERE numero=? AND tipo_documento=?", params
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='os_fts'"
+        ).fetchone()
+        is not None
+    )
+
+
+@instrumentar("db.proximo_numero")
+def get_next_document_number(tipo_documento):
+    """Próximo número do tipo, apenas para exibição: a reserva acontece em insert_document."""
+    row = obter_conexao().execute(
+        "SELECT ultimo FROM sequencias WHERE tipo_documento=?", (tipo_documento,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Tipo de documento inválido: {tipo_documento}")
+    return formatar_numero(tipo_documento, row[0] + 1)
+
+
+@instrumentar("db.inserir")
+def insert_document(dados_db, caminho_pdf=None):
+    """Insere o documento reservando o número na mesma transação e retorna o número usado.
+
+    O "numero" de `dados_db` é ignorado: dois terminais salvando ao mesmo tempo
+    recebem números diferentes. Sem `caminho_pdf`, usa o caminho padrão do número
+    (vazio com PDF_SOB_DEMANDA).
+    """
+    _exigir_campos(dados_db, _CAMPOS_INSERCAO)
+    conn = obter_conexao()
+    dados = _com_colunas_tipadas(dados_db)
+    tipo_documento = dados.get("tipo_documento") or "OS"
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        numero = _reservar_numero(conn, tipo_documento)
+        dados["numero"] = numero
+        dados["tipo_documento"] = tipo_documento
+        dados["arquivo"] = caminho_pdf or arquivo_documento(tipo_documento, numero)
+        dados["atualizado_em"] = _agora_iso()
+        dados.pop("versao", None)
+
+        cols = ", ".join(dados.keys())
+        placeholders = ", ".join("?" * len(dados))
+        cur = conn.execute(f"INSERT INTO os ({cols}) VALUES ({placeholders})", tuple(dados.values()))
+        if dados.get("detalhes_parcelas"):
+            _sincronizar_parcelas(conn, cur.lastrowid, dados["detalhes_parcelas"])
+    _registrar_escrita()
+    _cache_registros.invalidar((tipo_documento, numero))
+    return numero
+
+
+# Totais de busca em cache (invalidado a cada escrita)
+_MAX_TOTAIS_CACHE = 256
+_totais_cache = {}
+_versao_dados = 0
+_lock_cache = threading.Lock()
+_escrita_local = threading.local()
+
+
+def _avancar_versao():
+    global _versao_dados
+    with _lock_cache:
+        _versao_dados += 1
+        _totais_cache.clear()
+        return _versao_dados
+
+
+def _registrar_escrita():
+    """Invalida os caches de leitura após uma escrita deste processo na tabela os.
+
+    Retorna o novo valor de versao_dados (ver versao_da_ultima_escrita).
+    """
+    _conexoes.registrar_escrita_local()
+    versao = _avancar_versao()
+    _escrita_local.versao = versao
+    return versao
+
+
+def _verificar_externo():
+    """Descarta os caches de leitura se outra conexão gravou no banco (ex.: outro terminal)."""
+    if _conexoes.mudou_externamente():
+        _avancar_versao()
+        _cache_registros.invalidar()
+
+
+def versao_dados():
+    """Contador que muda a cada escrita, deste processo ou de outros terminais.
+
+    Usado para invalidar caches derivados (ex.: âncoras de página).
+    """
+    _verificar_externo()
+    return _versao_dados
+
+
+def versao_da_ultima_escrita():
+    """Valor de versao_dados logo após a última escrita feita pela thread atual (None se nenhuma)."""
+    return getattr(_escrita_local, "versao", None)
+
+
+class _CacheRegistros:
+    """Cache LRU dos registros lidos por fetch_document, chaveado por (tipo_documento, numero).
+
+    Escritas deste processo invalidam só a chave afetada. Escritas de outros
+    terminais são detectadas por _verificar_externo, que descarta o cache inteiro.
+    """
+
+    def __init__(self, capacidade=512):
+        self.capacidade = capacidade
+        self._registros = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        with self._lock:
+            registro = self._registros.get(chave)
+            if registro is None:
+                self.faltas += 1
+                return None
+            self._registros.move_to_end(chave)
+            self.acertos += 1
+            return dict(registro)
+
+    def guardar(self, chave, registro, versao):
+        with self._lock:
+            # Uma escrita durante a leitura pode ter deixado o registro obsoleto
+            if versao != _versao_dados:
+                return
+            self._registros[chave] = dict(registro)
+            self._registros.move_to_end(chave)
+            while len(self._registros) > self.capacidade:
+                self._registros.popitem(last=False)
+
+    def invalidar(self, chave=None):
+        """Descarta um registro, ou o cache inteiro se `chave` for None."""
+        with self._lock:
+            if chave is None:
+                self._registros.clear()
+            else:
+                self._registros.pop(chave, None)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                "registros": len(self._registros),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+_cache_registros = _CacheRegistros()
+
+
+def estatisticas_cache_registros():
+    """Acertos, faltas e ocupação do cache de fetch_document."""
+    return _cache_registros.estatisticas()
+
+
+def invalidar_caches():
+    """Descarta todos os caches de leitura. Para gravações feitas fora de insert/update/delete."""
+    _registrar_escrita()
+    _cache_registros.invalidar()
+
+
+def _filtro_busca(conn, search):
+    """Monta a origem e o filtro da busca.
+
+    Retorna (origem, origem_contagem, coluna_id, condicoes, params),
+    ou None se o termo não tem nada pesquisável.
+    """
+    search = (search or "").strip()
+    if not search:
+        return "os", "os", "os.id", [], []
+
+    if _tem_fts(conn):
+        termo = _termo_fts(search)
+        if termo is None:
+            return None
+        return (
+            "os_fts JOIN os ON os.id = os_fts.rowid",
+            "os_fts",
+            "os_fts.rowid",
+            ["os_fts MATCH ?"],
+            [termo],
         )
-        conn.commit()
-    finally:
-        conn.close()
+
+    search_pattern = f"%{search}%"
+    cond = "(" + " OR ".join(f"{col} LIKE ?" for col in COLUNAS_BUSCA) + ")"
+    return "os", "os", "os.id", [cond], [search_pattern] * len(COLUNAS_BUSCA)
+
+
+def _where(condicoes):
+    return (" WHERE " + " AND ".join(condicoes)) if condicoes else ""
 
 
+def _contar(conn, filtro):
+    origem, origem_contagem, _, condicoes, params = filtro
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {origem_contagem}{_where(condicoes)}", params
+    ).fetchone()[0]
+
+
+@instrumentar("db.contar")
+def count_documents(search=""):
+    """Total de registros da busca. Fica em cache por termo até a próxima escrita."""
+    _verificar_externo()
+    chave = (search or "").strip()
+    with _lock_cache:
+        if chave in _totais_cache:
+            return _totais_cache[chave]
+        versao = _versao_dados
+
+    conn = obter_conexao()
+    filtro = _filtro_busca(conn, chave)
+    total = _contar(conn, filtro) if filtro else 0
+
+    with _lock_cache:
+        # Só guarda se nenhuma escrita aconteceu durante a contagem
+        if versao == _versao_dados:
+            if len(_totais_cache) >= _MAX_TOTAIS_CACHE:
+                _totais_cache.clear()
+            _totais_cache[chave] = total
+    return total
+
+
+@instrumentar("db.listar_offset", linhas=lambda resultado: len(resultado[0]))
+def list_documents(search="", limit=50, offset=0):
+    """Retorna (rows, total_records). rows é uma lista de dicts com as colunas do DB.
+
+    A busca usa o índice FTS5 (prefixo por palavra, sem diferenciar acentos).
+    Se o FTS5 não estiver disponível, cai para LIKE nas mesmas colunas.
+    """
+    total_records = count_documents(search)
+
+    conn = obter_conexao()
+    filtro = _filtro_busca(conn, search)
+    if filtro is None:
+        return [], 0
+
+    origem, _, coluna_id, condicoes, params = filtro
+    c = conn.execute(
+        f"SELECT os.* FROM {origem}{_where(condicoes)} ORDER BY {coluna_id} DESC LIMIT ? OFFSET ?",
+        params + [limit, offset],
+    )
+    rows = [dict(row) for row in c.fetchall()]
+    return rows, total_records
+
+
+@instrumentar("db.listar_pagina", linhas=len)
+def list_documents_page(search="", limit=50, after_id=None, from_id=None):
+    """Paginação por cursor (keyset em id), em ordem decrescente de id.
+
+    - after_id: registros com id < after_id (próxima página).
+    - from_id: os `limit` registros com id >= from_id mais próximos dele (página anterior).
+
+    O custo não depende da profundidade da página, ao contrário de OFFSET.
+    """
+    conn = obter_conexao()
+    filtro = _filtro_busca(conn, search)
+    if filtro is None:
+        return []
+
+    origem, _, coluna_id, condicoes, params = filtro
+    condicoes = list(condicoes)
+    params = list(params)
+
+    if from_id is not None:
+        condicoes.append(f"{coluna_id} >= ?")
+        params.append(from_id)
+        ordem = "ASC"
+    else:
+        if after_id is not None:
+            condicoes.append(f"{coluna_id} < ?")
+            params.append(after_id)
+        ordem = "DESC"
+
+    c = conn.execute(
+        f"SELECT os.* FROM {origem}{_where(condicoes)} ORDER BY {coluna_id} {ordem} LIMIT ?",
+        params + [limit],
+    )
+    rows = [dict(row) for row in c.fetchall()]
+    if ordem == "ASC":
+        rows.reverse()
+    return rows
+
+
+@instrumentar("db.ancora_pagina")
+def find_page_anchor(search="", skip=0, after_id=None):
+    """Retorna o cursor (after_id) que começa `skip` registros depois de `after_id`.
+
+    Só percorre ids do índice, sem ler as linhas; usado para saltar para uma página
+    a partir da âncora conhecida mais próxima.
+    """
+    if skip <= 0:
+        return after_id
+
+    conn = obter_conexao()
+    filtro = _filtro_busca(conn, search)
+    if filtro is None:
+        return after_id
+
+    origem, _, coluna_id, condicoes, params = filtro
+    condicoes = list(condicoes)
+    params = list(params)
+    if after_id is not None:
+        condicoes.append(f"{coluna_id} < ?")
+        params.append(after_id)
+
+    row = conn.execute(
+        f"SELECT {coluna_id} FROM {origem}{_where(condicoes)} ORDER BY {coluna_id} DESC LIMIT 1 OFFSET ?",
+        params + [skip - 1],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def iterar_documentos(search="", after_id=None, lote=1000, decrescente=False):
+    """Percorre todos os registros da busca em lotes, sem carregar tudo na memória.
+
+    Cada lote é uma consulta keyset independente, então nenhuma leitura fica aberta
+    entre um `yield` e outro. `after_id` continua a partir de um id já processado
+    (maior que ele, ou menor se `decrescente`).
+    """
+    conn = obter_conexao()
+    filtro = _filtro_busca(conn, search)
+    if filtro is None:
+        return
+
+    origem, _, coluna_id, condicoes, params = filtro
+    ordem, comparacao = ("DESC", "<") if decrescente else ("ASC", ">")
+    cursor = after_id
+
+    while True:
+        conds = list(condicoes)
+        args = list(params)
+        if cursor is not None:
+            conds.append(f"{coluna_id} {comparacao} ?")
+            args.append(cursor)
+
+        rows = conn.execute(
+            f"SELECT os.* FROM {origem}{_where(conds)} ORDER BY {coluna_id} {ordem} LIMIT ?",
+            args + [lote],
+        ).fetchall()
+        if not rows:
+            return
+
+        for row in rows:
+            yield dict(row)
+        cursor = rows[-1]["id"]
+
+
+@instrumentar("db.atualizar_arquivos")
+def update_arquivos(caminhos):
+    """Atualiza a coluna arquivo em lote. `caminhos` é uma lista de (id, caminho_pdf).
+
+    O caminho do PDF não é uma edição do documento: não muda a versão.
+    """
+    if not caminhos:
+        return
+    conn = obter_conexao()
+    with conn:
+        conn.executemany("UPDATE os SET arquivo=? WHERE id=?", [(c, i) for i, c in caminhos])
+    _registrar_escrita()
+    _cache_registros.invalidar()  # Em lote por id: mais simples descartar tudo
+
+
+@instrumentar("db.buscar_registro")
+def fetch_document(numero, tipo_documento):
+    """Registro (numero, tipo_documento) como dict, ou None. Usa o cache de registros."""
+    _verificar_externo()
+    conn = obter_conexao()
+    chave = (tipo_documento, numero)
+    registro = _cache_registros.obter(chave)
+    if registro is not None:
+        return registro
+
+    versao = _versao_dados
+    row = conn.execute(
+        "SELECT * FROM os WHERE numero=? AND tipo_documento=?", (numero, tipo_documento)
+    ).fetchone()
+    if row is None:
+        return None
+    registro = dict(row)
+    _cache_registros.guardar(chave, registro, versao)
+    return registro
+
+
+@instrumentar("db.atualizar")
+def update_document(numero, tipo_documento, fields, versao=None):
+    """Atualiza colunas em `fields` para o registro (numero, tipo_documento).
+
+    Toda gravação incrementa `versao` e marca `atualizado_em`. Com `versao` (a lida
+    junto com o registro), só grava se ninguém o alterou desde então; senão lança
+    ConflitoEdicao com o registro atual. Retorna a nova versão (None se o registro
+    não existir e `versao` não for dada).
+    """
+    if not fields:
+        return versao
+    _exigir_campos(fields, _CAMPOS_ATUALIZACAO)
+
+    conn = obter_conexao()
+    fields = _com_colunas_tipadas(fields)
+    fields.pop("versao", None)
+    fields["atualizado_em"] = _agora_iso()
+    set_clause = ", ".join(f"{col}=?" for col in fields.keys())
+    condicao = "numero=? AND tipo_documento=?"
+    params = list(fields.values()) + [numero, tipo_documento]
+    if versao is not None:
+        condicao += " AND versao=?"
+        params.append(versao)
+
+    conflito = None
+    nova_versao = None
+    with conn:
+        # IMMEDIATE: a espera pela trava de escrita passa pelo busy_timeout
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(f"UPDATE os SET {set_clause}, versao = versao + 1 WHERE {condicao}", params)
+        row = conn.execute(
+            "SELECT * FROM os WHERE numero=? AND tipo_documento=?", (numero, tipo_documento)
+        ).fetchone()
+        if cur.rowcount == 0:
+            if versao is not None:
+                conflito = ConflitoEdicao(numero, tipo_documento, dict(row) if row else None)
+        else:
+            nova_versao = row["versao"]
+            if "detalhes_parcelas" in fields:
+                _sincronizar_parcelas(conn, row["id"], fields["detalhes_parcelas"])
+
+    _cache_registros.invalidar((tipo_documento, numero))
+    if conflito:
+        raise conflito
+    _registrar_escrita()
+    return nova_versao
+
+
+@instrumentar("db.excluir")
 def delete_document(numero, tipo_documento):
-    conn = sqlite3.connect(DB_NAME)
-    try:
+    conn = obter_conexao()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
         conn.execute(
             "DELETE FROM os WHERE numero=? AND tipo_documento=?", (numero, tipo_documento)
         )
-        conn.commit()
-    finally:
-        conn.close()
+    _registrar_escrita()
+    _cache_registros.invalidar((tipo_documento, numero))
@@ -0,0 +1,222 @@
+"""Regras de preenchimento dos documentos (OS e Venda), sem interface.
+
+Usadas pelos formulários da interface e pela linha de comando (Components.cli):
+data de saída, garantia, parcelas do crediário e checklist saem sempre das mesmas
+funções. Entradas inválidas lançam DocumentoInvalido em vez de abrir diálogos.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from .database import CAMPOS_EDITAVEIS, TIPOS_DOCUMENTO
+from .utils import formatar_monetario, parse_monetario_to_float
+
+SITUACOES_OS = ("EM ABERTO", "EM ANDAMENTO", "CONCLUÍDA", "NÃO PAGO")
+SITUACOES_VENDA = ("CONCLUÍDA", "CANCELADA")
+SITUACOES = SITUACOES_OS + ("CANCELADA",)
+SITUACAO_CONCLUIDA = "CONCLUÍDA"
+
+TIPOS_GARANTIA = ("Com Garantia", "Sem Garantia")
+CREDIARIO = "PARCELADO NO CREDIÁRIO"
+METODOS_PAGAMENTO = ("CARTÃO", "DINHEIRO", "PIX", CREDIARIO)
+MAX_PARCELAS = 12
+
+CHECKLIST_ITENS = (
+    "Tela Display", "Touch Screen", "Teclas", "Sensores de Proximidade",
+    "Bluetooth", "Wi-Fi", "Ligações", "Alto Falante",
+    "Câmera", "Microfone", "Conector Carregador", "Conector Cartão de Memória",
+    "Sim Card", "Outros (Opcional - p/ defeitos internos)",
+)
+
+FORMATO_DATA = "%d/%m/%Y"
+
+
+class DocumentoInvalido(ValueError):
+    """Dados de documento rejeitados pelas regras do formulário."""
+
+    titulo = "Aviso"
+
+
+def hoje():
+    return datetime.now().strftime(FORMATO_DATA)
+
+
+def data_saida(situacao):
+    """Data de saída: hoje para documentos concluídos, vazio nos demais."""
+    return hoje() if situacao == SITUACAO_CONCLUIDA else ""
+
+
+def data_garantia(situacao, tipo_garantia, dias_garantia, entrada):
+    """Fim da garantia, contado da entrada. Só existe em documentos concluídos."""
+    if situacao != SITUACAO_CONCLUIDA or tipo_garantia != "Com Garantia" or dias_garantia <= 0:
+        return "S/Garantia"
+    try:
+        data_base = datetime.strptime(entrada, FORMATO_DATA)
+    except ValueError:
+        # Entrada inválida (raro, mas possível): conta a partir de hoje
+        data_base = datetime.now()
+    return (data_base + timedelta(days=dias_garantia)).strftime(FORMATO_DATA)
+
+
+def gerar_parcelas(total_float, quantidade, entrada):
+    """JSON de detalhes_parcelas: parcelas iguais a cada 30 dias a partir da entrada."""
+    try:
+        data_base = datetime.strptime(entrada, FORMATO_DATA)
+    except ValueError:
+        data_base = datetime.now()
+    valor_parcela = formatar_monetario(total_float / quantidade)
+    return json.dumps([
+        {
+            "numero": i,
+            "vencimento": (data_base + timedelta(days=30 * i)).strftime(FORMATO_DATA),
+            "valor": valor_parcela,
+            "status": "N/PG",
+        }
+        for i in range(1, quantidade + 1)
+    ])
+
+
+def texto_checklist(marcados):
+    """Checklist no formato gravado no banco ("Item:Sim;Item:Não;...").
+
+    `marcados` é um dict item -> "Sim"/"Não" ou um conjunto com os itens marcados.
+    """
+    if isinstance(marcados, dict):
+        return ";".join(f"{item}:{valor}" for item, valor in marcados.items())
+    return ";".join(f"{item}:{'Sim' if item in marcados else 'Não'}" for item in CHECKLIST_ITENS)
+
+
+def dias_do_texto(texto):
+    """"90 Dias" -> 90; vazio ou inválido -> 0."""
+    texto = str(texto or "").replace(" Dias", "").strip()
+    return int(texto) if texto.isdigit() else 0
+
+
+def validar_valor(valor_str):
+    """(total_float, valor_texto) do valor digitado; lança DocumentoInvalido se inválido."""
+    try:
+        total_float = parse_monetario_to_float(valor_str)
+    except ValueError:
+        raise DocumentoInvalido("Formato de valor (R$) inválido.") from None
+    return total_float, formatar_monetario(total_float)
+
+
+def _exigir_opcao(nome, valor, opcoes):
+    if valor not in opcoes:
+        raise DocumentoInvalido(f"{nome} inválido: {valor!r}. Opções: {', '.join(opcoes)}.")
+
+
+def montar_documento(
+    cliente,
+    telefone,
+    modelo,
+    valor,
+    tipo_documento="OS",
+    situacao=None,
+    entrada=None,
+    imei="",
+    senha="",
+    acessorios="",
+    problemas="",
+    tipo_garantia="Com Garantia",
+    dias_garantia=90,
+    metodo_pagamento="CARTÃO",
+    parcelas=1,
+    checklist=(),
+):
+    """dados_db de um documento novo, com os mesmos padrões e regras do formulário.
+
+    O número é reservado por insert_document. Lança DocumentoInvalido.
+    """
+    cliente, telefone, modelo = cliente.strip(), telefone.strip(), modelo.strip()
+    if not all([cliente, telefone, modelo, str(valor).strip()]):
+        raise DocumentoInvalido(
+            "Os campos 'Cliente', 'Telefone', 'Modelo/Produto' e 'Valor (R$)' são obrigatórios."
+        )
+    total_float, valor_texto = validar_valor(valor)
+
+    _exigir_opcao("Tipo de documento", tipo_documento, TIPOS_DOCUMENTO)
+    if situacao is None:
+        situacao = "EM ABERTO" if tipo_documento == "OS" else SITUACAO_CONCLUIDA
+    _exigir_opcao("Situação", situacao,
+                  SITUACOES_OS if tipo_documento == "OS" else SITUACOES_VENDA)
+    _exigir_opcao("Tipo de garantia", tipo_garantia, TIPOS_GARANTIA)
+    _exigir_opcao("Método de pagamento", metodo_pagamento,
+                  METODOS_PAGAMENTO if tipo_documento == "VENDA" else METODOS_PAGAMENTO[:-1])
+
+    entrada = (entrada or "").strip() or hoje()
+    try:
+        datetime.strptime(entrada, FORMATO_DATA)
+    except ValueError:
+        raise DocumentoInvalido(f"Data de entrada inválida: {entrada}. Use o formato dd/mm/aaaa.") from None
+
+    desconhecidos = set(checklist) - set(CHECKLIST_ITENS)
+    if desconhecidos:
+        raise DocumentoInvalido(f"Itens de checklist desconhecidos: {', '.join(sorted(desconhecidos))}.")
+
+    if tipo_garantia != "Com Garantia":
+        dias_garantia = 0
+
+    detalhes_parcelas = ""
+    if metodo_pagamento == CREDIARIO:
+        if not 1 <= parcelas <= MAX_PARCELAS:
+            raise DocumentoInvalido(f"Quantidade de parcelas deve ficar entre 1 e {MAX_PARCELAS}.")
+        detalhes_parcelas = gerar_parcelas(total_float, parcelas, entrada)
+    else:
+        parcelas = 1
+
+    return {
+        "numero": "",
+        "cliente": cliente,
+        "telefone": telefone,
+        "modelo": modelo,
+        "imei": imei.strip(),
+        "senha": senha.strip(),
+        "acessorios": acessorios.strip(),
+        "problemas": problemas.strip(),
+        "situacao": situacao,
+        "valor": valor_texto,
+        "entrada": entrada,
+        "saida": data_saida(situacao),
+        "garantia": data_garantia(situacao, tipo_garantia, dias_garantia, entrada),
+        "tipo_garantia": tipo_garantia,
+        "metodo_pagamento": metodo_pagamento,
+        "checklist": texto_checklist(set(checklist)),
+        "dias_garantia": dias_garantia,
+        "tipo_documento": tipo_documento,
+        "parcelas": parcelas,
+        "detalhes_parcelas": detalhes_parcelas,
+    }
+
+
+def mudanca_de_situacao(registro, situacao):
+    """Campos a gravar ao mudar a situação de um registro existente (saída e garantia).
+
+    Como na tela de edição, qualquer situação vale para os dois tipos.
+    """
+    _exigir_opcao("Situação", situacao, SITUACOES)
+    return {
+        "situacao": situacao,
+        "saida": data_saida(situacao),
+        "garantia": data_garantia(
+            situacao,
+            registro.get("tipo_garantia") or "",
+            registro.get("dias_garantia") or 0,
+            registro.get("entrada") or "",
+        ),
+    }
+
+
+def diferencas_conflito(original, atual, editado):
+    """Campos que outro terminal alterou desde que o registro foi aberto para edição.
+
+    Retorna uma lista de (campo, valor ao abrir, valor atual no banco, valor editado).
+    """
+    def texto(valor):
+        return "" if valor is None else str(valor)
+
+    return [
+        (campo, texto(original.get(campo)), texto(atual.get(campo)), texto(editado.get(campo, original.get(campo))))
+        for campo in CAMPOS_EDITAVEIS
+        if texto(original.get(campo)) != texto(atual.get(campo))
+    ]
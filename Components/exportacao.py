@@ -0,0 +1,288 @@
+"""Exportação do resultado de uma busca da Lista para CSV, JSON Lines ou XLSX.
+
+Uso:
+    python -m Components.exportacao documentos.xlsx
+    python -m Components.exportacao samsung.csv --busca samsung
+    python -m Components.exportacao tudo.jsonl
+
+Os registros vêm de iterar_documentos (lotes keyset) e são escritos um a um, então
+a memória usada não depende da quantidade de linhas. O arquivo é gravado num
+temporário e só substitui o destino quando a exportação termina.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+from .database import count_documents, criar_banco, fechar_conexoes, iterar_documentos
+from .metricas import instrumentar
+
+FORMATOS = ("csv", "jsonl", "xlsx")
+AVISAR_A_CADA = 1000
+
+# (cabeçalho, coluna do banco). Os cabeçalhos são reconhecidos por Components.importacao.
+# A senha do aparelho não é exportada.
+COLUNAS_EXPORTACAO = (
+    ("Tipo", "tipo_documento"),
+    ("Número", "numero"),
+    ("Cliente", "cliente"),
+    ("Telefone", "telefone"),
+    ("Modelo/Produto", "modelo"),
+    ("IMEI", "imei"),
+    ("Acessórios", "acessorios"),
+    ("Problemas", "problemas"),
+    ("Situação", "situacao"),
+    ("Valor (R$)", "valor"),
+    ("Entrada", "entrada"),
+    ("Saída", "saida"),
+    ("Garantia", "garantia"),
+    ("Tipo Garantia", "tipo_garantia"),
+    ("Método Pagamento", "metodo_pagamento"),
+    ("Parcelas", "parcelas"),
+)
+
+# Colunas extras do JSON Lines, já tipadas para quem for processar o arquivo
+COLUNAS_TIPADAS_JSON = ("valor_centavos", "entrada_iso", "saida_iso", "garantia_iso")
+
+
+class ExportacaoCancelada(Exception):
+    pass
+
+
+def formato_do_caminho(caminho):
+    extensao = os.path.splitext(caminho)[1].lower().lstrip(".")
+    if extensao == "json":
+        extensao = "jsonl"
+    if extensao not in FORMATOS:
+        raise ValueError(f"Formato de exportação não suportado: .{extensao} (use .csv, .jsonl ou .xlsx)")
+    return extensao
+
+
+# ==========================================================
+# ESCRITORES: recebem o arquivo/zip aberto e um gerador de registros
+# ==========================================================
+
+def _escrever_csv(destino, registros):
+    with open(destino, "w", encoding="utf-8-sig", newline="") as f:
+        # ";" e BOM: o Excel em português abre direto, com acentos
+        escritor = csv.writer(f, delimiter=";")
+        escritor.writerow([cabecalho for cabecalho, _ in COLUNAS_EXPORTACAO])
+        for registro in registros:
+            escritor.writerow([registro.get(col) or "" for _, col in COLUNAS_EXPORTACAO])
+
+
+def _escrever_jsonl(destino, registros):
+    colunas = [col for _, col in COLUNAS_EXPORTACAO] + list(COLUNAS_TIPADAS_JSON)
+    with open(destino, "w", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps({col: registro.get(col) for col in colunas}, ensure_ascii=False))
+            f.write("\n")
+
+
+# Caracteres de controle não são permitidos em XML
+_RE_INVALIDO_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_EPOCA_EXCEL = date(1899, 12, 30)
+
+_XLSX_ESTATICOS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Documentos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilos: 0 = padrão, 1 = cabeçalho em negrito, 2 = moeda (#,##0.00), 3 = data (numFmt 14)
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# Colunas que viram número na planilha: coluna do banco -> (coluna tipada, estilo)
+_XLSX_NUMERICAS = {
+    "valor": ("valor_centavos", 2),
+    "entrada": ("entrada_iso", 3),
+    "saida": ("saida_iso", 3),
+    "garantia": ("garantia_iso", 3),
+}
+
+
+def _celula_texto(texto, estilo=0):
+    texto = _RE_INVALIDO_XML.sub("", str(texto))
+    atributo = f' s="{estilo}"' if estilo else ""
+    return f'<c t="inlineStr"{atributo}><is><t xml:space="preserve">{escape(texto)}</t></is></c>'
+
+
+def _celula_xlsx(registro, col):
+    if col in _XLSX_NUMERICAS:
+        tipada, estilo = _XLSX_NUMERICAS[col]
+        valor = registro.get(tipada)
+        if valor is not None:
+            if estilo == 2:
+                return f'<c s="2"><v>{valor / 100:.2f}</v></c>'
+            serial = (date.fromisoformat(valor) - _EPOCA_EXCEL).days
+            return f'<c s="3"><v>{serial}</v></c>'
+    valor = registro.get(col)
+    if valor is None or valor == "":
+        return "<c/>"
+    if isinstance(valor, int):
+        return f"<c><v>{valor}</v></c>"
+    return _celula_texto(valor)
+
+
+def _escrever_xlsx(destino, registros):
+    """Planilha mínima escrita direto no zip, linha a linha (strings inline, sem sharedStrings)."""
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in _XLSX_ESTATICOS.items():
+            zf.writestr(nome, conteudo)
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as bruto:
+            def escrever(texto):
+                bruto.write(texto.encode("utf-8"))
+
+            escrever(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>'
+            )
+            escrever("<row>" + "".join(_celula_texto(c, 1) for c, _ in COLUNAS_EXPORTACAO) + "</row>")
+            for registro in registros:
+                escrever("<row>" + "".join(_celula_xlsx(registro, col) for _, col in COLUNAS_EXPORTACAO) + "</row>")
+            escrever("</sheetData></worksheet>")
+
+
+_ESCRITORES = {"csv": _escrever_csv, "jsonl": _escrever_jsonl, "xlsx": _escrever_xlsx}
+
+
+# ==========================================================
+# EXPORTAÇÃO
+# ==========================================================
+
+@instrumentar("exportacao.exportar", linhas=int)
+def exportar(caminho, search="", formato=None, ao_progredir=None, cancelado=None, fonte=None):
+    """Exporta os documentos da busca `search` (a mesma da Lista) para `caminho`.
+
+    `formato` é deduzido da extensão se omitido. `ao_progredir(exportados, total)` é
+    chamado a cada AVISAR_A_CADA linhas; se `cancelado()` retornar True a exportação
+    para com ExportacaoCancelada e o destino não é alterado. `fonte` é o módulo de
+    onde os documentos são lidos (padrão: o banco local; a interface passa
+    Components.backend, que pode ser o servidor).
+    Retorna a quantidade de documentos exportados.
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação não suportado: {formato}")
+
+    contar, iterar = (
+        (fonte.count_documents, fonte.iterar_documentos) if fonte else (count_documents, iterar_documentos)
+    )
+    total = contar(search)
+    exportados = 0
+
+    def registros():
+        nonlocal exportados
+        # Mesma ordem da Lista: mais recentes primeiro
+        for registro in iterar(search, decrescente=True):
+            yield registro
+            exportados += 1
+            if exportados % AVISAR_A_CADA == 0:
+                if cancelado and cancelado():
+                    raise ExportacaoCancelada()
+                if ao_progredir:
+                    ao_progredir(exportados, total)
+
+    temporario = caminho + ".tmp"
+    try:
+        _ESCRITORES[formato](temporario, registros())
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    if ao_progredir:
+        ao_progredir(exportados, total)
+    return exportados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta os documentos para CSV, JSON Lines ou XLSX.")
+    parser.add_argument("destino", help="Arquivo de saída (.csv, .jsonl ou .xlsx).")
+    parser.add_argument("--busca", default="", help="Exportar apenas o resultado desta busca.")
+    parser.add_argument("--formato", choices=FORMATOS, default=None, help="Formato (padrão: pela extensão).")
+    args = parser.parse_args(argv)
+
+    def mostrar(exportados, total):
+        print(f"\r{exportados}/{total} documentos", end="", flush=True)
+
+    criar_banco()
+    try:
+        exportados = exportar(args.destino, args.busca, args.formato, mostrar)
+    except KeyboardInterrupt:
+        print("\nInterrompido.")
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"\nErro: {e}")
+        return 2
+    finally:
+        fechar_conexoes()
+
+    print(f"\n{exportados} documentos exportados para {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
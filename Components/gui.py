@@ -1,24 +1,34 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import customtkinter as ctk
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 import os
-from PIL import Image as PILImage, ImageTk
+import threading
 
 from .config import (
     COR_FUNDO, COR_FRAME, COR_TEXTO, COR_VERDE_PRINCIPAL, COR_VERMELHO,
     COR_AZUL, COR_HOVER_VERDE, COR_BORDA, FONTE_TITULO, FONTE_NORMAL,
-    FONTE_BOLD, LOGO_PADRAO, resource_path
+    FONTE_BOLD, LOGO_PADRAO, PDF_SOB_DEMANDA, resource_path
 )
 from .utils import (
-    parse_monetario_to_float, formatar_monetario, aplicar_mascara_tel, abrir_arquivo
+    formatar_monetario, aplicar_mascara_tel, abrir_arquivo,
+    arquivo_documento, caminho_pdf_documento
 )
-from .database import (
-    get_next_document_number, insert_document, list_documents,
-    fetch_document, update_document, delete_document
+from .backend import (
+    get_next_document_number, insert_document,
+    fetch_document, update_document, delete_document, resumo_financeiro, versao_da_ultima_escrita
 )
-from .pdf_generator import gerar_documento
+from .database import ConflitoEdicao, fechar_conexao_da_thread, estatisticas_cache_registros
+from .documentos import (
+    CHECKLIST_ITENS, CREDIARIO, METODOS_PAGAMENTO, SITUACOES, SITUACOES_OS, TIPOS_GARANTIA,
+    DocumentoInvalido, data_garantia, data_saida, diferencas_conflito, dias_do_texto, gerar_parcelas,
+    texto_checklist, validar_valor
+)
+from . import backend, cache_pdf, metricas
+from .exportacao import exportar
+from .renderizacao import FilaRenderizacao, STATUS_PENDENTE
+from .tarefas import DespachanteTk, ControladorBusca
+from .paginacao import ListaVirtual
 
 class SistemaOS:
 
@@ -27,6 +37,7 @@ class SistemaOS:
         master.title("DIPCELL - Sistema de OS/Vendas")
         master.geometry("1200x800") # Definir um tamanho inicial maior
         master.configure(fg_color=COR_FUNDO) # Aplicar cor de fundo principal
+        self._logo_pil = None  # Ver _imagem_logo
         
         # Configuração de Ícone (Compatível com PyInstaller)
         try:
@@ -36,7 +47,8 @@ class SistemaOS:
                 master.iconbitmap(icon_path)
             # Se não tiver ico, ou além disso, define o ícone da janela via imagem (Linux/Fallback)
             elif os.path.exists(LOGO_PADRAO):
-                master.iconphoto(False, ImageTk.PhotoImage(PILImage.open(LOGO_PADRAO)))
+                from PIL import ImageTk
+                master.iconphoto(False, ImageTk.PhotoImage(self._imagem_logo()))
         except Exception as e:
             print(f"Aviso: Não foi possível definir o ícone: {e}")
         
@@ -76,17 +88,37 @@ class SistemaOS:
         self.data_entrada_var = tk.StringVar(value=datetime.now().strftime("%d/%m/%Y"))
         self.parcelas_var = tk.StringVar(value="1x")
         
-        # Variáveis para paginação
-        self.page_size = 50  # Registros por página
-        self.current_page = 1
+        # Variáveis da lista virtual: só as linhas visíveis existem na Treeview
         self.total_records = 0
-        
-        self.criar_tela_preenchimento(self.container)
-        self.criar_tela_lista(self.container)
-        self.criar_tela_editar(self.container)
+        self._busca_lista = ""
+        self._inicio_lista = 0  # Índice (na busca) da primeira linha visível
+        self._linhas_visiveis = 20
+        self._valores_lista = []  # Valores exibidos em cada linha, para atualizar só o que mudou
+        self._ids_lista = []
+        self._selecionado_id = None
+        self._selecionar_indice = None
+        # Cache de blocos de linhas, preenchido pela thread de busca (ver _consultar_lista)
+        self.lista_virtual = ListaVirtual()
+
+        # Retornos de threads de trabalho voltam para a thread do Tk por aqui
+        self.despachante = DespachanteTk(master)
+        # PDFs são gerados em segundo plano depois que o registro é salvo
+        self.fila_pdf = FilaRenderizacao(self.despachante)
+        
+        # As telas são construídas no primeiro show_frame (ver _tela)
+        self._construtores = {
+            "Preenchimento": self.criar_tela_preenchimento,
+            "Lista": self.criar_tela_lista,
+            "Editar": self.criar_tela_editar,
+            "Resumo": self.criar_tela_resumo,
+        }
 
         self.show_frame("Preenchimento")
         self.gerar_numero_documento() 
+
+        # Painel de diagnóstico oculto (Ctrl+Shift+D)
+        self.janela_diagnostico = None
+        master.bind("<Control-Shift-D>", lambda event: self.abrir_diagnostico())
         
     def gerar_numero_documento(self):
         try:
@@ -95,11 +127,28 @@ class SistemaOS:
             print(f"Erro ao gerar número: {e}")
             self.numero_documento = "ERRO"
 
-    def show_frame(self, page_name):
-        frame = self.frames[page_name]
+    def _tela(self, page_name):
+        """Frame da tela, construído na primeira vez em que é pedido."""
+        if page_name not in self.frames:
+            with metricas.medir(f"gui.construir_{page_name.lower()}"):
+                self._construtores[page_name](self.container)
+        return self.frames[page_name]
+
+    def _imagem_logo(self):
+        """Logo decodificada uma única vez e compartilhada pelas telas."""
+        if self._logo_pil is None:
+            from PIL import Image as PILImage
+            self._logo_pil = PILImage.open(LOGO_PADRAO)
+            self._logo_pil.load()
+        return self._logo_pil
+
+    def show_frame(self, page_name, recarregar=True):
+        frame = self._tela(page_name)
         frame.tkraise()
-        if page_name == "Lista":
-            self.carregar_dados_lista(page=self.current_page) 
+        if page_name == "Lista" and recarregar:
+            self.carregar_dados_lista()
+        elif page_name == "Resumo":
+            self.carregar_resumo()
 
     def criar_tela_preenchimento(self, parent):
         # Substitui Frame por CTkFrame
@@ -234,7 +283,7 @@ class SistemaOS:
         # Logo (Usa CTkImage para compatibilidade de tema)
         if os.path.exists(LOGO_PADRAO):
             try:
-                logo_img = ctk.CTkImage(light_image=PILImage.open(LOGO_PADRAO), size=(200, 200))
+                logo_img = ctk.CTkImage(light_image=self._imagem_logo(), size=(200, 200))
                 logo_label = ctk.CTkLabel(center_frame, image=logo_img, text="")
                 logo_label.pack(pady=(0, 20))
                 self.logo = logo_img # Manter referência
@@ -273,9 +322,9 @@ class SistemaOS:
 
         W_ENTRY = 200 # CTk usa pixels, ajustamos o tamanho
         COMBO_VALORES = {
-            "situacao": ["EM ABERTO", "EM ANDAMENTO", "CONCLUÍDA", "NÃO PAGO"],
-            "tipo_garantia": ["Com Garantia", "Sem Garantia"],
-            "metodo_pagamento": ["CARTÃO", "DINHEIRO", "PIX", "PARCELADO NO CREDIÁRIO"],
+            "situacao": list(SITUACOES_OS),
+            "tipo_garantia": list(TIPOS_GARANTIA),
+            "metodo_pagamento": list(METODOS_PAGAMENTO),
         }
         
         for i, (label, key) in enumerate(campos_info):
@@ -360,18 +409,12 @@ class SistemaOS:
         ctk.CTkLabel(self.checklist_frame, text="CHECKLIST (PROBLEMAS/STATUS)", font=FONTE_BOLD).pack(anchor="w", pady=(10, 5))
         
         self.checklist_vars = {}
-        checklist_itens = [
-            "Tela Display", "Touch Screen", "Teclas", "Sensores de Proximidade", 
-            "Bluetooth", "Wi-Fi", "Ligações", "Alto Falante", 
-            "Câmera", "Microfone", "Conector Carregador", "Conector Cartão de Memória", 
-            "Sim Card", "Outros (Opcional - p/ defeitos internos)"
-        ]
 
         # Frame interno para a checklist (organização em duas colunas)
         chk_inner_frame = ctk.CTkFrame(self.checklist_frame, fg_color="transparent")
         chk_inner_frame.pack(fill="x")
         
-        for i, item in enumerate(checklist_itens):
+        for i, item in enumerate(CHECKLIST_ITENS):
             col = i // 7
             var = tk.StringVar(value="Não")
             # Substitui ttk.Checkbutton por CTkCheckBox
@@ -460,6 +503,13 @@ class SistemaOS:
         b_atualizar_lista.pack(side=tk.RIGHT, padx=5)
         self.botoes_lista.append(b_atualizar_lista)
 
+        b_resumo = ctk.CTkButton(top_frame, text="Resumo Financeiro", width=160, height=35, command=lambda: self.show_frame("Resumo"),
+                                 fg_color="transparent", hover_color=COR_FRAME,
+                                 border_width=1, border_color=COR_VERDE_PRINCIPAL, text_color=COR_VERDE_PRINCIPAL,
+                                 font=FONTE_BOLD, corner_radius=8)
+        b_resumo.pack(side=tk.RIGHT, padx=5)
+        self.botoes_lista.append(b_resumo)
+
         # Frame de Busca (CTkFrame)
         search_frame = ctk.CTkFrame(f, fg_color=COR_FRAME, corner_radius=8)
         search_frame.pack(side="top", fill="x", padx=10, pady=10)
@@ -467,6 +517,11 @@ class SistemaOS:
         ctk.CTkLabel(search_frame, text="Buscar:", font=FONTE_NORMAL).pack(side=tk.LEFT, padx=(15, 5))
         self.search_var = tk.StringVar()
         self.search_var.trace_add("write", lambda name, index, mode: self.buscar_com_reset())
+        # Consultas da lista rodam fora da thread do Tk, com debounce na digitação
+        self.controlador_busca = ControladorBusca(f, self.despachante,
+                                                  consultar=self._consultar_lista,
+                                                  aplicar=self._aplicar_dados_lista,
+                                                  ao_erro=self._erro_dados_lista)
         
         # Entrada de busca (CTkEntry)
         self.search_entry = ctk.CTkEntry(search_frame, 
@@ -482,7 +537,7 @@ class SistemaOS:
         tree_frame = ctk.CTkFrame(f, fg_color=COR_FRAME, corner_radius=10)
         tree_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         
-        columns = ("Tipo", "Número", "Cliente", "Modelo/Produto", "Entrada", "Saída", "Garantia", "Situação", "Arquivo")
+        columns = ("Tipo", "Número", "Cliente", "Modelo/Produto", "Entrada", "Saída", "Garantia", "Situação", "Arquivo", "PDF")
         self.tabela = ttk.Treeview(tree_frame, columns=columns, show='headings')
         
         # Configuração das colunas (mantida)
@@ -504,13 +559,24 @@ class SistemaOS:
         self.tabela.column("Situação", width=100, anchor=tk.CENTER)
         self.tabela.heading("Arquivo", text="Arquivo")
         self.tabela.column("Arquivo", width=50, stretch=tk.NO) 
+        self.tabela.heading("PDF", text="PDF")
+        self.tabela.column("PDF", width=90, anchor=tk.CENTER, stretch=tk.NO)
 
-        # Scrollbar (CTkScrollbar)
-        scrollbar = ctk.CTkScrollbar(tree_frame, command=self.tabela.yview)
-        self.tabela.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar (CTkScrollbar): representa a busca inteira, não só as linhas da Treeview
+        self.scrollbar_lista = ctk.CTkScrollbar(tree_frame, command=self._rolar_scrollbar)
         
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar_lista.pack(side=tk.RIGHT, fill=tk.Y)
         self.tabela.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.tabela.bind("<Configure>", self._redimensionar_lista)
+        self.tabela.bind("<<TreeviewSelect>>", self._ao_selecionar_linha)
+        self.tabela.bind("<MouseWheel>", self._rolar_roda)
+        self.tabela.bind("<Button-4>", lambda event: self._rolar_linhas(-3))
+        self.tabela.bind("<Button-5>", lambda event: self._rolar_linhas(3))
+        self.tabela.bind("<Up>", lambda event: self._mover_selecao(-1))
+        self.tabela.bind("<Down>", lambda event: self._mover_selecao(1))
+        self.tabela.bind("<Prior>", lambda event: self._rolar_linhas(-self._linhas_visiveis))
+        self.tabela.bind("<Next>", lambda event: self._rolar_linhas(self._linhas_visiveis))
         
         # Frame de Ações (CTkFrame)
         action_frame = ctk.CTkFrame(f, fg_color="transparent")
@@ -539,27 +605,17 @@ class SistemaOS:
         b_deletar.pack(side=tk.LEFT, padx=5)
         self.botoes_lista.append(b_deletar)
 
-        # Frame de Paginação
-        pagination_frame = ctk.CTkFrame(action_frame, fg_color="transparent")
-        pagination_frame.pack(side=tk.RIGHT, padx=5)
-        
-        self.page_label = ctk.CTkLabel(pagination_frame, text="Página 1 de 1", font=FONTE_NORMAL)
-        self.page_label.pack(side=tk.LEFT, padx=10)
-        
-        b_prev = ctk.CTkButton(pagination_frame, text="< Anterior", width=100, height=35, command=self.pagina_anterior,
-                               fg_color=COR_FRAME, hover_color="#3F4243",
-                               font=FONTE_NORMAL, corner_radius=8)
-        b_prev.pack(side=tk.LEFT, padx=5)
-        
-        b_next = ctk.CTkButton(pagination_frame, text="Próxima >", width=100, height=35, command=self.pagina_proxima,
-                               fg_color=COR_FRAME, hover_color="#3F4243",
-                               font=FONTE_NORMAL, corner_radius=8)
-        b_next.pack(side=tk.LEFT, padx=5)
-        
-        self.botoes_lista.append(b_prev)
-        self.botoes_lista.append(b_next)
-        
-        self.carregar_dados_lista()
+        # Exporta o resultado da busca atual (roda em segundo plano)
+        self.b_exportar = ctk.CTkButton(action_frame, text="Exportar", width=120, height=35, command=self.exportar_lista,
+                                        fg_color="transparent", hover_color=COR_FRAME,
+                                        border_width=1, border_color=COR_BORDA,
+                                        font=FONTE_BOLD, corner_radius=8)
+        self.b_exportar.pack(side=tk.LEFT, padx=5)
+        self.botoes_lista.append(self.b_exportar)
+
+        # Posição na lista
+        self.rotulo_lista = ctk.CTkLabel(action_frame, text="Nenhum documento", font=FONTE_NORMAL)
+        self.rotulo_lista.pack(side=tk.RIGHT, padx=10)
 
 
     def criar_tela_editar(self, parent):
@@ -612,7 +668,7 @@ class SistemaOS:
         # Logo, se existir
         if os.path.exists(LOGO_PADRAO):
             try:
-                logo_img_edit = ctk.CTkImage(light_image=PILImage.open(LOGO_PADRAO), size=(100, 100))
+                logo_img_edit = ctk.CTkImage(light_image=self._imagem_logo(), size=(100, 100))
                 logo_label_edit = ctk.CTkLabel(center_frame, image=logo_img_edit, text="")
                 logo_label_edit.pack(pady=(0, 10))
                 self.logo_edit = logo_img_edit
@@ -635,8 +691,8 @@ class SistemaOS:
 
         W_ENTRY = 200
         COMBO_VALORES = {
-            "situacao": ["EM ABERTO", "EM ANDAMENTO", "CONCLUÍDA", "NÃO PAGO", "CANCELADA"],
-            "tipo_garantia": ["Com Garantia", "Sem Garantia"],
+            "situacao": list(SITUACOES),
+            "tipo_garantia": list(TIPOS_GARANTIA),
             "metodo_pagamento": ["CARTÃO", "DINHEIRO", "PIX", "PARCELADO NO CREDIÁRIO"],
         }
         
@@ -705,17 +761,11 @@ class SistemaOS:
         ctk.CTkLabel(self.checklist_frame_edit, text="CHECKLIST (PROBLEMAS/STATUS)", font=FONTE_BOLD).pack(anchor="w", pady=(10, 5))
         
         self.checklist_vars_edit = {}
-        checklist_itens = [
-            "Tela Display", "Touch Screen", "Teclas", "Sensores de Proximidade", 
-            "Bluetooth", "Wi-Fi", "Ligações", "Alto Falante", 
-            "Câmera", "Microfone", "Conector Carregador", "Conector Cartão de Memória", 
-            "Sim Card", "Outros (Opcional - p/ defeitos internos)"
-        ]
 
         chk_inner_frame = ctk.CTkFrame(self.checklist_frame_edit, fg_color="transparent")
         chk_inner_frame.pack(fill="x")
         
-        for i, item in enumerate(checklist_itens):
+        for i, item in enumerate(CHECKLIST_ITENS):
             col = i // 7
             var = tk.StringVar(value="Não")
             chk = ctk.CTkCheckBox(chk_inner_frame, 
@@ -755,6 +805,101 @@ class SistemaOS:
         self.botoes_editar.append(b_cancelar_edit)
 
 
+    def criar_tela_resumo(self, parent):
+        f = ctk.CTkFrame(parent, fg_color="transparent")
+        self.frames["Resumo"] = f
+        f.grid(row=0, column=0, sticky="nsew")
+
+        top_frame = ctk.CTkFrame(f, fg_color="transparent")
+        top_frame.pack(side="top", fill="x", padx=10, pady=(10, 5))
+        ctk.CTkLabel(top_frame, text="Resumo Financeiro", font=FONTE_TITULO).pack(side=tk.LEFT)
+
+        b_voltar = ctk.CTkButton(top_frame, text="Voltar para Lista", width=160, height=35, command=lambda: self.show_frame("Lista"),
+                                 fg_color="transparent", hover_color=COR_FRAME,
+                                 border_width=1, border_color=COR_BORDA,
+                                 font=FONTE_NORMAL, corner_radius=8)
+        b_voltar.pack(side=tk.RIGHT, padx=5)
+
+        # Período (padrão: mês atual)
+        periodo_frame = ctk.CTkFrame(f, fg_color=COR_FRAME, corner_radius=8)
+        periodo_frame.pack(side="top", fill="x", padx=10, pady=10)
+
+        hoje = datetime.now()
+        self.resumo_inicio_var = tk.StringVar(value=hoje.replace(day=1).strftime("%d/%m/%Y"))
+        self.resumo_fim_var = tk.StringVar(value=hoje.strftime("%d/%m/%Y"))
+
+        ctk.CTkLabel(periodo_frame, text="De:", font=FONTE_NORMAL).pack(side=tk.LEFT, padx=(15, 5))
+        ctk.CTkEntry(periodo_frame, width=120, textvariable=self.resumo_inicio_var,
+                     font=FONTE_NORMAL, corner_radius=8).pack(side=tk.LEFT, padx=5, pady=10)
+        ctk.CTkLabel(periodo_frame, text="Até:", font=FONTE_NORMAL).pack(side=tk.LEFT, padx=(15, 5))
+        ctk.CTkEntry(periodo_frame, width=120, textvariable=self.resumo_fim_var,
+                     font=FONTE_NORMAL, corner_radius=8).pack(side=tk.LEFT, padx=5, pady=10)
+
+        b_calcular = ctk.CTkButton(periodo_frame, text="Calcular", width=120, height=35, command=self.carregar_resumo,
+                                   fg_color=COR_VERDE_PRINCIPAL, hover_color=COR_HOVER_VERDE,
+                                   font=FONTE_BOLD, corner_radius=8)
+        b_calcular.pack(side=tk.LEFT, padx=15)
+
+        # Totais
+        totais_frame = ctk.CTkFrame(f, fg_color=COR_FRAME, corner_radius=10)
+        totais_frame.pack(side="top", fill="x", padx=10, pady=(0, 10))
+
+        self.resumo_labels = {}
+        for i, (chave, texto) in enumerate([
+            ("receita", "Receita (R$)"), ("quantidade", "Documentos"),
+            ("ticket", "Ticket Médio (R$)"), ("crediario", "Crediário em Aberto (R$)"),
+        ]):
+            ctk.CTkLabel(totais_frame, text=texto, font=FONTE_NORMAL).grid(row=0, column=i, padx=25, pady=(10, 0))
+            valor = ctk.CTkLabel(totais_frame, text="-", font=FONTE_TITULO)
+            valor.grid(row=1, column=i, padx=25, pady=(0, 10))
+            self.resumo_labels[chave] = valor
+
+        # Receita por tipo/método e quantidade por situação
+        tabelas_frame = ctk.CTkFrame(f, fg_color="transparent")
+        tabelas_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        columns = ("Tipo", "Método de Pagamento", "Qtd.", "Receita (R$)")
+        self.tabela_pagamentos = ttk.Treeview(tabelas_frame, columns=columns, show='headings')
+        for col, width in zip(columns, (60, 220, 60, 120)):
+            self.tabela_pagamentos.heading(col, text=col)
+            self.tabela_pagamentos.column(col, width=width, anchor=tk.CENTER)
+        self.tabela_pagamentos.pack(side=tk.LEFT, fill="both", expand=True, padx=(0, 5))
+
+        columns = ("Situação", "Qtd.")
+        self.tabela_situacoes = ttk.Treeview(tabelas_frame, columns=columns, show='headings')
+        for col, width in zip(columns, (160, 60)):
+            self.tabela_situacoes.heading(col, text=col)
+            self.tabela_situacoes.column(col, width=width, anchor=tk.CENTER)
+        self.tabela_situacoes.pack(side=tk.LEFT, fill="both", padx=(5, 0))
+
+    def carregar_resumo(self):
+        try:
+            resumo = resumo_financeiro(self.resumo_inicio_var.get(), self.resumo_fim_var.get())
+        except ValueError as e:
+            messagebox.showwarning("Aviso", f"{str(e)}\nUse o formato dd/mm/aaaa.")
+            return
+        except Exception as e:
+            messagebox.showerror("Erro de Leitura", f"Erro ao calcular o resumo: {str(e)}")
+            return
+
+        self.resumo_labels["receita"].configure(text=formatar_monetario(resumo["receita_centavos"] / 100))
+        self.resumo_labels["quantidade"].configure(text=str(resumo["quantidade"]))
+        self.resumo_labels["ticket"].configure(text=formatar_monetario(resumo["ticket_medio_centavos"] / 100))
+        self.resumo_labels["crediario"].configure(
+            text=f"{formatar_monetario(resumo['crediario_aberto_centavos'] / 100)} ({resumo['crediario_parcelas_abertas']} parc.)"
+        )
+
+        self.tabela_pagamentos.delete(*self.tabela_pagamentos.get_children())
+        for item in resumo["por_pagamento"]:
+            self.tabela_pagamentos.insert("", tk.END, values=(
+                item["tipo_documento"], item["metodo_pagamento"], item["quantidade"],
+                formatar_monetario(item["receita_centavos"] / 100),
+            ))
+
+        self.tabela_situacoes.delete(*self.tabela_situacoes.get_children())
+        for situacao, qtd in sorted(resumo["por_situacao"].items(), key=lambda i: -i[1]):
+            self.tabela_situacoes.insert("", tk.END, values=(situacao, qtd))
+
     def limpar(self):
         # Limpar CTkEntry
         self.campos["cliente"].delete(0, tk.END)
@@ -801,10 +946,9 @@ class SistemaOS:
             return
 
         try:
-            total_float = parse_monetario_to_float(valor_str)
-            valor_texto = formatar_monetario(total_float)
-        except ValueError:
-            messagebox.showerror("Erro de Valor", "Formato de valor (R$) inválido.")
+            total_float, valor_texto = validar_valor(valor_str)
+        except DocumentoInvalido as e:
+            messagebox.showerror("Erro de Valor", str(e))
             return
 
         # COLETANDO DATA DE ENTRADA (USANDO O VALOR DO CAMPO EDITÁVEL)
@@ -823,55 +967,19 @@ class SistemaOS:
         metodo_pagamento = self.campos["metodo_pagamento"].get()
         tipo_documento = self.tipo_documento_var.get()
 
-        saida = ""
-        if situacao == "CONCLUÍDA":
-            saida = datetime.now().strftime("%d/%m/%Y")
+        # Saída e garantia só existem em documentos concluídos (ver Components.documentos)
+        saida = data_saida(situacao)
+        dias_garantia_num = dias_do_texto(self.dias_garantia_var.get())
+        garantia = data_garantia(situacao, tipo_garantia, dias_garantia_num, entrada)
 
-        dias_garantia_texto = self.dias_garantia_var.get().replace(" Dias", "")
-        try:
-            dias_garantia_num = int(dias_garantia_texto) if dias_garantia_texto.isdigit() else 0
-        except:
-            dias_garantia_num = 0
-
-        # >>> AJUSTE NA LÓGICA DE GARANTIA: SÓ CALCULA SE FOR CONCLUÍDA <<<
-        garantia = "S/Garantia"
-        if situacao == "CONCLUÍDA" and tipo_garantia == "Com Garantia" and dias_garantia_num > 0:
-            # Garante que a garantia é calculada a partir da data de entrada
-            try:
-                data_base = datetime.strptime(entrada, "%d/%m/%Y")
-                data_garantia = data_base + timedelta(days=dias_garantia_num)
-                garantia = data_garantia.strftime("%d/%m/%Y")
-            except ValueError:
-                # Se a data de entrada for inválida (raro, mas possível), usa a data atual
-                data_garantia = datetime.now() + timedelta(days=dias_garantia_num)
-                garantia = data_garantia.strftime("%d/%m/%Y")
-        # >>> FIM DO AJUSTE <<<
-
-        checklist_data = [f"{item}:{var.get()}" for item, var in self.checklist_vars.items()]
-        checklist_str = ";".join(checklist_data)
+        checklist_str = texto_checklist({item: var.get() for item, var in self.checklist_vars.items()})
 
         # Lógica de Parcelas
         detalhes_parcelas_json = ""
         num_parcelas = 1
-        if metodo_pagamento == "PARCELADO NO CREDIÁRIO":
-            try:
-                num_parcelas = int(self.parcelas_var.get().replace("x", ""))
-                lista_parcelas = []
-                valor_parcela = total_float / num_parcelas
-                
-                data_base = datetime.strptime(entrada, "%d/%m/%Y")
-                
-                for i in range(1, num_parcelas + 1):
-                    data_venc = data_base + timedelta(days=30 * i)
-                    lista_parcelas.append({
-                        "numero": i,
-                        "vencimento": data_venc.strftime("%d/%m/%Y"),
-                        "valor": formatar_monetario(valor_parcela),
-                        "status": "N/PG"
-                    })
-                detalhes_parcelas_json = json.dumps(lista_parcelas)
-            except:
-                num_parcelas = 1
+        if metodo_pagamento == CREDIARIO:
+            num_parcelas = int(self.parcelas_var.get().replace("x", ""))
+            detalhes_parcelas_json = gerar_parcelas(total_float, num_parcelas, entrada)
 
         # 3. Estruturação dos dados
         dados_db = {
@@ -897,88 +1005,245 @@ class SistemaOS:
             "detalhes_parcelas": detalhes_parcelas_json
         }
         
-        # 4. Geração do PDF
-        caminho_pdf = gerar_documento(dados_db, valor_texto, total_float, tipo_garantia, metodo_pagamento, checklist_str, tipo_documento, dias_garantia_num, detalhes_parcelas_json)
-        
-        if caminho_pdf:
-            # 5. Inserção no Banco de Dados
-            try:
-                insert_document(dados_db, caminho_pdf)
-                
-                messagebox.showinfo("Sucesso", f"{tipo_documento} {numero} salva com sucesso e PDF gerado:\n{caminho_pdf}")
-                
-                abrir_arquivo(caminho_pdf)
-                
-                self.limpar()
+        # 4. Inserção no Banco de Dados (o PDF é gerado depois, em segundo plano)
+        try:
+            # O número definitivo é reservado na gravação (pode diferir do exibido se outro terminal salvou antes)
+            numero = insert_document(dados_db)
+        except Exception as e:
+            messagebox.showerror("Erro no DB", f"Erro ao salvar no banco de dados: {str(e)}")
+            return
+        dados_db["numero"] = numero
 
-            except Exception as e:
-                messagebox.showerror("Erro no DB", f"Erro ao salvar no banco de dados: {str(e)}")
+        # 5. Geração do PDF (abre o arquivo quando ficar pronto)
+        if PDF_SOB_DEMANDA:
+            # Vai direto para o cache; nada é gravado em PASTA_OS
+            self._renderizar_pdf(dados_db, (dict(dados_db),), abrir_ao_concluir=True, funcao=cache_pdf.obter_pdf)
+            aviso_pdf = "O PDF será aberto assim que for gerado."
         else:
-            messagebox.showerror("Erro", f"Não foi possível salvar o documento.")
-
-    def carregar_dados_lista(self, search="", page=1):
-        """Carrega os dados do banco para a Treeview, aplicando filtro de busca e paginação."""
-        
-        for item in self.tabela.get_children():
+            caminho_pdf = caminho_pdf_documento(tipo_documento, numero)
+            args_pdf = (dict(dados_db), valor_texto, total_float, tipo_garantia, metodo_pagamento, checklist_str, tipo_documento, dias_garantia_num, detalhes_parcelas_json)
+            self._renderizar_pdf(dados_db, args_pdf, abrir_ao_concluir=True)
+            aviso_pdf = f"O PDF será aberto assim que for gerado:\n{caminho_pdf}"
+
+        self.limpar()
+        messagebox.showinfo("Sucesso", f"{tipo_documento} {numero} salva com sucesso.\n{aviso_pdf}")
+
+    def carregar_dados_lista(self, search=None):
+        """Recarrega a janela visível da Lista a partir do banco.
+
+        Mantém a posição de rolagem se a busca não mudou; as linhas que não mudaram
+        não são tocadas (ver `_aplicar_dados_lista`). A consulta roda em segundo plano.
+        """
+        if search is None:
+            search = self.search_var.get()
+        if search != self._busca_lista:
+            self._busca_lista = search
+            self._inicio_lista = 0
+        self.controlador_busca.executar(self._busca_lista, self._inicio_lista, self._linhas_visiveis)
+
+    def _consultar_lista(self, search, inicio, quantidade):
+        """Executada na thread de busca: não pode tocar em widgets."""
+        return (search, inicio) + self.lista_virtual.janela(search, inicio, quantidade)
+
+    def _mostrar_janela(self, inicio):
+        """Rola a Lista para `inicio`, usando o cache de blocos quando possível."""
+        inicio = max(0, min(inicio, self.total_records - self._linhas_visiveis))
+        self._inicio_lista = inicio
+        resultado = self.lista_virtual.janela_em_cache(self._busca_lista, inicio, self._linhas_visiveis)
+        if resultado is not None:
+            self._aplicar_dados_lista((self._busca_lista, inicio) + resultado)
+        if resultado is None or not self.lista_virtual.vizinhos_em_cache(inicio, self._linhas_visiveis):
+            # Busca (ou faz prefetch de) blocos que ainda não estão em cache
+            self.controlador_busca.executar(self._busca_lista, inicio, self._linhas_visiveis)
+
+    def _valores_linha(self, row):
+        tipo = row.get("tipo_documento", "")
+        numero = row.get("numero", "")
+        return (
+            tipo,
+            numero,
+            row.get("cliente", ""),
+            row.get("modelo", ""),
+            row.get("entrada", ""),
+            row.get("saida") or "N/A",  # Se for None, exibe N/A
+            row.get("garantia", ""),
+            row.get("situacao", ""),
+            row.get("arquivo", ""),
+            self.fila_pdf.status(tipo, numero) or "",
+        )
+
+    def _aplicar_dados_lista(self, resultado):
+        search, pedido, inicio, rows, total = resultado
+        if search != self._busca_lista or pedido != self._inicio_lista:
+            return  # O usuário já rolou ou buscou outra coisa
+
+        self._inicio_lista = inicio
+        self.total_records = total
+
+        # As linhas da Treeview são reaproveitadas: só muda o que for diferente
+        itens = self.tabela.get_children()
+        for i in range(len(itens), len(rows)):
+            self.tabela.insert("", tk.END, iid=f"linha{i}")
+            self._valores_lista.append(None)
+        for item in itens[len(rows):]:
             self.tabela.delete(item)
+        del self._valores_lista[len(rows):]
+
+        for i, row in enumerate(rows):
+            valores = self._valores_linha(row)
+            if self._valores_lista[i] != valores:
+                self.tabela.item(f"linha{i}", values=valores)
+                self._valores_lista[i] = valores
+        self._ids_lista = [row["id"] for row in rows]
+        self.tabela.yview_moveto(0)
+
+        self._restaurar_selecao()
+        self._atualizar_posicao_lista()
+
+    def _restaurar_selecao(self):
+        """Seleciona a linha que mostra o documento selecionado, se estiver visível."""
+        if self._selecionar_indice is not None and self._ids_lista:
+            indice = min(self._selecionar_indice, len(self._ids_lista) - 1)
+            self._selecionado_id = self._ids_lista[indice]
+        self._selecionar_indice = None
+
+        if self._selecionado_id in self._ids_lista:
+            item = f"linha{self._ids_lista.index(self._selecionado_id)}"
+            if self.tabela.selection() != (item,):
+                self.tabela.selection_set(item)
+            self.tabela.focus(item)
+        elif self.tabela.selection():
+            self.tabela.selection_remove(*self.tabela.selection())
+
+    def _atualizar_posicao_lista(self):
+        total = self.total_records
+        if total == 0:
+            self.scrollbar_lista.set(0, 1)
+            self.rotulo_lista.configure(text="Nenhum documento")
+            return
+        fim = self._inicio_lista + len(self._ids_lista)
+        self.scrollbar_lista.set(self._inicio_lista / total, fim / total)
+        self.rotulo_lista.configure(text=f"{self._inicio_lista + 1}–{fim} de {total}")
+
+    def _ao_selecionar_linha(self, event=None):
+        selecao = self.tabela.selection()
+        if selecao:
+            indice = self.tabela.index(selecao[0])
+            if indice < len(self._ids_lista):
+                self._selecionado_id = self._ids_lista[indice]
+
+    def _redimensionar_lista(self, event):
+        # Altura da linha definida no estilo da Treeview; desconta o cabeçalho
+        linhas = max(1, (event.height - 32) // 28)
+        if linhas != self._linhas_visiveis:
+            self._linhas_visiveis = linhas
+            self._mostrar_janela(self._inicio_lista)
+
+    def _rolar_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._mostrar_janela(int(float(args[1]) * self.total_records))
+        elif args[0] == "scroll":
+            passo = self._linhas_visiveis if args[2] == "pages" else 1
+            self._rolar_linhas(int(args[1]) * passo)
+
+    def _rolar_roda(self, event):
+        return self._rolar_linhas(-3 if event.delta > 0 else 3)
+
+    def _rolar_linhas(self, quantidade):
+        self._mostrar_janela(self._inicio_lista + quantidade)
+        return "break"  # A Treeview não deve rolar sozinha
+
+    def _mover_selecao(self, direcao):
+        """Setas no limite da janela rolam a lista em vez de parar na última linha visível."""
+        item = self.tabela.focus()
+        indice = self.tabela.index(item) if item else -1
+        ultimo = len(self._ids_lista) - 1
+        if direcao > 0 and indice == ultimo:
+            self._selecionar_indice = ultimo
+        elif direcao < 0 and indice == 0:
+            self._selecionar_indice = 0
+        else:
+            return None  # Movimento normal dentro da janela
+        self._mostrar_janela(self._inicio_lista + direcao)
+        return "break"
+
+    def _atualizar_linha_lista(self, tipo_documento, numero, versao_escrita):
+        """Reflete na Lista a edição de um único documento, sem reler a janela inteira.
+
+        `versao_escrita` é o versao_dados logo após a edição. Se a edição pode ter
+        mudado o resultado da busca (ou houve outras escritas), recarrega a janela normalmente.
+        """
+        registro = fetch_document(numero, tipo_documento)
+        if registro is None or not self.lista_virtual.substituir_registro(
+            self._busca_lista, registro, versao_escrita
+        ):
+            self.carregar_dados_lista()
+            return
+        if registro["id"] in self._ids_lista:
+            i = self._ids_lista.index(registro["id"])
+            valores = self._valores_linha(registro)
+            if self._valores_lista[i] != valores:
+                self._valores_lista[i] = valores
+                self.tabela.item(f"linha{i}", values=valores)
+
+    def _valores_selecionados(self):
+        """Valores exibidos na linha selecionada, ou None."""
+        item = self.tabela.focus()
+        if not item or item not in self.tabela.selection():
+            return None
+        indice = self.tabela.index(item)
+        if indice >= len(self._valores_lista):
+            return None
+        return self._valores_lista[indice]
+
+    def _atualizar_status_pdf(self, tipo_documento, numero):
+        """Atualiza a coluna PDF da linha do documento, se estiver visível na Lista."""
+        if "Lista" not in self.frames:
+            return
+        status_pdf = self.fila_pdf.status(tipo_documento, numero) or ""
+        for i, valores in enumerate(self._valores_lista):
+            if valores[0] == tipo_documento and valores[1] == numero and valores[9] != status_pdf:
+                self._valores_lista[i] = valores[:9] + (status_pdf,)
+                self.tabela.set(f"linha{i}", "PDF", status_pdf)
+
+    def _renderizar_pdf(self, dados, args_pdf, abrir_ao_concluir, funcao=None):
+        """Enfileira a geração do PDF de um documento já salvo no banco (ver FilaRenderizacao.enviar)."""
+        tipo_documento = dados["tipo_documento"]
+        numero = dados["numero"]
+
+        def ao_concluir(caminho_pdf):
+            self._atualizar_status_pdf(tipo_documento, numero)
+            if abrir_ao_concluir:
+                abrir_arquivo(caminho_pdf)
 
-        # Calcular offset
-        offset = (page - 1) * self.page_size
-        
-        try:
-            rows, total = list_documents(search, self.page_size, offset)
-            self.total_records = total
-
-            for row in rows:
-                tipo = row.get("tipo_documento", "")
-                numero = row.get("numero", "")
-                cliente = row.get("cliente", "")
-                modelo = row.get("modelo", "")
-                entrada = row.get("entrada", "")
-                saida = row.get("saida") or "N/A" # Se for None, exibe N/A
-                garantia = row.get("garantia", "")
-                situacao = row.get("situacao", "")
-                arquivo = row.get("arquivo", "")
-
-                self.tabela.insert("", tk.END, values=(tipo, numero, cliente, modelo, entrada, saida, garantia, situacao, arquivo))
+        def ao_falhar(erro):
+            self._atualizar_status_pdf(tipo_documento, numero)
+            # ErroGeracaoPDF traz o título do diálogo; pdf_generator só é importado na 1ª renderização
+            titulo = getattr(erro, "titulo", "Erro ao Gerar PDF")
+            messagebox.showerror(titulo, f"{tipo_documento} {numero}:\n{str(erro)}")
 
-            # Atualizar controles de paginação
-            self.atualizar_controle_paginacao()
+        self.fila_pdf.enviar(tipo_documento, numero, args_pdf, ao_concluir, ao_falhar, funcao)
+        self._atualizar_status_pdf(tipo_documento, numero)
 
-        except Exception as e:
-            messagebox.showerror("Erro de Leitura", f"Erro ao carregar dados do banco: {str(e)}")
+    def _erro_dados_lista(self, erro):
+        messagebox.showerror("Erro de Leitura", f"Erro ao carregar dados do banco: {str(erro)}")
             
-    def atualizar_controle_paginacao(self):
-        total_pages = (self.total_records + self.page_size - 1) // self.page_size
-        if total_pages == 0:
-            total_pages = 1
-        self.page_label.configure(text=f"Página {self.current_page} de {total_pages}")
-    
-    def pagina_anterior(self):
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.carregar_dados_lista(search=self.search_var.get(), page=self.current_page)
-    
-    def pagina_proxima(self):
-        total_pages = (self.total_records + self.page_size - 1) // self.page_size
-        if self.current_page < total_pages:
-            self.current_page += 1
-            self.carregar_dados_lista(search=self.search_var.get(), page=self.current_page)
-    
     def buscar_com_reset(self):
-        self.current_page = 1
-        self.carregar_dados_lista(search=self.search_var.get(), page=self.current_page)
+        """Chamada a cada tecla na busca: espera a digitação parar antes de consultar."""
+        self._busca_lista = self.search_var.get()
+        self._inicio_lista = 0
+        self.controlador_busca.agendar(self._busca_lista, 0, self._linhas_visiveis)
             
     def editar_documento(self):
-        item = self.tabela.focus()
-        if not item:
+        values = self._valores_selecionados()
+        if not values:
             messagebox.showwarning("Aviso", "Selecione um documento na lista para editar!")
             return
 
-        values = self.tabela.item(item)['values']
         tipo_documento = values[0]
         numero = values[1]
 
+        self._tela("Editar")
         metodo_combo = self.campos_edit["metodo_pagamento"]
         if tipo_documento == "OS":
             metodo_combo.configure(values=["CARTÃO", "DINHEIRO", "PIX"])
@@ -991,6 +1256,13 @@ class SistemaOS:
             messagebox.showerror("Erro", "Registro não encontrado no banco de dados.")
             return
 
+        self._preencher_edicao(dados)
+        
+        # Mostrar tela de edição
+        self.show_frame("Editar")
+
+    def _preencher_edicao(self, dados):
+        """Carrega o registro no formulário de edição e guarda-o como dados_originais."""
         # Preencher campos
         self.campos_edit["cliente"].delete(0, tk.END)
         self.campos_edit["cliente"].insert(0, dados.get("cliente", ""))
@@ -1047,11 +1319,8 @@ class SistemaOS:
         self.campos_edit["problemas_detalhe"].delete(0, tk.END)
         self.campos_edit["problemas_detalhe"].insert(0, dados.get("problemas", ""))
         
-        # Armazenar dados originais para edição
+        # Armazenar dados originais para edição (a versão lida vale para salvar_edicao)
         self.dados_originais = dados
-        
-        # Mostrar tela de edição
-        self.show_frame("Editar")
 
     def salvar_edicao(self):
         # Validação
@@ -1065,10 +1334,9 @@ class SistemaOS:
             return
 
         try:
-            total_float = parse_monetario_to_float(valor_str)
-            valor_texto = formatar_monetario(total_float)
-        except ValueError:
-            messagebox.showerror("Erro de Valor", "Formato de valor (R$) inválido.")
+            total_float, valor_texto = validar_valor(valor_str)
+        except DocumentoInvalido as e:
+            messagebox.showerror("Erro de Valor", str(e))
             return
 
         # Coletar dados
@@ -1083,49 +1351,22 @@ class SistemaOS:
         tipo_documento = self.dados_originais["tipo_documento"]
         numero = self.dados_originais["numero"]
 
-        saida = ""
-        if situacao == "CONCLUÍDA":
-            saida = datetime.now().strftime("%d/%m/%Y")
+        saida = data_saida(situacao)
+        dias_garantia_num = dias_do_texto(self.campos_edit["dias_garantia"].get())
+        garantia = data_garantia(situacao, tipo_garantia, dias_garantia_num, entrada)
 
-        dias_garantia_texto = self.campos_edit["dias_garantia"].get().replace(" Dias", "")
-        try:
-            dias_garantia_num = int(dias_garantia_texto) if dias_garantia_texto.isdigit() else 0
-        except:
-            dias_garantia_num = 0
-
-        garantia = "S/Garantia"
-        if situacao == "CONCLUÍDA" and tipo_garantia == "Com Garantia" and dias_garantia_num > 0:
-            try:
-                data_base = datetime.strptime(entrada, "%d/%m/%Y")
-                data_garantia = data_base + timedelta(days=dias_garantia_num)
-                garantia = data_garantia.strftime("%d/%m/%Y")
-            except ValueError:
-                data_garantia = datetime.now() + timedelta(days=dias_garantia_num)
-                garantia = data_garantia.strftime("%d/%m/%Y")
-
-        checklist_data = [f"{item}:{var.get()}" for item, var in self.checklist_vars_edit.items()]
-        checklist_str = ";".join(checklist_data)
+        checklist_str = texto_checklist({item: var.get() for item, var in self.checklist_vars_edit.items()})
 
         # Lógica de Parcelas (Recalcular se mudar o método ou valor)
         detalhes_parcelas_json = self.dados_originais.get("detalhes_parcelas", "")
         num_parcelas = self.dados_originais.get("parcelas", 1)
         
-        if metodo_pagamento == "PARCELADO NO CREDIÁRIO":
+        if metodo_pagamento == CREDIARIO:
              # Se mudou para crediário ou alterou parcelas, recalcula
              nova_qtd = int(self.campos_edit["parcelas"].get().replace("x", ""))
              if nova_qtd != num_parcelas or not detalhes_parcelas_json or metodo_pagamento != self.dados_originais.get("metodo_pagamento"):
                 num_parcelas = nova_qtd
-                lista_parcelas = []
-                valor_parcela = total_float / num_parcelas
-                try:
-                    data_base = datetime.strptime(entrada, "%d/%m/%Y")
-                except:
-                    data_base = datetime.now()
-                
-                for i in range(1, num_parcelas + 1):
-                    data_venc = data_base + timedelta(days=30 * i)
-                    lista_parcelas.append({"numero": i, "vencimento": data_venc.strftime("%d/%m/%Y"), "valor": formatar_monetario(valor_parcela), "status": "N/PG"})
-                detalhes_parcelas_json = json.dumps(lista_parcelas)
+                detalhes_parcelas_json = gerar_parcelas(total_float, num_parcelas, entrada)
         else:
             detalhes_parcelas_json = ""
             num_parcelas = 1
@@ -1152,39 +1393,87 @@ class SistemaOS:
             "detalhes_parcelas": detalhes_parcelas_json
         }
         
-        # Gerar novo PDF
-        dados_para_pdf = dados_atualizados.copy()
-        dados_para_pdf["numero"] = numero
-        caminho_pdf = gerar_documento(dados_para_pdf, valor_texto, total_float, tipo_garantia, metodo_pagamento, checklist_str, tipo_documento, dias_garantia_num, detalhes_parcelas_json)
-        
-        if not caminho_pdf:
-            messagebox.showerror("Erro", "Não foi possível regerar o documento.")
-            return
-
         # Adicionar arquivo aos dados
-        dados_atualizados["arquivo"] = caminho_pdf
+        dados_atualizados["arquivo"] = arquivo_documento(tipo_documento, numero)
 
-        # Atualizar banco
+        # Atualizar banco (só se ninguém alterou o registro desde que foi aberto)
         try:
-            update_document(numero, tipo_documento, dados_atualizados)
+            update_document(numero, tipo_documento, dados_atualizados, versao=self.dados_originais.get("versao"))
+            versao_escrita = versao_da_ultima_escrita()
+
+            # Regerar o PDF em segundo plano (sob demanda, a versão nova é gerada ao abrir)
+            if not PDF_SOB_DEMANDA:
+                dados_para_pdf = dados_atualizados.copy()
+                dados_para_pdf["numero"] = numero
+                dados_para_pdf["tipo_documento"] = tipo_documento
+                args_pdf = (dados_para_pdf, valor_texto, total_float, tipo_garantia, metodo_pagamento, checklist_str, tipo_documento, dias_garantia_num, detalhes_parcelas_json)
+                self._renderizar_pdf(dados_para_pdf, args_pdf, abrir_ao_concluir=False)
             
             messagebox.showinfo("Sucesso", f"{tipo_documento} {numero} atualizado com sucesso!")
             
-            # Voltar para lista e recarregar
-            self.show_frame("Lista")
-            self.buscar_com_reset()
+            # Voltar para lista atualizando só a linha editada
+            self._atualizar_linha_lista(tipo_documento, numero, versao_escrita)
+            self.show_frame("Lista", recarregar=False)
             
+        except ConflitoEdicao as conflito:
+            self._resolver_conflito(conflito, dados_atualizados)
         except Exception as e:
             messagebox.showerror("Erro no DB", f"Erro ao atualizar no banco de dados: {str(e)}")
 
+    def _resolver_conflito(self, conflito, dados_atualizados):
+        """Mostra o que outro terminal mudou e deixa escolher entre gravar por cima ou recarregar."""
+        if conflito.atual is None:
+            messagebox.showerror(conflito.titulo, f"{conflito}\nAs alterações não foram salvas.")
+            self.show_frame("Lista")
+            return
+
+        janela = ctk.CTkToplevel(self.container)
+        janela.title(conflito.titulo)
+        janela.geometry("900x420")
+        janela.configure(fg_color=COR_FUNDO)
+        janela.transient(self.container.winfo_toplevel())
+        janela.grab_set()
+
+        ctk.CTkLabel(janela, text=f"{conflito}\nCampos alterados desde que você abriu o documento:",
+                     font=FONTE_BOLD, anchor="w", justify="left").pack(side="top", fill="x", padx=15, pady=(15, 5))
+
+        columns = ("Campo", "Ao abrir", "Outro terminal", "Sua edição")
+        tabela = ttk.Treeview(janela, columns=columns, show='headings', height=10)
+        for col, width in zip(columns, (140, 230, 230, 230)):
+            tabela.heading(col, text=col)
+            tabela.column(col, width=width, anchor=tk.W)
+        for diferenca in diferencas_conflito(self.dados_originais, conflito.atual, dados_atualizados):
+            tabela.insert("", tk.END, values=diferenca)
+        tabela.pack(side="top", fill="both", expand=True, padx=10, pady=5)
+
+        def manter_minhas():
+            janela.destroy()
+            # Grava de novo a partir da versão atual: as mudanças do outro terminal são substituídas
+            self.dados_originais = conflito.atual
+            self.salvar_edicao()
+
+        def usar_atuais():
+            janela.destroy()
+            self._preencher_edicao(conflito.atual)
+
+        botoes = ctk.CTkFrame(janela, fg_color="transparent")
+        botoes.pack(side="bottom", fill="x", padx=10, pady=(5, 15))
+        ctk.CTkButton(botoes, text="Gravar a Minha Edição", command=manter_minhas,
+                      fg_color=COR_VERMELHO, font=FONTE_BOLD, corner_radius=8).pack(side=tk.RIGHT, padx=5)
+        ctk.CTkButton(botoes, text="Recarregar e Descartar a Minha", command=usar_atuais,
+                      fg_color=COR_VERDE_PRINCIPAL, hover_color=COR_HOVER_VERDE,
+                      font=FONTE_BOLD, corner_radius=8).pack(side=tk.RIGHT, padx=5)
+        ctk.CTkButton(botoes, text="Cancelar", command=janela.destroy,
+                      fg_color="transparent", hover_color=COR_FRAME, border_width=1, border_color=COR_BORDA,
+                      font=FONTE_NORMAL, corner_radius=8).pack(side=tk.RIGHT, padx=5)
+
     def deletar(self):
         """Deleta o registro selecionado e seu arquivo PDF associado."""
-        item = self.tabela.focus()
-        if not item:
+        values = self._valores_selecionados()
+        if not values:
             messagebox.showwarning("Aviso", "Selecione um documento para deletar!")
             return
 
-        values = self.tabela.item(item)['values']
         tipo_documento = values[0]
         numero = values[1]
         caminho_pdf = values[8] 
@@ -1195,25 +1484,156 @@ class SistemaOS:
 
                 if caminho_pdf and os.path.exists(caminho_pdf):
                     os.remove(caminho_pdf)
+                cache_pdf.descartar(tipo_documento, numero)
                 
                 messagebox.showinfo("Sucesso", f"Documento {numero} deletado e arquivo PDF removido.")
-                self.buscar_com_reset()
+                self.carregar_dados_lista()
 
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao deletar no banco de dados: {str(e)}")
 
+    def exportar_lista(self):
+        """Exporta o resultado da busca atual para CSV, JSON Lines ou XLSX, sem travar a tela."""
+        caminho = filedialog.asksaveasfilename(
+            title="Exportar documentos",
+            defaultextension=".xlsx",
+            initialfile="documentos.xlsx",
+            filetypes=[("Planilha Excel", "*.xlsx"), ("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if not caminho:
+            return
+
+        search = self._busca_lista
+        self.b_exportar.configure(state="disabled", text="Exportando...")
+
+        def progredir(exportados, total):
+            percentual = exportados * 100 // total if total else 100
+            self.despachante.enviar(lambda: self.b_exportar.configure(text=f"Exportando {percentual}%"))
+
+        def trabalhar():
+            try:
+                exportados = exportar(caminho, search, ao_progredir=progredir, fonte=backend)
+            except Exception as e:
+                self.despachante.enviar(self._exportacao_concluida, caminho, None, e)
+            else:
+                self.despachante.enviar(self._exportacao_concluida, caminho, exportados, None)
+            finally:
+                fechar_conexao_da_thread()
+
+        threading.Thread(target=trabalhar, name="exportacao", daemon=True).start()
+
+    def _exportacao_concluida(self, caminho, exportados, erro):
+        self.b_exportar.configure(state="normal", text="Exportar")
+        if erro is not None:
+            messagebox.showerror("Erro ao Exportar", f"Não foi possível exportar os documentos:\n{str(erro)}")
+        else:
+            messagebox.showinfo("Exportação Concluída", f"{exportados} documentos exportados para:\n{caminho}")
+
+    def abrir_diagnostico(self):
+        """Janela com latências (p50/p95/p99) por operação e as últimas operações lentas."""
+        if self.janela_diagnostico is not None and self.janela_diagnostico.winfo_exists():
+            self.janela_diagnostico.lift()
+            return
+
+        janela = ctk.CTkToplevel(self.container)
+        janela.title("Diagnóstico de Desempenho")
+        janela.geometry("1000x600")
+        janela.configure(fg_color=COR_FUNDO)
+        self.janela_diagnostico = janela
+
+        top_frame = ctk.CTkFrame(janela, fg_color="transparent")
+        top_frame.pack(side="top", fill="x", padx=10, pady=(10, 5))
+        ctk.CTkLabel(top_frame, text="Diagnóstico de Desempenho", font=FONTE_TITULO).pack(side=tk.LEFT)
+
+        b_zerar = ctk.CTkButton(top_frame, text="Zerar", width=100, height=35, command=metricas.zerar,
+                                fg_color="transparent", hover_color=COR_FRAME,
+                                border_width=1, border_color=COR_BORDA,
+                                font=FONTE_NORMAL, corner_radius=8)
+        b_zerar.pack(side=tk.RIGHT, padx=5)
+
+        self.metricas_ativas_var = tk.BooleanVar(value=metricas.ativo())
+        ctk.CTkSwitch(top_frame, text="Coleta ativa", variable=self.metricas_ativas_var,
+                      command=lambda: metricas.ativar(self.metricas_ativas_var.get()),
+                      font=FONTE_NORMAL).pack(side=tk.RIGHT, padx=15)
+
+        self.rotulo_cache_diagnostico = ctk.CTkLabel(janela, text="", font=FONTE_NORMAL, anchor="w")
+        self.rotulo_cache_diagnostico.pack(side="top", fill="x", padx=15)
+
+        columns = ("Operação", "Chamadas", "Linhas", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Máx. (ms)", "Total (ms)")
+        self.tabela_metricas = ttk.Treeview(janela, columns=columns, show='headings', height=12)
+        for col, width in zip(columns, (220, 80, 80, 90, 90, 90, 90, 100)):
+            self.tabela_metricas.heading(col, text=col)
+            self.tabela_metricas.column(col, width=width, anchor=tk.W if col == "Operação" else tk.E)
+        self.tabela_metricas.pack(side="top", fill="both", expand=True, padx=10, pady=5)
+
+        ctk.CTkLabel(janela, text=f"Operações lentas (acima de {metricas.LIMITE_LENTO_MS:.0f} ms)",
+                     font=FONTE_BOLD, anchor="w").pack(side="top", fill="x", padx=15)
+        columns = ("Quando", "Operação", "Tempo (ms)", "Linhas", "Thread")
+        self.tabela_lentas = ttk.Treeview(janela, columns=columns, show='headings', height=8)
+        for col, width in zip(columns, (160, 220, 100, 80, 140)):
+            self.tabela_lentas.heading(col, text=col)
+            self.tabela_lentas.column(col, width=width, anchor=tk.W)
+        self.tabela_lentas.pack(side="top", fill="both", expand=True, padx=10, pady=(5, 10))
+
+        self._atualizar_diagnostico()
+
+    def _atualizar_diagnostico(self):
+        janela = self.janela_diagnostico
+        if janela is None or not janela.winfo_exists():
+            return
+
+        cache = estatisticas_cache_registros()
+        pdfs = cache_pdf.estatisticas()
+        self.rotulo_cache_diagnostico.configure(
+            text=f"Cache de registros: {cache['registros']}/{cache['capacidade']} — "
+                 f"{cache['acertos']} acertos, {cache['faltas']} faltas ({cache['taxa_acerto']:.0%})\n"
+                 f"Cache de PDFs: {pdfs['arquivos']} arquivos, {pdfs['bytes'] / 1024 / 1024:.1f}/"
+                 f"{pdfs['limite_bytes'] / 1024 / 1024:.0f} MB — {pdfs['acertos']} acertos, {pdfs['faltas']} faltas"
+        )
+
+        self.tabela_metricas.delete(*self.tabela_metricas.get_children())
+        for item in metricas.instantaneo():
+            self.tabela_metricas.insert("", tk.END, values=(
+                item["operacao"], item["chamadas"], item["linhas"] or "",
+                f"{item['p50_ms']:.2f}", f"{item['p95_ms']:.2f}", f"{item['p99_ms']:.2f}",
+                f"{item['max_ms']:.2f}", f"{item['total_ms']:.0f}",
+            ))
+
+        self.tabela_lentas.delete(*self.tabela_lentas.get_children())
+        for quando, operacao, ms, linhas, thread in metricas.operacoes_lentas():
+            self.tabela_lentas.insert("", tk.END, values=(
+                quando, operacao, f"{ms:.1f}", "" if linhas is None else linhas, thread
+            ))
+
+        janela.after(1000, self._atualizar_diagnostico)
+
     def abrir_pdf(self):
         """Abre o PDF selecionado de forma compatível com diferentes sistemas operacionais."""
-        item = self.tabela.focus()
-        if not item:
+        values = self._valores_selecionados()
+        if not values:
             messagebox.showwarning("Aviso", "Selecione um documento na lista!")
             return
         
         try:
-            caminho_pdf = self.tabela.item(item)["values"][8]
-            if not caminho_pdf or not os.path.exists(caminho_pdf):
-                messagebox.showerror("Erro", f"Arquivo PDF não encontrado:\n{caminho_pdf}")
+            caminho_pdf = values[8]
+            if self.fila_pdf.status(values[0], values[1]) == STATUS_PENDENTE:
+                messagebox.showinfo("Aguarde", "O PDF deste documento ainda está sendo gerado.")
+                return
+            if PDF_SOB_DEMANDA or not caminho_pdf or not os.path.exists(caminho_pdf):
+                # Sem arquivo gravado (ou movido): gera a partir do banco, pelo cache
+                self._abrir_pdf_sob_demanda(values[0], values[1])
                 return
             abrir_arquivo(caminho_pdf)
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao abrir o PDF:\n{str(e)}")
\ No newline at end of file
+            messagebox.showerror("Erro", f"Erro ao abrir o PDF:\n{str(e)}")
+
+    def _abrir_pdf_sob_demanda(self, tipo_documento, numero):
+        """Pega o PDF do cache (gerando a partir do registro no banco, se preciso) e abre."""
+        def gerar():
+            registro = fetch_document(numero, tipo_documento)
+            if registro is None:
+                raise ValueError("Documento não encontrado no banco.")
+            return cache_pdf.obter_pdf(registro)
+
+        dados = {"tipo_documento": tipo_documento, "numero": numero}
+        self._renderizar_pdf(dados, (), abrir_ao_concluir=True, funcao=gerar)
@@ -0,0 +1,489 @@
+"""Importação em massa de documentos a partir de CSV ou de outro banco SQLite.
+
+Uso:
+    python -m Components.importacao planilha.csv
+    python -m Components.importacao os_dipcell_antigo.db --numeracao nova
+    python -m Components.importacao planilha.csv --rejeitados rejeitados.csv --mapa numeros.csv
+
+As linhas são lidas em fluxo, validadas e normalizadas (telefone com máscara, valor
+e datas no formato da interface) e gravadas com executemany em transações grandes.
+Linhas inválidas vão para um CSV de rejeitados com o motivo; nada é gravado delas.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+
+from .database import (
+    TIPOS_DOCUMENTO, atualizar_sequencias, criar_banco, fechar_conexoes, formatar_numero,
+    invalidar_caches, migrar_parcelas_json, obter_conexao, restaurar_indices, suspender_indices
+)
+from .metricas import instrumentar
+from .utils import (
+    aplicar_mascara_tel, arquivo_documento, formatar_monetario, monetario_para_centavos,
+    parse_monetario_to_float
+)
+
+TAMANHO_LOTE = 50000
+
+# Colunas gravadas pela importação, na ordem dos parâmetros do INSERT
+COLUNAS = (
+    "numero", "tipo_documento", "cliente", "telefone", "modelo", "imei", "senha",
+    "acessorios", "problemas", "situacao", "valor", "entrada", "saida", "garantia",
+    "tipo_garantia", "metodo_pagamento", "checklist", "dias_garantia", "parcelas",
+    "detalhes_parcelas", "arquivo", "valor_centavos", "entrada_iso", "saida_iso", "garantia_iso",
+)
+
+# Nomes de coluna aceitos na origem (já normalizados: minúsculas, sem acento, "_" no lugar de símbolos)
+APELIDOS = {
+    "numero": ("numero", "num", "n", "no", "numero_os", "os"),
+    "tipo_documento": ("tipo_documento", "tipo", "documento"),
+    "cliente": ("cliente", "nome", "nome_cliente"),
+    "telefone": ("telefone", "fone", "celular", "whatsapp"),
+    "modelo": ("modelo", "modelo_produto", "produto", "aparelho"),
+    "imei": ("imei",),
+    "senha": ("senha",),
+    "acessorios": ("acessorios",),
+    "problemas": ("problemas", "problema", "problemas_detalhe", "defeito"),
+    "situacao": ("situacao", "status"),
+    "valor": ("valor", "valor_r", "valor_rs", "total", "preco"),
+    "entrada": ("entrada", "data_entrada", "data"),
+    "saida": ("saida", "data_saida"),
+    "garantia": ("garantia",),
+    "tipo_garantia": ("tipo_garantia",),
+    "metodo_pagamento": ("metodo_pagamento", "pagamento", "forma_pagamento"),
+    "checklist": ("checklist",),
+    "dias_garantia": ("dias_garantia",),
+    "parcelas": ("parcelas",),
+    "detalhes_parcelas": ("detalhes_parcelas",),
+}
+
+_RE_NUMERO = re.compile(r"(?:([A-Za-z]+)-)?0*(\d+)")
+
+
+class LinhaInvalida(Exception):
+    """Linha da origem que não pode ser importada; a mensagem vai para o relatório."""
+
+
+def _normalizar_cabecalho(nome):
+    nome = unicodedata.normalize("NFKD", str(nome or ""))
+    nome = "".join(ch for ch in nome if not unicodedata.combining(ch)).lower()
+    return re.sub(r"[^a-z0-9]+", "_", nome).strip("_")
+
+
+def mapear_colunas(cabecalho):
+    """Retorna {campo: índice na linha de origem} para as colunas reconhecidas."""
+    normalizados = [_normalizar_cabecalho(c) for c in cabecalho]
+    indices = {}
+    for campo, apelidos in APELIDOS.items():
+        for apelido in apelidos:
+            if apelido in normalizados:
+                indices[campo] = normalizados.index(apelido)
+                break
+    return indices
+
+
+# Datas e valores se repetem muito entre as linhas: a conversão fica em cache
+@lru_cache(maxsize=65536)
+def _data(texto):
+    """ "31/01/2024" ou "2024-01-31" -> ("31/01/2024", "2024-01-31"); None se inválida."""
+    try:
+        if "/" in texto:
+            dia, mes, ano = texto.split("/")
+        else:
+            ano, mes, dia = texto[:10].split("-")
+        d = date(int(ano), int(mes), int(dia))
+    except ValueError:
+        return None
+    return f"{d.day:02d}/{d.month:02d}/{d.year:04d}", d.isoformat()
+
+
+@lru_cache(maxsize=65536)
+def _valor(texto):
+    """ "R$ 1.234,56" -> ("1.234,56", 123456). Levanta ValueError se inválido."""
+    valor = formatar_monetario(parse_monetario_to_float(texto.replace("R$", "").replace(" ", "")))
+    return valor, monetario_para_centavos(valor)
+
+
+# ==========================================================
+# ORIGENS
+# ==========================================================
+
+def _abrir_csv(caminho, encoding):
+    arquivo = open(caminho, "r", encoding=encoding, newline="")
+    primeira = arquivo.readline()
+    arquivo.seek(0)
+    # Planilhas exportadas no Brasil costumam usar ";"
+    delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+    cabecalho = next(leitor, [])
+
+    def linhas():
+        try:
+            for linha in leitor:
+                if any(linha):
+                    yield leitor.line_num, linha
+        finally:
+            arquivo.close()
+
+    return cabecalho, linhas()
+
+
+def _abrir_sqlite(caminho, tabela="os"):
+    origem = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    cursor = origem.execute(f"SELECT * FROM {tabela} ORDER BY rowid")
+    cabecalho = [d[0] for d in cursor.description]
+
+    def linhas():
+        try:
+            for n, linha in enumerate(cursor, start=1):
+                yield n, ["" if v is None else str(v) for v in linha]
+        finally:
+            origem.close()
+
+    return cabecalho, linhas()
+
+
+def abrir_origem(caminho, encoding="utf-8-sig"):
+    """Retorna (cabecalho, linhas) da origem; `linhas` gera (nº da linha, lista de valores)."""
+    with open(caminho, "rb") as f:
+        assinatura = f.read(16)
+    if assinatura == b"SQLite format 3\x00":
+        return _abrir_sqlite(caminho)
+    return _abrir_csv(caminho, encoding)
+
+
+# ==========================================================
+# IMPORTAÇÃO
+# ==========================================================
+
+class Importador:
+    """Normaliza as linhas da origem e grava em lote, atribuindo os números dos documentos.
+
+    numeracao="manter" preserva o número da origem (renumerando só os que já existem
+    no banco ou se repetem na própria origem); numeracao="nova" dá a todas as linhas
+    o próximo número da sequência do tipo.
+    """
+
+    def __init__(self, conn, indices, numeracao="manter"):
+        if numeracao not in ("manter", "nova"):
+            raise ValueError(f"Numeração inválida: {numeracao}")
+        self.conn = conn
+        self.indices = indices
+        self.numeracao = numeracao
+        # Lê todos os campos de uma vez; campos ausentes na origem apontam para um "" extra no fim da linha
+        self._largura = max(indices.values(), default=-1) + 1
+        self._ler = itemgetter(*(indices.get(campo, self._largura) for campo in APELIDOS))
+        self.existentes = {tipo: set() for tipo in TIPOS_DOCUMENTO}
+        self.proximo = {tipo: 0 for tipo in TIPOS_DOCUMENTO}
+        self.ultimo_id_visto = 0
+
+    def atualizar_estado(self):
+        """Lê os números gravados desde a última leitura (inclusive por outros terminais)."""
+        for tipo, numero, id_doc in self.conn.execute(
+            "SELECT tipo_documento, numero, id FROM os WHERE id > ?", (self.ultimo_id_visto,)
+        ):
+            if tipo in self.existentes:
+                self.existentes[tipo].add(numero)
+            self.ultimo_id_visto = max(self.ultimo_id_visto, id_doc)
+        for tipo, ultimo in self.conn.execute("SELECT tipo_documento, ultimo FROM sequencias"):
+            if tipo in self.proximo:
+                self.proximo[tipo] = max(self.proximo[tipo], ultimo)
+
+    def _numerar(self, tipo, numero_origem):
+        """Retorna o número definitivo do documento e o reserva."""
+        numero = None
+        if self.numeracao == "manter":
+            m = _RE_NUMERO.fullmatch(numero_origem)
+            if m:
+                numero = formatar_numero(tipo, int(m.group(2)))
+        usados = self.existentes[tipo]
+        if numero is None or numero in usados:
+            while True:
+                self.proximo[tipo] += 1
+                numero = formatar_numero(tipo, self.proximo[tipo])
+                if numero not in usados:
+                    break
+        usados.add(numero)
+        return numero
+
+    def normalizar(self, valores):
+        """Converte uma linha da origem na tupla de COLUNAS. Levanta LinhaInvalida."""
+        valores = (valores + [""] * self._largura)[:self._largura] + [""]
+        (numero_origem, tipo, cliente, telefone, modelo, imei, senha, acessorios, problemas,
+         situacao, valor_origem, entrada_origem, saida_origem, garantia_origem, tipo_garantia,
+         metodo_pagamento, checklist, dias_garantia, parcelas, detalhes_parcelas) = [
+            v.strip() for v in self._ler(valores)
+        ]
+
+        tipo = tipo.upper()
+        if not tipo:
+            m = _RE_NUMERO.fullmatch(numero_origem)
+            tipo = m.group(1).upper() if m and m.group(1) else "OS"
+        if tipo not in TIPOS_DOCUMENTO:
+            raise LinhaInvalida(f"tipo de documento inválido: {tipo}")
+
+        if not cliente:
+            raise LinhaInvalida("cliente vazio")
+
+        if not valor_origem:
+            raise LinhaInvalida("valor vazio")
+        try:
+            valor, valor_centavos = _valor(valor_origem)
+        except ValueError:
+            raise LinhaInvalida(f"valor inválido: {valor_origem}")
+
+        entrada = _data(entrada_origem)
+        if entrada is None:
+            raise LinhaInvalida(f"data de entrada inválida: {entrada_origem}")
+
+        saida = _data(saida_origem) if saida_origem and saida_origem != "N/A" else ("", None)
+        if saida is None:
+            raise LinhaInvalida(f"data de saída inválida: {saida_origem}")
+
+        # Garantia pode ser uma data ou um texto como "S/Garantia"
+        garantia = _data(garantia_origem) if garantia_origem else None
+        if garantia is None:
+            garantia = (garantia_origem or "S/Garantia", None)
+
+        if any(ch.isdigit() for ch in telefone):
+            telefone = aplicar_mascara_tel(telefone)
+
+        if detalhes_parcelas:
+            try:
+                lista = json.loads(detalhes_parcelas)
+            except ValueError:
+                raise LinhaInvalida("detalhes_parcelas não é um JSON válido")
+            if not isinstance(lista, list):
+                raise LinhaInvalida("detalhes_parcelas não é uma lista")
+            parcelas = parcelas or str(len(lista))
+
+        numero = self._numerar(tipo, numero_origem)
+
+        return numero_origem, (
+            numero,
+            tipo,
+            cliente,
+            telefone,
+            modelo,
+            imei,
+            senha,
+            acessorios,
+            problemas,
+            situacao,
+            valor,
+            entrada[0],
+            saida[0],
+            garantia[0],
+            tipo_garantia or "Com Garantia",
+            metodo_pagamento,
+            checklist,
+            int(dias_garantia) if dias_garantia.isdigit() else 0,
+            int(parcelas) if parcelas.isdigit() else 1,
+            detalhes_parcelas,
+            arquivo_documento(tipo, numero),
+            valor_centavos,
+            entrada[1],
+            saida[1],
+            garantia[1],
+        )
+
+
+class _Relatorio:
+    """CSV aberto só quando a primeira linha chega (rejeitados, mapa de números)."""
+
+    def __init__(self, caminho, cabecalho):
+        self.caminho = caminho
+        self.cabecalho = cabecalho
+        self._arquivo = None
+        self._escritor = None
+        self.linhas = 0
+
+    def escrever(self, linha):
+        self.linhas += 1
+        if self.caminho is None:
+            return
+        if self._escritor is None:
+            self._arquivo = open(self.caminho, "w", encoding="utf-8-sig", newline="")
+            self._escritor = csv.writer(self._arquivo, delimiter=";")
+            self._escritor.writerow(self.cabecalho)
+        self._escritor.writerow(linha)
+
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+
+
+def importar(caminho, numeracao="manter", adiar_indices=True, lote=TAMANHO_LOTE,
+             caminho_rejeitados=None, caminho_mapa=None, encoding="utf-8-sig", ao_progredir=None):
+    """Importa os documentos de um CSV ou banco SQLite para a tabela os.
+
+    Com `adiar_indices`, os índices secundários e o gatilho do FTS são removidos e
+    recriados ao final, tudo numa única transação (uma falha não deixa o banco sem
+    índices). Sem ele, cada lote é confirmado separadamente com os índices ativos.
+    Linhas rejeitadas vão para `caminho_rejeitados` (padrão: <origem>.rejeitados.csv);
+    `caminho_mapa` recebe os documentos cujo número mudou.
+    `ao_progredir(lidos, importados, rejeitados)` é chamado a cada lote.
+    """
+    if caminho_rejeitados is None:
+        caminho_rejeitados = caminho + ".rejeitados.csv"
+
+    destino = obter_conexao().execute("PRAGMA database_list").fetchone()[2]
+    if destino and os.path.exists(destino) and os.path.samefile(destino, caminho):
+        raise ValueError("A origem da importação é o próprio banco de dados.")
+
+    cabecalho, linhas = abrir_origem(caminho, encoding)
+    return importar_linhas(
+        cabecalho, linhas, numeracao, adiar_indices, lote, caminho_rejeitados, caminho_mapa, ao_progredir
+    )
+
+
+@instrumentar("importacao.importar", linhas=itemgetter("importados"))
+def importar_linhas(cabecalho, linhas, numeracao="manter", adiar_indices=True, lote=TAMANHO_LOTE,
+                    caminho_rejeitados=None, caminho_mapa=None, ao_progredir=None):
+    """Como `importar`, para linhas que não vêm de arquivo.
+
+    `linhas` é um iterável de (nº da linha, lista de valores na ordem de `cabecalho`).
+    Sem `caminho_rejeitados`, as linhas rejeitadas só são contadas.
+    """
+    linhas = iter(linhas)
+    indices = mapear_colunas(cabecalho)
+    faltando = [c for c in ("cliente", "valor", "entrada") if c not in indices]
+    if faltando:
+        if hasattr(linhas, "close"):
+            linhas.close()
+        raise ValueError(f"Colunas obrigatórias ausentes na origem: {', '.join(faltando)}")
+
+    conn = obter_conexao()
+    importador = Importador(conn, indices, numeracao)
+    rejeitados = _Relatorio(caminho_rejeitados, ["linha", "motivo"] + list(cabecalho))
+    mapa = _Relatorio(caminho_mapa, ["tipo_documento", "numero_origem", "numero"])
+    sql = f"INSERT INTO os ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})"
+
+    lidos = importados = 0
+    definicoes = []
+    inicio = time.perf_counter()
+
+    def iniciar_transacao():
+        conn.execute("BEGIN IMMEDIATE")
+        importador.atualizar_estado()
+        return importador.ultimo_id_visto
+
+    def concluir_transacao(desde_id):
+        migrar_parcelas_json(conn, desde_id)
+        atualizar_sequencias(conn, desde_id)
+        conn.commit()
+
+    try:
+        desde_id = iniciar_transacao()
+        if adiar_indices:
+            definicoes = suspender_indices(conn)
+
+        buffer = []
+        for numero_linha, valores in linhas:
+            lidos += 1
+            try:
+                numero_origem, registro = importador.normalizar(valores)
+            except LinhaInvalida as e:
+                rejeitados.escrever([numero_linha, str(e)] + valores)
+                continue
+            if registro[0] != numero_origem:
+                mapa.escrever([registro[1], numero_origem, registro[0]])
+            buffer.append(registro)
+
+            if len(buffer) >= lote:
+                conn.executemany(sql, buffer)
+                importados += len(buffer)
+                buffer = []
+                if not adiar_indices:
+                    concluir_transacao(desde_id)
+                    desde_id = iniciar_transacao()
+                if ao_progredir:
+                    ao_progredir(lidos, importados, rejeitados.linhas)
+
+        if buffer:
+            conn.executemany(sql, buffer)
+            importados += len(buffer)
+        if definicoes:
+            restaurar_indices(conn, definicoes, desde_id)
+        concluir_transacao(desde_id)
+    except BaseException:
+        conn.rollback()
+        if not adiar_indices:
+            # Os lotes já confirmados continuam no banco
+            invalidar_caches()
+        raise
+    finally:
+        if hasattr(linhas, "close"):
+            linhas.close()
+        rejeitados.fechar()
+        mapa.fechar()
+
+    invalidar_caches()
+    segundos = time.perf_counter() - inicio
+    if ao_progredir:
+        ao_progredir(lidos, importados, rejeitados.linhas)
+
+    return {
+        "lidos": lidos,
+        "importados": importados,
+        "rejeitados": rejeitados.linhas,
+        "renumerados": mapa.linhas if caminho_mapa else None,
+        "arquivo_rejeitados": caminho_rejeitados if rejeitados.linhas and caminho_rejeitados else None,
+        "segundos": segundos,
+        "por_segundo": importados / segundos if segundos > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa documentos de um CSV ou de outro banco SQLite.")
+    parser.add_argument("origem", help="Arquivo .csv ou banco .db de origem.")
+    parser.add_argument("--numeracao", choices=("manter", "nova"), default="manter",
+                        help="Manter os números da origem (renumerando conflitos) ou numerar tudo de novo.")
+    parser.add_argument("--rejeitados", default=None, help="CSV das linhas rejeitadas (padrão: <origem>.rejeitados.csv).")
+    parser.add_argument("--mapa", default=None, help="CSV com os documentos cujo número mudou.")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Linhas por executemany.")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificação do CSV (ex.: cp1252).")
+    parser.add_argument("--manter-indices", action="store_true",
+                        help="Não suspender índices: confirma cada lote separadamente.")
+    args = parser.parse_args(argv)
+
+    def mostrar(lidos, importados, rejeitados):
+        print(f"\r{lidos} lidas, {importados} importadas, {rejeitados} rejeitadas", end="", flush=True)
+
+    criar_banco()
+    try:
+        resumo = importar(
+            args.origem, args.numeracao, not args.manter_indices, args.lote,
+            args.rejeitados, args.mapa, args.encoding, mostrar,
+        )
+    except KeyboardInterrupt:
+        print("\nInterrompido." + ("" if args.manter_indices else " Nada foi importado."))
+        return 130
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"\nErro: {e}")
+        return 2
+    finally:
+        fechar_conexoes()
+
+    print()
+    print(
+        f"{resumo['importados']} documentos importados em {resumo['segundos']:.1f}s "
+        f"({resumo['por_segundo']:.0f}/s), {resumo['rejeitados']} rejeitados."
+    )
+    if resumo["arquivo_rejeitados"]:
+        print(f"Linhas rejeitadas: {resumo['arquivo_rejeitados']}")
+    return 1 if resumo["rejeitados"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
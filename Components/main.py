@@ -1,6 +1,6 @@
 import customtkinter as ctk
 from config import init_customtkinter
-from database import criar_banco
+from database import criar_banco, fechar_conexoes
 from gui import SistemaOS
 
 if __name__ == "__main__":
@@ -9,4 +9,7 @@ if __name__ == "__main__":
     
     app = ctk_module.CTk()
     SistemaOS(app)
-    app.mainloop()
\ No newline at end of file
+    try:
+        app.mainloop()
+    finally:
+        fechar_conexoes()
\ No newline at end of file
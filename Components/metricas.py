@@ -0,0 +1,188 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from .config import APP_DIR
+
+# Métricas ligadas por padrão; DIPCELL_METRICAS=0 desliga desde a inicialização
+_ativo = os.environ.get("DIPCELL_METRICAS", "1") != "0"
+
+# Operações acima deste tempo vão para o log de lentidão
+LIMITE_LENTO_MS = float(os.environ.get("DIPCELL_LIMITE_LENTO_MS", "250"))
+ARQUIVO_LENTAS = os.path.join(APP_DIR, "operacoes_lentas.log")
+MAX_LENTAS_EM_MEMORIA = 200
+
+# Limites superiores dos baldes do histograma, em segundos: de 10 µs a ~2 min,
+# crescendo 25% a cada balde (erro dos percentis abaixo de 25%)
+_LIMITES = [10e-6 * 1.25 ** i for i in range(74)] + [float("inf")]
+
+
+class _Histograma:
+    """Contagem de latências em baldes fixos: memória constante por operação."""
+
+    __slots__ = ("baldes", "chamadas", "linhas", "total", "maximo")
+
+    def __init__(self):
+        self.baldes = [0] * len(_LIMITES)
+        self.chamadas = 0
+        self.linhas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos, linhas):
+        self.baldes[bisect.bisect_left(_LIMITES, segundos)] += 1
+        self.chamadas += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        if linhas:
+            self.linhas += linhas
+
+    def percentil(self, p):
+        """Limite superior do balde que contém o percentil `p` (0–100), em segundos."""
+        alvo = self.chamadas * p / 100
+        acumulado = 0
+        for i, contagem in enumerate(self.baldes):
+            acumulado += contagem
+            if contagem and acumulado >= alvo:
+                return min(_LIMITES[i], self.maximo)
+        return self.maximo
+
+
+_histogramas = {}
+_lentas = deque(maxlen=MAX_LENTAS_EM_MEMORIA)
+_lock = threading.Lock()
+
+
+def ativo():
+    return _ativo
+
+
+def ativar(ligado=True):
+    """Liga ou desliga a coleta. Desligada, cada operação instrumentada custa um teste de flag."""
+    global _ativo
+    _ativo = ligado
+
+
+def definir_limite_lento(ms):
+    global LIMITE_LENTO_MS
+    LIMITE_LENTO_MS = ms
+
+
+def registrar(operacao, segundos, linhas=None):
+    """Registra uma execução de `operacao` que levou `segundos` e afetou `linhas` linhas."""
+    with _lock:
+        histograma = _histogramas.get(operacao)
+        if histograma is None:
+            histograma = _histogramas[operacao] = _Histograma()
+        histograma.registrar(segundos, linhas)
+
+    ms = segundos * 1000
+    if ms >= LIMITE_LENTO_MS:
+        _registrar_lenta(operacao, ms, linhas)
+
+
+def _registrar_lenta(operacao, ms, linhas):
+    quando = datetime.now().isoformat(sep=" ", timespec="seconds")
+    thread = threading.current_thread().name
+    _lentas.append((quando, operacao, ms, linhas, thread))
+    try:
+        with open(ARQUIVO_LENTAS, "a", encoding="utf-8") as f:
+            f.write(f"{quando}\t{operacao}\t{ms:.1f} ms\tlinhas={linhas if linhas is not None else '-'}\t{thread}\n")
+    except OSError:
+        pass  # O log em arquivo é opcional; a lista em memória continua valendo
+
+
+def instrumentar(operacao, linhas=None):
+    """Decorador que mede cada chamada da função como `operacao`.
+
+    `linhas`, se dado, recebe o retorno da função e devolve o nº de linhas
+    (ex.: `len` para listas de registros).
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            resultado = funcao(*args, **kwargs)
+            duracao = time.perf_counter() - inicio
+            registrar(operacao, duracao, linhas(resultado) if linhas and resultado is not None else None)
+            return resultado
+        return medida
+    return decorador
+
+
+class _Medicao:
+    __slots__ = ("operacao", "linhas", "_inicio")
+
+    def __init__(self, operacao):
+        self.operacao = operacao
+        self.linhas = None
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        registrar(self.operacao, time.perf_counter() - self._inicio, self.linhas)
+        return False
+
+
+class _MedicaoNula:
+    """Usada com a coleta desligada: não mede nada e aceita `linhas`."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        return False
+
+    def __setattr__(self, nome, valor):
+        pass
+
+
+_MEDICAO_NULA = _MedicaoNula()
+
+
+def medir(operacao):
+    """Context manager: `with medir("op") as m: ...; m.linhas = n`."""
+    return _Medicao(operacao) if _ativo else _MEDICAO_NULA
+
+
+def instantaneo():
+    """Lista de dicts por operação (ordenada pelo tempo total), com tempos em ms."""
+    with _lock:
+        itens = [
+            {
+                "operacao": operacao,
+                "chamadas": h.chamadas,
+                "linhas": h.linhas,
+                "total_ms": h.total * 1000,
+                "media_ms": h.total * 1000 / h.chamadas,
+                "p50_ms": h.percentil(50) * 1000,
+                "p95_ms": h.percentil(95) * 1000,
+                "p99_ms": h.percentil(99) * 1000,
+                "max_ms": h.maximo * 1000,
+            }
+            for operacao, h in _histogramas.items()
+            if h.chamadas
+        ]
+    return sorted(itens, key=lambda i: -i["total_ms"])
+
+
+def operacoes_lentas():
+    """Operações lentas mais recentes primeiro: (quando, operacao, ms, linhas, thread)."""
+    return list(reversed(_lentas))
+
+
+def zerar():
+    with _lock:
+        _histogramas.clear()
+        _lentas.clear()
@@ -0,0 +1,318 @@
+"""Migrações do esquema do banco, controladas por PRAGMA user_version.
+
+Cada passo de MIGRACOES roda uma única vez, na sua própria transação, junto com
+a gravação do novo user_version: ou o passo inteiro é aplicado, ou nada muda.
+Num banco já atualizado, `migrar` só lê o user_version.
+
+Os passos 1 a 5 reproduzem o antigo criar_banco e por isso verificam o que já
+existe: bancos anteriores ao controle de versão (user_version 0) podem ter
+qualquer parte desse esquema. Passos novos vão sempre no final da lista e,
+depois de publicados, não devem ser alterados.
+"""
+
+import sqlite3
+
+from .database import COLUNAS_BUSCA, COLUNAS_TIPADAS, TIPOS_DOCUMENTO, migrar_parcelas_json
+
+
+def _colunas(conn, tabela):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")]
+
+
+def _existe_tabela(conn, nome):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (nome,)
+    ).fetchone() is not None
+
+
+def _tabela_os(conn):
+    """Tabela os, colunas acrescentadas ao longo das versões e índices originais."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS os (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero TEXT,
+            cliente TEXT,
+            telefone TEXT,
+            modelo TEXT,
+            imei TEXT,
+            senha TEXT,
+            acessorios TEXT,
+            problemas TEXT,
+            situacao TEXT,
+            valor TEXT,
+            entrada TEXT,
+            saida TEXT,
+            garantia TEXT,
+            arquivo TEXT,
+            tipo_garantia TEXT,
+            metodo_pagamento TEXT,
+            checklist TEXT,
+            dias_garantia INTEGER,
+            tipo_documento TEXT
+        )
+        """
+    )
+
+    # Colunas acrescentadas depois da primeira versão
+    cols = _colunas(conn, "os")
+    obrig = {
+        "garantia": "TEXT",
+        "saida": "TEXT",
+        "tipo_garantia": "TEXT",
+        "metodo_pagamento": "TEXT",
+        "checklist": "TEXT",
+        "dias_garantia": "INTEGER",
+        "tipo_documento": "TEXT",
+        "parcelas": "INTEGER",
+        "detalhes_parcelas": "TEXT",
+    }
+    for col, tipo in obrig.items():
+        if col not in cols:
+            if col == "dias_garantia":
+                default_val = "90"
+            elif col == "tipo_documento":
+                default_val = "'OS'"
+            elif col == "parcelas":
+                default_val = "1"
+            else:
+                default_val = "'Com Garantia'"
+            conn.execute(f"ALTER TABLE os ADD COLUMN {col} {tipo} DEFAULT {default_val}")
+
+    indices = [
+        "CREATE INDEX IF NOT EXISTS idx_numero ON os (numero)",
+        "CREATE INDEX IF NOT EXISTS idx_cliente ON os (cliente)",
+        "CREATE INDEX IF NOT EXISTS idx_modelo ON os (modelo)",
+        "CREATE INDEX IF NOT EXISTS idx_imei ON os (imei)",
+        "CREATE INDEX IF NOT EXISTS idx_problemas ON os (problemas)",
+        "CREATE INDEX IF NOT EXISTS idx_tipo_documento ON os (tipo_documento)",
+        "CREATE INDEX IF NOT EXISTS idx_situacao ON os (situacao)",
+        "CREATE INDEX IF NOT EXISTS idx_entrada ON os (entrada)",
+    ]
+    for idx in indices:
+        conn.execute(idx)
+
+
+def _indice_busca(conn):
+    """Índice FTS5 da busca, com gatilhos de sincronização e preenchimento inicial."""
+    if _existe_tabela(conn, "os_fts"):
+        return
+
+    cols = ", ".join(COLUNAS_BUSCA)
+    novos = ", ".join(f"new.{col}" for col in COLUNAS_BUSCA)
+    antigos = ", ".join(f"old.{col}" for col in COLUNAS_BUSCA)
+
+    try:
+        # remove_diacritics faz "joao" encontrar "João"
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE os_fts USING fts5(
+                {cols},
+                content='os',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.Error as e:
+        # Sem FTS5 a busca continua funcionando com LIKE (ver database._filtro_busca)
+        print(f"Aviso: Não foi possível criar o índice de busca (FTS5): {e}")
+        return
+
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS os_fts_ai AFTER INSERT ON os BEGIN
+            INSERT INTO os_fts(rowid, {cols}) VALUES (new.id, {novos});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS os_fts_ad AFTER DELETE ON os BEGIN
+            INSERT INTO os_fts(os_fts, rowid, {cols}) VALUES ('delete', old.id, {antigos});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS os_fts_au AFTER UPDATE OF {cols} ON os BEGIN
+            INSERT INTO os_fts(os_fts, rowid, {cols}) VALUES ('delete', old.id, {antigos});
+            INSERT INTO os_fts(rowid, {cols}) VALUES (new.id, {novos});
+        END
+        """
+    )
+    conn.execute("INSERT INTO os_fts(os_fts) VALUES ('rebuild')")
+
+
+def _sequencias(conn):
+    """Tabela de sequências de numeração e restrição de número único por tipo."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sequencias (
+            tipo_documento TEXT PRIMARY KEY,
+            ultimo INTEGER NOT NULL
+        )
+        """
+    )
+
+    # Parte do maior número já usado de cada tipo
+    for tipo in TIPOS_DOCUMENTO:
+        conn.execute(
+            "INSERT OR IGNORE INTO sequencias (tipo_documento, ultimo) "
+            "SELECT ?, COALESCE(MAX(CAST(SUBSTR(numero, ?) AS INTEGER)), 0) "
+            "FROM os WHERE tipo_documento=?",
+            (tipo, len(tipo) + 2, tipo),
+        )
+
+    try:
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tipo_numero ON os (tipo_documento, numero)"
+        )
+    except sqlite3.Error as e:
+        # Bancos antigos podem ter números duplicados gerados por terminais concorrentes
+        print(f"Aviso: Não foi possível criar o índice único de número por tipo: {e}")
+
+
+def _colunas_tipadas(conn):
+    """Colunas tipadas (centavos, datas ISO) preenchidas a partir do texto existente."""
+    cols = _colunas(conn, "os")
+    faltando = {col: tipo for col, tipo in (
+        ("valor_centavos", "INTEGER"),
+        ("entrada_iso", "TEXT"),
+        ("saida_iso", "TEXT"),
+        ("garantia_iso", "TEXT"),
+    ) if col not in cols}
+
+    if faltando:
+        for col, tipo in faltando.items():
+            conn.execute(f"ALTER TABLE os ADD COLUMN {col} {tipo}")
+
+        # Mesma conversão usada em insert/update, aplicada numa única passada
+        for col in faltando:
+            origem, conversao = COLUNAS_TIPADAS[col]
+            conn.create_function(f"_conv_{col}", 1, conversao, deterministic=True)
+        set_clause = ", ".join(
+            f"{col} = _conv_{col}({COLUNAS_TIPADAS[col][0]})" for col in faltando
+        )
+        conn.execute(f"UPDATE os SET {set_clause}")
+
+    for col in ("entrada_iso", "saida_iso", "garantia_iso"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{col} ON os ({col})")
+
+    # Índice de cobertura do resumo financeiro (relatorios.resumo_financeiro):
+    # o período é lido só do índice, sem acessar as linhas da tabela.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resumo_financeiro ON os "
+        "(entrada_iso, tipo_documento, metodo_pagamento, situacao, valor_centavos)"
+    )
+
+
+def _parcelas(conn):
+    """Tabela de parcelas do crediário, migrando os dados de detalhes_parcelas."""
+    if _existe_tabela(conn, "parcelas"):
+        return
+
+    conn.execute(
+        """
+        CREATE TABLE parcelas (
+            id INTEGER PRIMARY KEY,
+            documento_id INTEGER NOT NULL REFERENCES os (id) ON DELETE CASCADE,
+            numero INTEGER NOT NULL,
+            vencimento_iso TEXT NOT NULL,
+            valor_centavos INTEGER NOT NULL,
+            pago INTEGER NOT NULL DEFAULT 0,
+            data_pagamento_iso TEXT,
+            UNIQUE (documento_id, numero)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_parcelas_situacao ON parcelas (pago, vencimento_iso)")
+    conn.execute("CREATE INDEX idx_parcelas_vencimento ON parcelas (vencimento_iso)")
+    # Não depende de PRAGMA foreign_keys estar ativo
+    conn.execute(
+        """
+        CREATE TRIGGER parcelas_os_ad AFTER DELETE ON os BEGIN
+            DELETE FROM parcelas WHERE documento_id = old.id;
+        END
+        """
+    )
+
+    migrar_parcelas_json(conn)
+
+
+# Índices sem nenhuma consulta que os use: a busca é feita pelo FTS5 (LIKE '%...%'
+# no modo sem FTS também não usa B-tree), entrada é texto dd/mm/aaaa (ordena
+# errado), idx_tipo_documento e idx_entrada_iso são prefixos de outros índices e
+# nada filtra por numero sem o tipo, por situacao sozinha, saida_iso ou garantia_iso.
+INDICES_SEM_USO = (
+    "idx_numero", "idx_cliente", "idx_modelo", "idx_imei", "idx_problemas",
+    "idx_tipo_documento", "idx_situacao", "idx_entrada",
+    "idx_entrada_iso", "idx_saida_iso", "idx_garantia_iso",
+)
+
+
+def _indices_por_consulta(conn):
+    """Remove índices que só custam escrita e garante o índice de (tipo_documento, numero)."""
+    for nome in INDICES_SEM_USO:
+        conn.execute(f"DROP INDEX IF EXISTS {nome}")
+
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_tipo_numero'"
+    ).fetchone()
+    if existe:
+        return
+    try:
+        conn.execute("CREATE UNIQUE INDEX idx_tipo_numero ON os (tipo_documento, numero)")
+    except sqlite3.IntegrityError as e:
+        # Números duplicados de versões antigas: o índice fica não único até a correção,
+        # mas as buscas por documento continuam usando-o
+        print(f"Aviso: Há números de documento duplicados, índice criado sem unicidade: {e}")
+        conn.execute("CREATE INDEX idx_tipo_numero ON os (tipo_documento, numero)")
+
+
+def _versao_registro(conn):
+    """Colunas versao e atualizado_em, para detectar edições concorrentes (ver update_document)."""
+    cols = _colunas(conn, "os")
+    if "versao" not in cols:
+        conn.execute("ALTER TABLE os ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+    if "atualizado_em" not in cols:
+        conn.execute("ALTER TABLE os ADD COLUMN atualizado_em TEXT")
+
+
+# (versão, descrição, passo). Novos passos sempre no final.
+MIGRACOES = [
+    (1, "tabela os e índices originais", _tabela_os),
+    (2, "índice de busca FTS5", _indice_busca),
+    (3, "sequências de numeração", _sequencias),
+    (4, "colunas tipadas", _colunas_tipadas),
+    (5, "tabela de parcelas do crediário", _parcelas),
+    (6, "índices conforme as consultas", _indices_por_consulta),
+    (7, "versão dos registros", _versao_registro),
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+
+def versao_atual(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn):
+    """Aplica as migrações pendentes e retorna as versões aplicadas."""
+    versao = versao_atual(conn)
+    if versao >= VERSAO_ESQUEMA:
+        if versao > VERSAO_ESQUEMA:
+            print(f"Aviso: O banco está na versão {versao}, mais nova que a deste programa ({VERSAO_ESQUEMA}).")
+        return []
+
+    aplicadas = []
+    for versao, descricao, passo in MIGRACOES:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Outro terminal pode ter migrado enquanto esperávamos a trava de escrita
+            if versao_atual(conn) >= versao:
+                continue
+            passo(conn)
+            conn.execute(f"PRAGMA user_version = {versao}")
+        aplicadas.append(versao)
+    return aplicadas
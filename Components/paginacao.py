@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+from .backend import count_documents, find_page_anchor, list_documents_page, versao_dados
+
+
+class Paginador:
+    """Paginação da lista por cursor (keyset em id) com âncoras de página em cache.
+
+    `_ancoras[p]` é o id do último registro da página p-1 (None para a página 1),
+    ou seja, o `after_id` que carrega a página p. Avançar, voltar ou reabrir uma
+    página já visitada custa o mesmo em qualquer profundidade; saltar para uma
+    página nova parte da âncora conhecida mais próxima.
+    """
+
+    def __init__(self, page_size=50):
+        self.page_size = page_size
+        self.search = ""
+        self._ancoras = {1: None}
+        self._versao = versao_dados()
+
+    def _validar(self, search):
+        versao = versao_dados()
+        if search != self.search or versao != self._versao:
+            self.search = search
+            self._versao = versao
+            self._ancoras = {1: None}
+
+    def total_paginas(self, total):
+        return max(1, (total + self.page_size - 1) // self.page_size)
+
+    def carregar(self, search, page):
+        """Retorna (page, rows, total), com `page` limitada ao intervalo válido."""
+        search = (search or "").strip()
+        self._validar(search)
+
+        total = count_documents(search)
+        page = min(max(1, page), self.total_paginas(total))
+
+        if page not in self._ancoras and (page + 1) in self._ancoras:
+            # Voltando a partir de um salto: lê para trás a partir do fim da página
+            rows = list_documents_page(search, self.page_size + 1, from_id=self._ancoras[page + 1])
+            if len(rows) > self.page_size:
+                # A linha extra é o último registro da página anterior
+                self._ancoras[page] = rows[-self.page_size - 1]["id"]
+                rows = rows[-self.page_size:]
+            else:
+                self._ancoras[page] = None
+            return page, rows, total
+
+        rows = list_documents_page(search, self.page_size, after_id=self._ancora(page))
+        if rows:
+            self._ancoras[page + 1] = rows[-1]["id"]
+        return page, rows, total
+
+    def _ancora(self, page):
+        if page in self._ancoras:
+            return self._ancoras[page]
+
+        base = max(p for p in self._ancoras if p < page)
+        cursor = find_page_anchor(
+            self.search, (page - base) * self.page_size, after_id=self._ancoras[base]
+        )
+        self._ancoras[page] = cursor
+        return cursor
+
+
+class ListaVirtual:
+    """Modelo da Lista virtual: entrega qualquer janela de linhas da busca.
+
+    As linhas são lidas em blocos de `tamanho_bloco` (páginas do Paginador) e
+    ficam em cache; ao pedir uma janela, os blocos vizinhos também são lidos
+    (prefetch). O cache é descartado quando a busca ou os dados mudam, inclusive
+    por gravações de outros terminais (ver database.versao_dados).
+
+    `janela` roda na thread de busca; `janela_em_cache` e `vizinhos_em_cache`
+    podem ser chamadas da thread do Tk, pois não leem a tabela (no máximo o
+    PRAGMA data_version de versao_dados).
+    """
+
+    def __init__(self, tamanho_bloco=100, max_blocos=40):
+        self.tamanho_bloco = tamanho_bloco
+        self.max_blocos = max_blocos
+        self.paginador = Paginador(tamanho_bloco)
+        self.total = 0
+        self._blocos = OrderedDict()
+        self._chave = None  # (search, versao_dados) a que o cache se refere
+        self._lock = threading.Lock()
+
+    def _blocos_da_janela(self, inicio, quantidade):
+        primeiro = inicio // self.tamanho_bloco
+        ultimo = max(inicio, inicio + quantidade - 1) // self.tamanho_bloco
+        return primeiro, ultimo
+
+    def _limitar(self, inicio, quantidade, total):
+        return max(0, min(inicio, total - quantidade))
+
+    def janela(self, search, inicio, quantidade):
+        """Retorna (inicio, rows, total) lendo do banco os blocos que faltarem."""
+        search = (search or "").strip()
+        chave = (search, versao_dados())
+        with self._lock:
+            if chave != self._chave:
+                self._chave = chave
+                self._blocos.clear()
+
+        total = count_documents(search)
+        inicio = self._limitar(inicio, quantidade, total)
+        primeiro, ultimo = self._blocos_da_janela(inicio, quantidade)
+
+        # Os blocos da janela primeiro, depois os vizinhos para a próxima rolagem
+        for bloco in list(range(primeiro, ultimo + 1)) + [ultimo + 1, primeiro - 1]:
+            if bloco < 0 or bloco * self.tamanho_bloco >= total:
+                continue
+            with self._lock:
+                if bloco in self._blocos:
+                    self._blocos.move_to_end(bloco)
+                    continue
+            _, rows, _ = self.paginador.carregar(search, bloco + 1)
+            with self._lock:
+                if self._chave == chave:
+                    self._blocos[bloco] = rows
+                    while len(self._blocos) > self.max_blocos:
+                        self._blocos.popitem(last=False)
+
+        with self._lock:
+            self.total = total
+            return inicio, self._recortar(inicio, quantidade), total
+
+    def janela_em_cache(self, search, inicio, quantidade):
+        """Como `janela`, mas só com o cache; None se faltar algum bloco."""
+        with self._lock:
+            if self._chave != ((search or "").strip(), versao_dados()):
+                return None
+            inicio = self._limitar(inicio, quantidade, self.total)
+            primeiro, ultimo = self._blocos_da_janela(inicio, quantidade)
+            for bloco in range(primeiro, ultimo + 1):
+                if bloco * self.tamanho_bloco < self.total and bloco not in self._blocos:
+                    return None
+            return inicio, self._recortar(inicio, quantidade), self.total
+
+    def vizinhos_em_cache(self, inicio, quantidade):
+        """Indica se os blocos antes e depois da janela já foram lidos."""
+        with self._lock:
+            primeiro, ultimo = self._blocos_da_janela(inicio, quantidade)
+            for bloco in (primeiro - 1, ultimo + 1):
+                if 0 <= bloco and bloco * self.tamanho_bloco < self.total and bloco not in self._blocos:
+                    return False
+            return True
+
+    def substituir_registro(self, search, registro, versao_escrita):
+        """Troca no cache a versão de um registro que acabou de ser editado.
+
+        `versao_escrita` é o versao_dados retornado pela própria edição
+        (versao_da_ultima_escrita). Só vale sem filtro de busca (a edição não muda
+        quais linhas aparecem nem a ordem) e se essa edição foi a única escrita desde
+        que o cache foi lido. Retorna False quando a janela precisa ser relida do banco.
+        """
+        search = (search or "").strip()
+        if search or versao_escrita is None or versao_dados() != versao_escrita:
+            return False
+        with self._lock:
+            if self._chave != (search, versao_escrita - 1):
+                return False
+            for rows in self._blocos.values():
+                for i, row in enumerate(rows):
+                    if row["id"] == registro["id"]:
+                        rows[i] = registro
+            self._chave = (search, versao_escrita)
+            return True
+
+    def _recortar(self, inicio, quantidade):
+        primeiro, ultimo = self._blocos_da_janela(inicio, quantidade)
+        rows = []
+        for bloco in range(primeiro, ultimo + 1):
+            rows.extend(self._blocos.get(bloco, []))
+        deslocamento = inicio - primeiro * self.tamanho_bloco
+        return rows[deslocamento:deslocamento + quantidade]
@@ -1,16 +1,250 @@
 import json
 import os
-from tkinter import messagebox
+import threading
 
 from reportlab.lib import colors
 from reportlab.lib.colors import grey
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
-from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 from .config import LOGO_PADRAO, PASTA_OS
-from .utils import formatar_monetario
+from .metricas import instrumentar
+from .utils import caminho_pdf_documento, formatar_monetario, parse_monetario_to_float
+
+
+class ErroGeracaoPDF(Exception):
+    """Falha ao gerar o PDF. `titulo` é o título do diálogo mostrado pela interface."""
+
+    def __init__(self, titulo, mensagem):
+        super().__init__(mensagem)
+        self.titulo = titulo
+
+
+# ==========================================================
+# MODELO PRÉ-COMPILADO
+# ==========================================================
+
+_TITULOS = {"OS": "Ordem de Serviço", "VENDA": "Comprovante de Venda"}
+AVISO_PAGAMENTO = "NÃO SERÁ ENTREGUE O APARELHO/PRODUTO SEM ANTES ACERTAR O PAGAMENTO. "
+
+# A logo ocupa 120pt no PDF; 3x isso mantém boa qualidade de impressão
+# sem embutir a imagem original de 1024px em cada documento.
+_LOGO_PIXELS = 360
+
+
+def _desenhar_borda(canvas, doc):
+    canvas.saveState()
+    W, H = A4
+    canvas.setStrokeColor(colors.black)
+    canvas.setLineWidth(1)
+    canvas.rect(12, 12, W - 24, H - 24)
+    canvas.setLineWidth(0.8)
+    canvas.rect(20, 20, W - 40, H - 40)
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(grey)
+    canvas.drawCentredString(W / 2, 35, "DIPCELL — Sistema de OS/Vendas")
+    canvas.restoreState()
+
+
+def _texto_termo(tipo_documento, situacao, tipo_garantia, dias_garantia_num):
+    dias_garantia_texto = f"{dias_garantia_num} dias" if dias_garantia_num > 0 else "legal"
+
+    if tipo_documento == "OS":
+        if situacao == "CONCLUÍDA" and tipo_garantia == "Com Garantia":
+            return (
+                f"<font size='8'><b>{AVISO_PAGAMENTO}</b> A garantia cobre exclusivamente o **serviço** realizado pelo período de **{dias_garantia_texto}** informado nesta OS. "
+                "Não cobre danos causados por mau uso, queda, oxidação, danos líquidos, tela quebrada ou violação do lacre. "
+                "O aparelho deve ser retirado em até 90 dias após a conclusão do serviço.</font>"
+            )
+        return (  # Se não for Concluída ou for Sem Garantia
+            f"<font size='8'><b>{AVISO_PAGAMENTO} SERVIÇO SEM GARANTIA!</b> Esta OS está como <b>{situacao}</b>. O cliente está ciente de que o serviço realizado "
+            "não possui cobertura de garantia devido à situação, natureza do reparo/peça ou condição do aparelho. "
+            "O aparelho deve ser retirado em até 90 dias após a conclusão do serviço.</font>"
+        )
+
+    if situacao == "CONCLUÍDA" and tipo_garantia == "Com Garantia":
+        return (
+            f"<font size='8'><b>{AVISO_PAGAMENTO}</b> A garantia de **{dias_garantia_texto}** cobre somente se o produto apresentar "
+            "problemas de fábrica e estiver com a caixa do mesmo. "
+            "A garantia **NÃO COBRE** danos por mau uso, queda, oxidação, danos líquidos ou remoção de selos de garantia.</font>"
+        )
+    return (  # Se não for Concluída ou for Sem Garantia
+        f"<font size='8'><b>{AVISO_PAGAMENTO} PRODUTO VENDIDO SEM GARANTIA!</b> O cliente está ciente de que este produto "
+        "não possui cobertura de garantia (Status: {dados['situacao']}).</font>"
+    )
+
+
+class _Logo(Flowable):
+    """Desenha a logo já decodificada e reduzida, sem reler o arquivo a cada documento."""
+
+    def __init__(self, imagem, largura, altura):
+        super().__init__()
+        self.imagem = imagem
+        self.width = largura
+        self.height = altura
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.imagem, 0, 0, self.width, self.height, mask="auto")
+
+
+class _ModeloDocumento:
+    """Estilos, logo, cabeçalhos e blocos fixos do PDF, montados uma única vez.
+
+    Só os dados de cada documento são criados por chamada. Os flowables em cache
+    são reaproveitados entre documentos, por isso cada thread tem o seu modelo.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.normal = styles["Normal"]
+        # Estilo usado pelo ReportLab quando Paragraph é criado sem estilo
+        self.estilo_padrao = ParagraphStyle("paragraphImplicitDefaultStyle")
+        self.estilo_titulo = ParagraphStyle("t", parent=styles["Heading1"], alignment=1, fontSize=22)
+        self.estilo_secao = ParagraphStyle("t2", parent=styles["Heading2"], fontSize=14)
+        self.estilo_item = ParagraphStyle("s", parent=self.normal, alignment=0, leading=8)
+
+        self.estilo_bloco = TableStyle(
+            [
+                ("GRID", (0, 0), (-1, 0), 0.6, colors.grey),
+                ("GRID", (0, 1), (-1, -1), 0.6, colors.grey),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ]
+        )
+        self.estilo_checklist = TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+                ("TOPPADDING", (0, 0), (-1, -1), 0.5),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 0.5),
+            ]
+        )
+        self.estilo_parcelas = TableStyle(
+            [
+                ("GRID", (0, 0), (-1, -1), 0.6, colors.grey),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ]
+        )
+
+        self.logo = self._carregar_logo()
+
+        self.assinaturas = Table(
+            [["__________________________________", "__________________________________"], ["Assinatura do Cliente", "Assinatura da Loja"]],
+            colWidths=[245, 245],
+        )
+        self.assinaturas.setStyle(
+            TableStyle(
+                [
+                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                    ("TOPPADDING", (0, 0), (-1, -1), 8),
+                    ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+                ]
+            )
+        )
+
+        self._cabecalhos = {}
+        self._titulos_secao = {}
+        self._rotulos = {}
+        self._itens_checklist = {}
+        self._termos = {}
+
+    @staticmethod
+    def _carregar_logo():
+        if not os.path.exists(LOGO_PADRAO):
+            return None
+        try:
+            from PIL import Image as PILImage
+
+            imagem = PILImage.open(LOGO_PADRAO)
+            imagem.thumbnail((_LOGO_PIXELS, _LOGO_PIXELS))
+            return ImageReader(imagem)
+        except Exception as e:
+            print(f"Aviso: Não foi possível pré-carregar a logo do PDF: {e}")
+            return None
+
+    def cabecalho(self, tipo_documento):
+        if tipo_documento not in self._cabecalhos:
+            titulo = Paragraph(f"<b>DIPCELL<br/>{_TITULOS[tipo_documento]}</b>", self.estilo_titulo)
+            if self.logo is not None:
+                img = _Logo(self.logo, 120, 120)
+            elif os.path.exists(LOGO_PADRAO):
+                img = Image(LOGO_PADRAO, width=120, height=120)
+            else:
+                img = Paragraph("", self.normal)
+
+            header = Table([[img, titulo]], colWidths=[160, 330])
+            header.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "MIDDLE")]))
+            self._cabecalhos[tipo_documento] = header
+        return self._cabecalhos[tipo_documento]
+
+    def titulo_secao(self, titulo):
+        if titulo not in self._titulos_secao:
+            self._titulos_secao[titulo] = Paragraph(f"<b>{titulo}</b>", self.estilo_secao)
+        return self._titulos_secao[titulo]
+
+    def rotulo(self, texto):
+        if texto not in self._rotulos:
+            self._rotulos[texto] = Paragraph(f"<b>{texto}</b>", self.estilo_padrao)
+        return self._rotulos[texto]
+
+    def item_checklist(self, item, marcado):
+        chave = (item, marcado)
+        if chave not in self._itens_checklist:
+            if item:
+                check_char = "X" if marcado else " "
+                self._itens_checklist[chave] = Paragraph(
+                    f"<font size='8'>[{check_char}] <b>{item}</b></font>", self.estilo_item
+                )
+            else:
+                self._itens_checklist[chave] = Paragraph("", self.normal)
+        return self._itens_checklist[chave]
+
+    def termo(self, tipo_documento, situacao, tipo_garantia, dias_garantia_num):
+        chave = (tipo_documento, situacao, tipo_garantia, dias_garantia_num)
+        if chave not in self._termos:
+            self._termos[chave] = Paragraph(
+                _texto_termo(tipo_documento, situacao, tipo_garantia, dias_garantia_num), self.normal
+            )
+        return self._termos[chave]
+
+
+_modelos = threading.local()
+
+
+def _modelo():
+    modelo = getattr(_modelos, "modelo", None)
+    if modelo is None:
+        modelo = _modelos.modelo = _ModeloDocumento()
+    return modelo
+
+
+def argumentos_de_registro(registro):
+    """Monta os argumentos de renderizar_documento a partir de uma linha da tabela os."""
+    dados = dict(registro)
+    valor_texto = dados.get("valor") or "0,00"
+    try:
+        total_float = parse_monetario_to_float(valor_texto)
+    except ValueError:
+        total_float = 0.0
+
+    return (
+        dados,
+        valor_texto,
+        total_float,
+        dados.get("tipo_garantia") or "Com Garantia",
+        dados.get("metodo_pagamento") or "",
+        dados.get("checklist") or "",
+        dados.get("tipo_documento") or "OS",
+        dados.get("dias_garantia") or 0,
+        dados.get("detalhes_parcelas") or "",
+    )
 
 
 def gerar_documento(
@@ -24,7 +258,44 @@ def gerar_documento(
     dias_garantia_num,
     parcelas_info=None,
 ):
-    # Código da função gerar_documento (mantido inalterado)
+    """Gera o PDF e retorna o caminho; em caso de erro mostra um diálogo e retorna None."""
+    try:
+        return renderizar_documento(
+            dados,
+            valor_texto,
+            total_float,
+            tipo_garantia,
+            metodo_pagamento,
+            checklist_str,
+            tipo_documento,
+            dias_garantia_num,
+            parcelas_info,
+        )
+    except ErroGeracaoPDF as e:
+        from tkinter import messagebox
+
+        messagebox.showerror(e.titulo, str(e))
+        return None
+
+
+@instrumentar("pdf.renderizar")
+def renderizar_documento(
+    dados,
+    valor_texto,
+    total_float,
+    tipo_garantia,
+    metodo_pagamento,
+    checklist_str,
+    tipo_documento,
+    dias_garantia_num,
+    parcelas_info=None,
+    destino=None,
+):
+    """Gera o PDF e retorna o caminho. Não abre diálogos: lança ErroGeracaoPDF.
+
+    Seguro para rodar fora da thread do Tk. Sem `destino`, grava no caminho padrão
+    do documento em PASTA_OS.
+    """
 
     # 1. Tratamento de campos vazios para N/A
     for k, v in dados.items():
@@ -32,22 +303,24 @@ def gerar_documento(
             dados[k] = "N/A"
 
     try:
-        if not os.path.exists(PASTA_OS):
+        if destino is None and not os.path.exists(PASTA_OS):
             try:
                 os.makedirs(PASTA_OS, exist_ok=True)
             except OSError as e:
-                messagebox.showerror(
+                raise ErroGeracaoPDF(
                     "Erro",
                     f"Não foi possível criar a pasta de documentos:\n{PASTA_OS}\n\n"
                     f"Erro: {str(e)}\n\n"
                     f"Verifique as permissões do diretório.",
                 )
-                return None
+    except ErroGeracaoPDF:
+        raise
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao verificar/criar pasta: {str(e)}")
-        return None
+        raise ErroGeracaoPDF("Erro", f"Erro ao verificar/criar pasta: {str(e)}")
+
+    pdf_path = destino or caminho_pdf_documento(tipo_documento, dados["numero"])
 
-    pdf_path = os.path.join(PASTA_OS, f"{tipo_documento}_{dados['numero'].split('-')[1]}.pdf")
+    modelo = _modelo()
 
     doc = SimpleDocTemplate(
         pdf_path,
@@ -58,59 +331,24 @@ def gerar_documento(
         bottomMargin=1.5 * cm,
     )
 
-    styles = getSampleStyleSheet()
-    normal = styles["Normal"]
-
-    titulo_doc = "Ordem de Serviço" if tipo_documento == "OS" else "Comprovante de Venda"
-
-    titulo = Paragraph(
-        f"<b>DIPCELL<br/>{titulo_doc}</b>",
-        ParagraphStyle("t", parent=styles["Heading1"], alignment=1, fontSize=22),
-    )
-
-    if os.path.exists(LOGO_PADRAO):
-        img = Image(LOGO_PADRAO, width=120, height=120)
-    else:
-        img = Paragraph("", normal)
-
-    header = Table([[img, titulo]], colWidths=[160, 330])
-    header.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "MIDDLE")]))
+    titulo_doc = _TITULOS[tipo_documento]
 
-    story = [header, Spacer(1, 10)]
+    story = [modelo.cabecalho(tipo_documento), Spacer(1, 10)]
 
     def bloco(titulo, lista):
-        story.append(
-            Paragraph(
-                f"<b>{titulo}</b>",
-                ParagraphStyle("t2", parent=styles["Heading2"], fontSize=14),
-            )
-        )
+        story.append(modelo.titulo_secao(titulo))
 
-        rows = [[Paragraph(f"<b>{k}</b>"), Paragraph(str(v))] for k, v in lista]
+        rows = [[modelo.rotulo(k), Paragraph(str(v), modelo.estilo_padrao)] for k, v in lista]
 
         tbl = Table(rows, colWidths=[160, 330])
-        tbl.setStyle(
-            TableStyle(
-                [
-                    ("GRID", (0, 0), (-1, 0), 0.6, colors.grey),
-                    ("GRID", (0, 1), (-1, -1), 0.6, colors.grey),
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ]
-            )
-        )
+        tbl.setStyle(modelo.estilo_bloco)
 
         story.append(tbl)
         story.append(Spacer(1, 4))
 
     def bloco_checklist(titulo, checklist_str):
-        story.append(
-            Paragraph(
-                f"<b>{titulo}</b>",
-                ParagraphStyle("t2", parent=styles["Heading2"], fontSize=14),
-            )
-        )
+        story.append(modelo.titulo_secao(titulo))
 
-        rows = []
         itens = [item.split(":") for item in checklist_str.split(";") if item.strip()]
 
         NUM_COLUNAS = 3
@@ -131,35 +369,12 @@ def gerar_documento(
                 idx = i + j * num_linhas
 
                 item, status = itens_preenchidos[idx]
-
-                if item:
-                    check_char = "X" if status == "Sim" else " "
-
-                    paragrafo = Paragraph(
-                        f"<font size='8'>[{check_char}] <b>{item}</b></font>",
-                        ParagraphStyle("s", parent=normal, alignment=0, leading=8),
-                    )
-                else:
-                    paragrafo = Paragraph("", normal)
-
-                row_data.append(paragrafo)
+                row_data.append(modelo.item_checklist(item, status == "Sim"))
 
             rows.append(row_data)
 
-        col_widths = [5.66 * cm] * NUM_COLUNAS
-
-        tbl = Table(rows, colWidths=col_widths)
-        tbl.setStyle(
-            TableStyle(
-                [
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                    ("TOPPADDING", (0, 0), (-1, -1), 0.5),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 0.5),
-                ]
-            )
-        )
+        tbl = Table(rows, colWidths=[5.66 * cm] * NUM_COLUNAS)
+        tbl.setStyle(modelo.estilo_checklist)
 
         story.append(tbl)
         story.append(Spacer(1, 4))
@@ -170,12 +385,7 @@ def gerar_documento(
         except Exception:
             return
 
-        story.append(
-            Paragraph(
-                f"<b>Parcelamento (Crediário)</b>",
-                ParagraphStyle("t2", parent=styles["Heading2"], fontSize=14),
-            )
-        )
+        story.append(modelo.titulo_secao("Parcelamento (Crediário)"))
 
         # Cabeçalho da tabela
         rows = [["Parcela", "Vencimento", "Valor", "Situação"]]
@@ -188,15 +398,7 @@ def gerar_documento(
             )
 
         tbl = Table(rows, colWidths=[60, 100, 100, 230])
-        tbl.setStyle(
-            TableStyle(
-                [
-                    ("GRID", (0, 0), (-1, -1), 0.6, colors.grey),
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ]
-            )
-        )
+        tbl.setStyle(modelo.estilo_parcelas)
         story.append(tbl)
         story.append(Spacer(1, 4))
 
@@ -256,86 +458,20 @@ def gerar_documento(
     if metodo_pagamento == "PARCELADO NO CREDIÁRIO" and parcelas_info:
         bloco_parcelas(parcelas_info)
 
-    AVISO_PAGAMENTO = "NÃO SERÁ ENTREGUE O APARELHO/PRODUTO SEM ANTES ACERTAR O PAGAMENTO. "
-    dias_garantia_texto = f"{dias_garantia_num} dias" if dias_garantia_num > 0 else "legal"
-    termo_texto = ""
-
-    if tipo_documento == "OS":
-        if (
-            dados["situacao"] == "CONCLUÍDA" and tipo_garantia == "Com Garantia"
-        ):  # Condição alterada
-            termo_texto = (
-                f"<font size='8'><b>{AVISO_PAGAMENTO}</b> A garantia cobre exclusivamente o **serviço** realizado pelo período de **{dias_garantia_texto}** informado nesta OS. "
-                "Não cobre danos causados por mau uso, queda, oxidação, danos líquidos, tela quebrada ou violação do lacre. "
-                "O aparelho deve ser retirado em até 90 dias após a conclusão do serviço.</font>"
-            )
-        else:
-            termo_texto = (  # Se não for Concluída ou for Sem Garantia
-                f"<font size='8'><b>{AVISO_PAGAMENTO} SERVIÇO SEM GARANTIA!</b> Esta OS está como <b>{dados['situacao']}</b>. O cliente está ciente de que o serviço realizado "
-                "não possui cobertura de garantia devido à situação, natureza do reparo/peça ou condição do aparelho. "
-                "O aparelho deve ser retirado em até 90 dias após a conclusão do serviço.</font>"
-            )
-
-    else:
-        if (
-            dados["situacao"] == "CONCLUÍDA" and tipo_garantia == "Com Garantia"
-        ):  # Condição alterada
-            termo_texto = (
-                f"<font size='8'><b>{AVISO_PAGAMENTO}</b> A garantia de **{dias_garantia_texto}** cobre somente se o produto apresentar "
-                "problemas de fábrica e estiver com a caixa do mesmo. "
-                "A garantia **NÃO COBRE** danos por mau uso, queda, oxidação, danos líquidos ou remoção de selos de garantia.</font>"
-            )
-        else:
-            termo_texto = (  # Se não for Concluída ou for Sem Garantia
-                f"<font size='8'><b>{AVISO_PAGAMENTO} PRODUTO VENDIDO SEM GARANTIA!</b> O cliente está ciente de que este produto "
-                "não possui cobertura de garantia (Status: {dados['situacao']}).</font>"
-            )
-
-    termo = Paragraph(termo_texto, normal)
-
     story.append(Spacer(1, 3))
-    story.append(termo)
+    story.append(modelo.termo(tipo_documento, dados["situacao"], tipo_garantia, dias_garantia_num))
     story.append(Spacer(1, 3))
 
-    assinatura_tbl = Table(
-        [["__________________________________", "__________________________________"], ["Assinatura do Cliente", "Assinatura da Loja"]],
-        colWidths=[245, 245],
-    )
-
-    assinatura_tbl.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("TOPPADDING", (0, 0), (-1, -1), 8),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
-            ]
-        )
-    )
-
     story.append(Spacer(1, 2))
-    story.append(assinatura_tbl)
+    story.append(modelo.assinaturas)
     story.append(Spacer(1, 3))
 
-    def desenhar_borda(canvas, doc):
-        canvas.saveState()
-        W, H = A4
-        canvas.setStrokeColor(colors.black)
-        canvas.setLineWidth(1)
-        canvas.rect(12, 12, W - 24, H - 24)
-        canvas.setLineWidth(0.8)
-        canvas.rect(20, 20, W - 40, H - 40)
-        canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(grey)
-        canvas.drawCentredString(W / 2, 35, "DIPCELL — Sistema de OS/Vendas")
-        canvas.restoreState()
-
     try:
-        doc.build(story, onFirstPage=desenhar_borda, onLaterPages=desenhar_borda)
+        doc.build(story, onFirstPage=_desenhar_borda, onLaterPages=_desenhar_borda)
         return pdf_path
     except Exception as e:
-        messagebox.showerror(
+        raise ErroGeracaoPDF(
             "Erro ao Gerar PDF",
             f"Erro ao gerar o documento PDF:\n{str(e)}\n\n"
             f"Verifique se você tem permissões de escrita no diretório:\n{PASTA_OS}",
         )
-        return None
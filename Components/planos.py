@@ -0,0 +1,174 @@
+"""Verificação automática dos planos de consulta da camada de dados.
+
+Executa cada função de leitura e escrita (database, relatorios, recebiveis)
+numa base temporária, captura o SQL realmente enviado ao SQLite e confere com
+EXPLAIN QUERY PLAN que nenhuma consulta percorre uma tabela inteira. A única
+varredura aceita é a leitura em ordem de id com LIMIT (Lista sem busca).
+
+Uso:
+    python -m Components.planos                    # base vazia com o esquema atual
+    python -m Components.planos --banco os_dipcell.db  # cópia de uma base real (com estatísticas)
+
+Sai com código 1 se alguma consulta não usar índice.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from itertools import islice
+
+from . import database
+from .database import (
+    count_documents, criar_banco, delete_document, fechar_conexoes, fetch_document,
+    find_page_anchor, get_next_document_number, insert_document, iterar_documentos,
+    list_documents, list_documents_page, obter_conexao, update_arquivos, update_document
+)
+from .recebiveis import (
+    listar_parcelas_vencidas, listar_recebiveis, marcar_parcela_paga, parcelas_do_documento
+)
+from .relatorios import resumo_financeiro
+
+# Comandos que não são consultas a tabelas ("-- TRIGGER x" marca o início de um gatilho)
+_IGNORAR = re.compile(r"^\s*(--|(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|CREATE|DROP|ANALYZE)\b)", re.I)
+# Comandos internos do FTS5 nas suas tabelas de apoio ('main'.'os_fts_config' etc.)
+_INTERNO_FTS = re.compile(r"'main'\.'os_fts_")
+# Leitura em ordem de id com LIMIT: percorre só as linhas devolvidas
+_ORDEM_POR_ID = re.compile(r"ORDER BY (os\.)?(id|rowid)\b[^;]*\bLIMIT\b", re.I)
+
+_DOCUMENTO = {
+    "cliente": "Maria Silva", "telefone": "(11) 99999-0000", "modelo": "Galaxy A12",
+    "imei": "356938035643809", "senha": "", "acessorios": "", "problemas": "Tela quebrada",
+    "situacao": "EM ABERTO", "valor": "150,00", "entrada": "10/03/2025", "saida": "",
+    "garantia": "08/06/2025", "tipo_garantia": "Com Garantia", "metodo_pagamento": "PIX",
+    "checklist": "", "dias_garantia": 90, "tipo_documento": "OS",
+}
+_PARCELAS = (
+    '[{"numero": 1, "vencimento": "10/04/2025", "valor": "100,00", "status": "N/PG"},'
+    ' {"numero": 2, "vencimento": "10/05/2025", "valor": "100,00", "status": "N/PG"}]'
+)
+
+
+def _operacoes():
+    """(nome, função) de cada operação da camada de dados, na ordem em que são executadas."""
+    venda = dict(_DOCUMENTO, tipo_documento="VENDA", metodo_pagamento="PARCELADO NO CREDIÁRIO",
+                 valor="200,00", parcelas=2, detalhes_parcelas=_PARCELAS)
+    numeros = {}
+
+    def inserir():
+        numeros["OS"] = insert_document(_DOCUMENTO)
+        numeros["VENDA"] = insert_document(venda)
+
+    return [
+        ("insert_document", inserir),
+        ("get_next_document_number", lambda: get_next_document_number("OS")),
+        ("fetch_document", lambda: (database.invalidar_caches(), fetch_document(numeros["OS"], "OS"))),
+        ("update_document", lambda: update_document(numeros["OS"], "OS", {"situacao": "CONCLUÍDA", "valor": "180,00"})),
+        ("update_document (versão)", lambda: update_document(numeros["OS"], "OS", {"situacao": "EM ABERTO"}, versao=2)),
+        ("update_document (parcelas)", lambda: update_document(numeros["VENDA"], "VENDA", {"detalhes_parcelas": _PARCELAS})),
+        ("count_documents", lambda: (database.invalidar_caches(), count_documents(""))),
+        ("count_documents (busca)", lambda: (database.invalidar_caches(), count_documents("silva"))),
+        ("list_documents", lambda: list_documents("", 50, 0)),
+        ("list_documents (busca)", lambda: list_documents("galaxy", 50, 0)),
+        ("list_documents_page", lambda: list_documents_page("", 50, after_id=10)),
+        ("list_documents_page (busca)", lambda: list_documents_page("maria", 50, from_id=1)),
+        ("find_page_anchor", lambda: find_page_anchor("", 1)),
+        ("find_page_anchor (busca)", lambda: find_page_anchor("tela", 1, after_id=10)),
+        # Dois lotes: o primeiro e um a partir do cursor
+        ("iterar_documentos", lambda: list(islice(iterar_documentos("", lote=1), 2))),
+        ("iterar_documentos (busca)", lambda: list(islice(iterar_documentos("maria", lote=1, decrescente=True), 2))),
+        ("update_arquivos", lambda: update_arquivos([(1, "a.pdf")])),
+        ("resumo_financeiro", lambda: resumo_financeiro("01/01/2025", "31/12/2025")),
+        ("listar_recebiveis", lambda: listar_recebiveis("01/01/2025", "31/12/2025")),
+        ("listar_recebiveis (todas)", lambda: listar_recebiveis("01/01/2025", "31/12/2025", False)),
+        ("listar_parcelas_vencidas", lambda: listar_parcelas_vencidas("01/06/2025")),
+        ("parcelas_do_documento", lambda: parcelas_do_documento(numeros["VENDA"], "VENDA")),
+        ("marcar_parcela_paga", lambda: marcar_parcela_paga(numeros["VENDA"], "VENDA", 1, "15/04/2025")),
+        ("delete_document", lambda: delete_document(numeros["VENDA"], "VENDA")),
+    ]
+
+
+def _analisar(sql, plano):
+    problemas, avisos = [], []
+    for detalhe in plano:
+        if detalhe.startswith("SCAN ") and " USING " not in detalhe \
+                and "VIRTUAL TABLE" not in detalhe and "CONSTANT ROW" not in detalhe:
+            if not _ORDEM_POR_ID.search(sql):
+                problemas.append(f"varredura completa: {detalhe}")
+        elif "TEMP B-TREE" in detalhe:
+            avisos.append(detalhe)
+    return problemas, avisos
+
+
+def verificar_planos(caminho_base=None):
+    """Executa as operações numa base temporária e retorna um dict por comando SQL capturado.
+
+    Cada dict tem operacao, sql, plano (linhas do EXPLAIN QUERY PLAN), problemas e avisos.
+    `caminho_base`, se dado, é copiado para a base temporária (o original não é alterado).
+    """
+    caminho_anterior = database.DB_NAME
+    pasta = tempfile.mkdtemp(prefix="planos_")
+    caminho = os.path.join(pasta, "planos.db")
+    if caminho_base:
+        shutil.copyfile(caminho_base, caminho)
+
+    capturados = []
+    try:
+        database.definir_caminho_banco(caminho)
+        criar_banco()
+        conn = obter_conexao()
+        for nome, operacao in _operacoes():
+            conn.set_trace_callback(lambda sql, nome=nome: capturados.append((nome, sql)))
+            try:
+                operacao()
+            finally:
+                conn.set_trace_callback(None)
+
+        resultado = []
+        vistos = set()
+        for nome, sql in capturados:
+            if _IGNORAR.match(sql) or _INTERNO_FTS.search(sql) or "sqlite_master" in sql \
+                    or (nome, sql) in vistos:
+                continue
+            vistos.add((nome, sql))
+            plano = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+            problemas, avisos = _analisar(sql, plano)
+            resultado.append({
+                "operacao": nome, "sql": " ".join(sql.split()), "plano": plano,
+                "problemas": problemas, "avisos": avisos,
+            })
+        return resultado
+    finally:
+        database.definir_caminho_banco(caminho_anterior)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere se as consultas da camada de dados usam índices.")
+    parser.add_argument("--banco", help="Verificar com uma cópia desta base (estatísticas reais).")
+    parser.add_argument("--detalhes", action="store_true", help="Mostrar o plano de todas as consultas.")
+    args = parser.parse_args(argv)
+
+    try:
+        resultado = verificar_planos(args.banco)
+    finally:
+        fechar_conexoes()
+
+    falhas = 0
+    for item in resultado:
+        if item["problemas"]:
+            falhas += 1
+        if item["problemas"] or item["avisos"] or args.detalhes:
+            marca = "FALHA" if item["problemas"] else ("aviso" if item["avisos"] else "ok")
+            print(f"[{marca}] {item['operacao']}: {item['sql'][:150]}")
+            for linha in item["plano"]:
+                print(f"    {linha}")
+
+    print(f"{len(resultado)} consultas verificadas, {falhas} sem índice.")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
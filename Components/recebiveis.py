@@ -0,0 +1,114 @@
+import json
+from datetime import date, datetime
+
+from .database import invalidar_caches, obter_conexao
+from .relatorios import SITUACAO_CANCELADA
+from .utils import data_iso_para_br, normalizar_data_iso
+
+_CONSULTA_PARCELAS = """
+    SELECT os.tipo_documento, os.numero, os.cliente, os.telefone,
+           p.numero AS parcela, p.vencimento_iso, p.valor_centavos,
+           p.pago, p.data_pagamento_iso
+    FROM parcelas p JOIN os ON os.id = p.documento_id
+"""
+
+
+def _linha_parcela(row):
+    return {
+        "tipo_documento": row["tipo_documento"],
+        "numero": row["numero"],
+        "cliente": row["cliente"],
+        "telefone": row["telefone"],
+        "parcela": row["parcela"],
+        "vencimento": data_iso_para_br(row["vencimento_iso"]),
+        "valor_centavos": row["valor_centavos"],
+        "pago": bool(row["pago"]),
+        "data_pagamento": data_iso_para_br(row["data_pagamento_iso"]),
+    }
+
+
+def listar_recebiveis(inicio, fim, somente_abertas=True):
+    """Parcelas com vencimento entre `inicio` e `fim` (inclusive), ordenadas por vencimento."""
+    inicio_iso, fim_iso = normalizar_data_iso(inicio), normalizar_data_iso(fim)
+    # Parcelas de documentos cancelados não são recebíveis (como em relatorios._crediario_aberto)
+    if somente_abertas:
+        rows = obter_conexao().execute(
+            _CONSULTA_PARCELAS
+            + " WHERE p.pago = 0 AND p.vencimento_iso BETWEEN ? AND ? AND os.situacao <> ?"
+            " ORDER BY p.vencimento_iso, os.id, p.numero",
+            (inicio_iso, fim_iso, SITUACAO_CANCELADA),
+        )
+    else:
+        rows = obter_conexao().execute(
+            _CONSULTA_PARCELAS
+            + " WHERE p.vencimento_iso BETWEEN ? AND ? AND os.situacao <> ?"
+            " ORDER BY p.vencimento_iso, os.id, p.numero",
+            (inicio_iso, fim_iso, SITUACAO_CANCELADA),
+        )
+    return [_linha_parcela(row) for row in rows]
+
+
+def listar_parcelas_vencidas(referencia=None):
+    """Parcelas não pagas com vencimento anterior a `referencia` (padrão: hoje), fora de documentos cancelados."""
+    referencia_iso = normalizar_data_iso(referencia or date.today())
+    rows = obter_conexao().execute(
+        _CONSULTA_PARCELAS
+        + " WHERE p.pago = 0 AND p.vencimento_iso < ? AND os.situacao <> ?"
+        " ORDER BY p.vencimento_iso, os.id, p.numero",
+        (referencia_iso, SITUACAO_CANCELADA),
+    )
+    return [_linha_parcela(row) for row in rows]
+
+
+def parcelas_do_documento(numero, tipo_documento):
+    rows = obter_conexao().execute(
+        _CONSULTA_PARCELAS + " WHERE os.numero = ? AND os.tipo_documento = ? ORDER BY p.numero",
+        (numero, tipo_documento),
+    )
+    return [_linha_parcela(row) for row in rows]
+
+
+def _detalhes_com_status(detalhes_parcelas, parcela, pago):
+    """detalhes_parcelas com o status da parcela trocado ("PG" ou "N/PG", como grava a interface)."""
+    try:
+        lista = json.loads(detalhes_parcelas) if detalhes_parcelas else []
+    except ValueError:
+        return detalhes_parcelas
+    for p in lista:
+        if str(p.get("numero")) == str(parcela):
+            p["status"] = "PG" if pago else "N/PG"
+    return json.dumps(lista)
+
+
+def marcar_parcela_paga(numero, tipo_documento, parcela, data_pagamento=None, pago=True):
+    """Marca (ou desmarca, com pago=False) o pagamento de uma parcela.
+
+    Na mesma transação atualiza o detalhes_parcelas do documento (usado pelo PDF e
+    pela edição) e incrementa a versão do documento. Retorna False se a parcela não existir.
+    """
+    data_iso = normalizar_data_iso(data_pagamento or date.today()) if pago else None
+    conn = obter_conexao()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        documento = conn.execute(
+            "SELECT id, detalhes_parcelas FROM os WHERE numero = ? AND tipo_documento = ?",
+            (numero, tipo_documento),
+        ).fetchone()
+        if documento is None:
+            return False
+        cur = conn.execute(
+            "UPDATE parcelas SET pago = ?, data_pagamento_iso = ? WHERE documento_id = ? AND numero = ?",
+            (1 if pago else 0, data_iso, documento["id"], parcela),
+        )
+        if cur.rowcount != 1:
+            return False
+        conn.execute(
+            "UPDATE os SET detalhes_parcelas = ?, versao = versao + 1, atualizado_em = ? WHERE id = ?",
+            (
+                _detalhes_com_status(documento["detalhes_parcelas"], parcela, pago),
+                datetime.now().isoformat(timespec="seconds"),
+                documento["id"],
+            ),
+        )
+    invalidar_caches()
+    return True
@@ -0,0 +1,151 @@
+"""Regeração em massa dos PDFs a partir da tabela os.
+
+Uso:
+    python -m Components.regerar                 # todos os documentos
+    python -m Components.regerar --busca samsung # só o resultado de uma busca
+    python -m Components.regerar --retomar       # continua uma execução interrompida
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from itertools import islice
+
+from .config import APP_DIR
+from .database import count_documents, criar_banco, fechar_conexoes, iterar_documentos, update_arquivos
+
+ARQUIVO_PROGRESSO = os.path.join(APP_DIR, "regeracao_pdf.json")
+SALVAR_PROGRESSO_A_CADA = 200
+
+
+def _renderizar_registro(registro):
+    """Executada nos processos de trabalho. Retorna (id, caminho, erro)."""
+    from .pdf_generator import argumentos_de_registro, renderizar_documento
+
+    try:
+        return registro["id"], renderizar_documento(*argumentos_de_registro(registro)), None
+    except Exception as e:
+        return registro["id"], None, f"{registro.get('tipo_documento')} {registro.get('numero')}: {e}"
+
+
+def _ler_progresso():
+    try:
+        with open(ARQUIVO_PROGRESSO, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _salvar_progresso(progresso):
+    temp = ARQUIVO_PROGRESSO + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(progresso, f)
+    os.replace(temp, ARQUIVO_PROGRESSO)
+
+
+def regerar_documentos(search="", processos=None, retomar=False, ao_progredir=None):
+    """Regera os PDFs de todos os documentos da busca usando um pool de processos.
+
+    O progresso (último id concluído em ordem) é gravado em ARQUIVO_PROGRESSO, então
+    uma execução interrompida pode ser retomada com `retomar=True`.
+    `ao_progredir(processados, total, erros)` é chamado periodicamente.
+    Retorna um dict com o resumo (total, erros, segundos, por_segundo, falhas).
+    """
+    search = (search or "").strip()
+    progresso = {"busca": search, "ultimo_id": None, "processados": 0, "erros": 0}
+
+    if retomar:
+        anterior = _ler_progresso()
+        if anterior and anterior.get("busca") == search:
+            progresso = anterior
+        elif anterior:
+            raise ValueError(
+                f"O progresso salvo é da busca '{anterior.get('busca')}', não de '{search}'."
+            )
+
+    total = count_documents(search)
+    processos = processos or os.cpu_count() or 1
+    falhas = []
+    caminhos = []
+    inicio = time.perf_counter()
+    feitos_agora = 0
+
+    registros = iterar_documentos(search, after_id=progresso["ultimo_id"])
+
+    with multiprocessing.Pool(processos) as pool:
+        # Lotes lidos na thread principal: o cursor fica nesta thread e só um lote por vez
+        # fica em memória. O progresso só avança com o lote inteiro concluído, então a
+        # ordem dos resultados dentro dele não importa para retomar
+        for lote in iter(lambda: list(islice(registros, SALVAR_PROGRESSO_A_CADA)), []):
+            for id_registro, caminho, erro in pool.imap_unordered(_renderizar_registro, lote, chunksize=8):
+                if erro:
+                    progresso["erros"] += 1
+                    falhas.append(erro)
+                else:
+                    caminhos.append((id_registro, caminho))
+
+            feitos_agora += len(lote)
+            progresso["processados"] += len(lote)
+            progresso["ultimo_id"] = lote[-1]["id"]
+            update_arquivos(caminhos)
+            caminhos = []
+            _salvar_progresso(progresso)
+            if ao_progredir:
+                ao_progredir(progresso["processados"], total, progresso["erros"])
+
+    if os.path.exists(ARQUIVO_PROGRESSO):
+        os.remove(ARQUIVO_PROGRESSO)
+
+    segundos = time.perf_counter() - inicio
+    if ao_progredir:
+        ao_progredir(progresso["processados"], total, progresso["erros"])
+
+    return {
+        "total": progresso["processados"],
+        "nesta_execucao": feitos_agora,
+        "erros": progresso["erros"],
+        "segundos": segundos,
+        "por_segundo": feitos_agora / segundos if segundos > 0 else 0.0,
+        "processos": processos,
+        "falhas": falhas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regera os PDFs dos documentos salvos.")
+    parser.add_argument("--busca", default="", help="Regerar apenas o resultado desta busca.")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos (padrão: nº de CPUs).")
+    parser.add_argument("--retomar", action="store_true", help="Continuar uma execução interrompida.")
+    args = parser.parse_args(argv)
+
+    def mostrar(processados, total, erros):
+        print(f"\r{processados}/{total} documentos ({erros} erros)", end="", flush=True)
+
+    criar_banco()
+    try:
+        resumo = regerar_documentos(args.busca, args.processos, args.retomar, mostrar)
+    except KeyboardInterrupt:
+        print("\nInterrompido. Use --retomar para continuar de onde parou.")
+        return 130
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 2
+    finally:
+        fechar_conexoes()
+
+    print()
+    for falha in resumo["falhas"]:
+        print(f"Falha: {falha}")
+    print(
+        f"{resumo['nesta_execucao']} PDFs em {resumo['segundos']:.1f}s "
+        f"({resumo['por_segundo']:.1f}/s, {resumo['processos']} processos), {resumo['erros']} erros."
+    )
+    return 1 if resumo["erros"] else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
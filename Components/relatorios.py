@@ -0,0 +1,94 @@
+from .database import obter_conexao
+from .metricas import instrumentar
+from .utils import normalizar_data_iso
+
+SITUACAO_CANCELADA = "CANCELADA"
+
+# Só documentos concluídos entram na receita: EM ABERTO, EM ANDAMENTO e NÃO PAGO
+# ainda não são dinheiro recebido, e CANCELADA nunca será
+SITUACOES_RECEITA = frozenset({"CONCLUÍDA"})
+
+
+@instrumentar("relatorio.resumo_financeiro")
+def resumo_financeiro(inicio, fim):
+    """Resumo financeiro dos documentos com entrada entre `inicio` e `fim` (inclusive).
+
+    Tudo é agregado no SQL sobre as colunas tipadas (valor_centavos, entrada_iso),
+    usando o índice idx_resumo_financeiro sem ler as linhas da tabela.
+    Todos os documentos contam em `por_situacao`; receita, quantidade, ticket médio e
+    `por_pagamento` só consideram as SITUACOES_RECEITA.
+
+    Retorna um dict com:
+        receita_centavos, quantidade, ticket_medio_centavos,
+        por_pagamento: lista de dicts (tipo_documento, metodo_pagamento, quantidade, receita_centavos),
+        por_situacao: {situacao: quantidade},
+        crediario_aberto_centavos, crediario_parcelas_abertas
+    """
+    inicio_iso, fim_iso = normalizar_data_iso(inicio), normalizar_data_iso(fim)
+    conn = obter_conexao()
+
+    grupos = conn.execute(
+        """
+        SELECT tipo_documento, metodo_pagamento, situacao,
+               COUNT(*), COALESCE(SUM(valor_centavos), 0)
+        FROM os
+        WHERE entrada_iso BETWEEN ? AND ?
+        GROUP BY tipo_documento, metodo_pagamento, situacao
+        """,
+        (inicio_iso, fim_iso),
+    ).fetchall()
+
+    receita = 0
+    quantidade = 0
+    por_pagamento = {}
+    por_situacao = {}
+
+    for tipo_documento, metodo_pagamento, situacao, qtd, soma in grupos:
+        por_situacao[situacao] = por_situacao.get(situacao, 0) + qtd
+        if situacao not in SITUACOES_RECEITA:
+            continue
+        receita += soma
+        quantidade += qtd
+        chave = (tipo_documento, metodo_pagamento)
+        item = por_pagamento.setdefault(
+            chave,
+            {
+                "tipo_documento": tipo_documento,
+                "metodo_pagamento": metodo_pagamento,
+                "quantidade": 0,
+                "receita_centavos": 0,
+            },
+        )
+        item["quantidade"] += qtd
+        item["receita_centavos"] += soma
+
+    aberto_centavos, parcelas_abertas = _crediario_aberto(conn, inicio_iso, fim_iso)
+
+    return {
+        "inicio": inicio_iso,
+        "fim": fim_iso,
+        "receita_centavos": receita,
+        "quantidade": quantidade,
+        "ticket_medio_centavos": receita // quantidade if quantidade else 0,
+        "por_pagamento": sorted(
+            por_pagamento.values(), key=lambda i: i["receita_centavos"], reverse=True
+        ),
+        "por_situacao": por_situacao,
+        "crediario_aberto_centavos": aberto_centavos,
+        "crediario_parcelas_abertas": parcelas_abertas,
+    }
+
+
+def _crediario_aberto(conn, inicio_iso, fim_iso):
+    """Soma das parcelas não pagas dos crediários com entrada no período."""
+    row = conn.execute(
+        """
+        SELECT COALESCE(SUM(p.valor_centavos), 0), COUNT(*)
+        FROM os JOIN parcelas p ON p.documento_id = os.id
+        WHERE os.entrada_iso BETWEEN ? AND ?
+          AND os.situacao <> ?
+          AND p.pago = 0
+        """,
+        (inicio_iso, fim_iso, SITUACAO_CANCELADA),
+    ).fetchone()
+    return row[0], row[1]
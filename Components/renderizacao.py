@@ -0,0 +1,68 @@
+import queue
+import threading
+
+# Situação do PDF exibida na coluna "PDF" da Lista
+STATUS_PENDENTE = "Gerando..."
+STATUS_ERRO = "Erro"
+
+
+class FilaRenderizacao:
+    """Gera PDFs em uma thread de trabalho, fora da thread do Tk.
+
+    O registro já está salvo no banco quando o pedido entra na fila; aqui só o
+    PDF é produzido. `ao_concluir(caminho)` e `ao_falhar(erro)` são chamados na
+    thread do Tk através do despachante. O pdf_generator (e com ele o ReportLab)
+    só é importado no primeiro pedido, para não atrasar a abertura do programa.
+    """
+
+    def __init__(self, despachante):
+        self.despachante = despachante
+        self._fila = queue.Queue()
+        self._status = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._trabalhar, name="renderizacao-pdf", daemon=True).start()
+
+    def enviar(self, tipo_documento, numero, args, ao_concluir=None, ao_falhar=None, funcao=None):
+        """Enfileira `renderizar_documento(*args)` para o documento (tipo_documento, numero).
+
+        `funcao` substitui renderizar_documento (ex.: cache_pdf.obter_pdf); deve retornar o caminho.
+        """
+        with self._lock:
+            self._status[(tipo_documento, numero)] = STATUS_PENDENTE
+        self._fila.put((tipo_documento, numero, args, ao_concluir, ao_falhar, funcao))
+
+    def status(self, tipo_documento, numero):
+        """STATUS_PENDENTE, STATUS_ERRO ou None (nenhuma renderização em andamento)."""
+        with self._lock:
+            return self._status.get((tipo_documento, numero))
+
+    def pendentes(self):
+        with self._lock:
+            return sum(1 for s in self._status.values() if s == STATUS_PENDENTE)
+
+    def _trabalhar(self):
+        while True:
+            tipo_documento, numero, args, ao_concluir, ao_falhar, funcao = self._fila.get()
+            chave = (tipo_documento, numero)
+            try:
+                if funcao is None:
+                    from .pdf_generator import renderizar_documento as funcao
+                caminho = funcao(*args)
+            except Exception as e:
+                with self._lock:
+                    # Um pedido mais novo na fila continua pendente e pode dar certo
+                    if not self._tem_outro(chave):
+                        self._status[chave] = STATUS_ERRO
+                if ao_falhar:
+                    self.despachante.enviar(ao_falhar, e)
+            else:
+                with self._lock:
+                    # Outro pedido do mesmo documento pode ter entrado enquanto este rodava
+                    if self._status.get(chave) == STATUS_PENDENTE and not self._tem_outro(chave):
+                        del self._status[chave]
+                if ao_concluir:
+                    self.despachante.enviar(ao_concluir, caminho)
+
+    def _tem_outro(self, chave):
+        with self._fila.mutex:
+            return any((item[0], item[1]) == chave for item in self._fila.queue)
@@ -0,0 +1,343 @@
+"""Servidor HTTP local que centraliza o banco para vários terminais.
+
+Uso:
+    python -m Components.servidor --host 0.0.0.0     # aceita os outros terminais da rede
+    python -m Components.servidor --porta 9000 --banco D:\\dados\\os_dipcell.db
+
+Sem --host, só aceita conexões do próprio computador (127.0.0.1).
+
+Nos terminais, defina DIPCELL_SERVIDOR=http://<ip do servidor>:8765 antes de abrir
+o programa (ver Components.backend). Só este processo abre o arquivo do banco: as
+gravações são feitas uma de cada vez, com WAL e conexões reaproveitadas por um
+número fixo de threads, em vez de vários computadores disputando travas do
+arquivo numa pasta de rede. Não há autenticação: use apenas na rede da loja.
+
+Rotas (JSON):
+    GET    /saude
+    GET    /documentos?busca=&limite=&offset=          list_documents
+    GET    /documentos/total?busca=                    count_documents
+    GET    /documentos/pagina?busca=&limite=&after_id=&from_id=
+    GET    /documentos/ancora?busca=&pular=&after_id=
+    GET    /documentos/lote?busca=&after_id=&lote=&decrescente=
+    POST   /documentos                                 insert_document
+    GET    /documentos/<tipo>/<numero>                 fetch_document
+    PATCH  /documentos/<tipo>/<numero>?versao=         update_document (409 em conflito)
+    DELETE /documentos/<tipo>/<numero>                 delete_document
+    GET    /numeracao/<tipo>                           get_next_document_number
+    GET    /resumo?inicio=&fim=                        resumo_financeiro
+
+Toda resposta traz o cabeçalho X-Versao-Dados (instância:versão), usado pelos
+clientes para descartar caches quando outro terminal grava.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from . import database
+from .backup import AgendadorBackup
+from .database import (
+    CAMPOS_EDITAVEIS, ConflitoEdicao, ErroBanco, count_documents, criar_banco, delete_document, fechar_conexoes, fetch_document,
+    find_page_anchor, get_next_document_number, insert_document, iterar_documentos,
+    list_documents, list_documents_page, update_document, versao_dados
+)
+from .migracoes import VERSAO_ESQUEMA
+from .relatorios import resumo_financeiro
+
+PORTA_PADRAO = 8765
+TRABALHADORES = 16
+TEMPO_OCIOSO_S = 30  # Conexões keep-alive paradas por mais tempo são fechadas
+MAX_CORPO = 1024 * 1024
+
+# Identifica esta execução do servidor: a versão dos dados recomeça do zero a cada início
+INSTANCIA = uuid.uuid4().hex[:8]
+
+# Uma gravação por vez: o SQLite só aceita um escritor, e esperar aqui é mais barato
+# que esperar pelo busy_timeout
+_escrita = threading.Lock()
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _inteiro(consulta, nome, padrao=None):
+    valor = consulta.get(nome)
+    if valor in (None, ""):
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErroRequisicao(400, f"Parâmetro '{nome}' deve ser um número inteiro.") from None
+
+
+# ==========================================================
+# ROTAS
+# ==========================================================
+
+def _saude(parametros, consulta, corpo):
+    return 200, {"versao_esquema": VERSAO_ESQUEMA, "instancia": INSTANCIA}
+
+
+def _listar(parametros, consulta, corpo):
+    rows, total = list_documents(
+        consulta.get("busca", ""), _inteiro(consulta, "limite", 50), _inteiro(consulta, "offset", 0)
+    )
+    return 200, {"linhas": rows, "total": total}
+
+
+def _total(parametros, consulta, corpo):
+    return 200, {"total": count_documents(consulta.get("busca", ""))}
+
+
+def _pagina(parametros, consulta, corpo):
+    rows = list_documents_page(
+        consulta.get("busca", ""), _inteiro(consulta, "limite", 50),
+        after_id=_inteiro(consulta, "after_id"), from_id=_inteiro(consulta, "from_id"),
+    )
+    return 200, {"linhas": rows}
+
+
+def _ancora(parametros, consulta, corpo):
+    cursor = find_page_anchor(
+        consulta.get("busca", ""), _inteiro(consulta, "pular", 0), after_id=_inteiro(consulta, "after_id")
+    )
+    return 200, {"id": cursor}
+
+
+def _lote(parametros, consulta, corpo):
+    # Um lote keyset de iterar_documentos; o cliente continua a partir do último id
+    lote = _inteiro(consulta, "lote", 1000)
+    rows = list(islice(
+        iterar_documentos(
+            consulta.get("busca", ""), after_id=_inteiro(consulta, "after_id"), lote=lote,
+            decrescente=consulta.get("decrescente") == "1",
+        ),
+        lote,
+    ))
+    return 200, {"linhas": rows}
+
+
+def _exigir_campos(campos, permitidos):
+    """Os nomes dos campos viram colunas no SQL: só os do formulário são aceitos."""
+    desconhecidos = set(campos) - set(permitidos)
+    if desconhecidos:
+        raise ErroRequisicao(400, f"Campos não permitidos: {', '.join(sorted(desconhecidos))}")
+
+
+def _inserir(parametros, consulta, corpo):
+    if not isinstance(corpo, dict) or not isinstance(corpo.get("dados"), dict):
+        raise ErroRequisicao(400, "Corpo deve ter o objeto 'dados'.")
+    _exigir_campos(corpo["dados"], CAMPOS_EDITAVEIS + ("tipo_documento",))
+    with _escrita:
+        numero = insert_document(corpo["dados"], corpo.get("caminho_pdf"))
+    return 201, {"numero": numero}
+
+
+def _buscar(parametros, consulta, corpo):
+    tipo_documento, numero = parametros
+    registro = fetch_document(numero, tipo_documento)
+    if registro is None:
+        raise ErroRequisicao(404, f"Documento {numero} não encontrado.")
+    return 200, registro
+
+
+def _atualizar(parametros, consulta, corpo):
+    tipo_documento, numero = parametros
+    if not isinstance(corpo, dict):
+        raise ErroRequisicao(400, "Corpo deve ser um objeto com os campos a alterar.")
+    _exigir_campos(corpo, CAMPOS_EDITAVEIS)
+    with _escrita:
+        versao = update_document(numero, tipo_documento, corpo, versao=_inteiro(consulta, "versao"))
+    return 200, {"versao": versao}
+
+
+def _excluir(parametros, consulta, corpo):
+    tipo_documento, numero = parametros
+    with _escrita:
+        delete_document(numero, tipo_documento)
+    return 200, {}
+
+
+def _proximo_numero(parametros, consulta, corpo):
+    return 200, {"numero": get_next_document_number(parametros[0])}
+
+
+def _resumo(parametros, consulta, corpo):
+    return 200, resumo_financeiro(consulta.get("inicio", ""), consulta.get("fim", ""))
+
+
+# (método, caminho) -> função. "*" é um segmento variável, passado em `parametros`.
+_ROTAS = {
+    ("GET", ("saude",)): _saude,
+    ("GET", ("documentos",)): _listar,
+    ("GET", ("documentos", "total")): _total,
+    ("GET", ("documentos", "pagina")): _pagina,
+    ("GET", ("documentos", "ancora")): _ancora,
+    ("GET", ("documentos", "lote")): _lote,
+    ("POST", ("documentos",)): _inserir,
+    ("GET", ("documentos", "*", "*")): _buscar,
+    ("PATCH", ("documentos", "*", "*")): _atualizar,
+    ("DELETE", ("documentos", "*", "*")): _excluir,
+    ("GET", ("numeracao", "*")): _proximo_numero,
+    ("GET", ("resumo",)): _resumo,
+}
+
+
+def _rota(metodo, partes):
+    """(função, parametros) da rota, ou (None, None)."""
+    funcao = _ROTAS.get((metodo, partes))
+    if funcao:
+        return funcao, []
+    for (metodo_rota, padrao), funcao in _ROTAS.items():
+        if metodo_rota == metodo and len(padrao) == len(partes) and "*" in padrao \
+                and all(p == "*" or p == s for p, s in zip(padrao, partes)):
+            return funcao, [s for p, s in zip(padrao, partes) if p == "*"]
+    return None, None
+
+
+# ==========================================================
+# HTTP
+# ==========================================================
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: cada terminal reaproveita a conexão
+    timeout = TEMPO_OCIOSO_S
+    server_version = "DipcellServidor"
+    # Cabeçalho e corpo saem em escritas separadas: sem isso o Nagle segura o corpo
+    # até o ACK atrasado do cliente (~40 ms por requisição)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def do_PATCH(self):
+        self._atender("PATCH")
+
+    def do_DELETE(self):
+        self._atender("DELETE")
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > MAX_CORPO:
+            raise ErroRequisicao(413, "Corpo da requisição muito grande.")
+        if not tamanho:
+            return None
+        try:
+            return json.loads(self.rfile.read(tamanho))
+        except ValueError:
+            raise ErroRequisicao(400, "Corpo não é um JSON válido.") from None
+
+    def _atender(self, metodo):
+        url = urlsplit(self.path)
+        partes = tuple(unquote(p) for p in url.path.split("/") if p)
+        consulta = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        try:
+            corpo = self._ler_corpo()
+            funcao, parametros = _rota(metodo, partes)
+            if funcao is None:
+                raise ErroRequisicao(404, f"Rota inexistente: {metodo} {url.path}")
+            status, resposta = funcao(parametros, consulta, corpo)
+        except ErroRequisicao as e:
+            status, resposta = e.status, {"erro": str(e)}
+        except ConflitoEdicao as e:
+            status, resposta = 409, {"erro": str(e), "conflito": {
+                "numero": e.numero, "tipo_documento": e.tipo_documento, "atual": e.atual,
+            }}
+        except sqlite3.IntegrityError as e:
+            status, resposta = 409, {"erro": str(e)}
+        except ValueError as e:
+            status, resposta = 400, {"erro": str(e)}
+        except Exception as e:
+            self.log_error("Erro em %s %s: %r", metodo, self.path, e)
+            status, resposta = 500, {"erro": f"Erro interno do servidor: {e}"}
+        self._responder(status, resposta)
+
+    def _responder(self, status, resposta):
+        conteudo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.send_header("X-Versao-Dados", f"{INSTANCIA}:{versao_dados()}")
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+
+class ServidorDocumentos(ThreadingHTTPServer):
+    """Atende as conexões num conjunto fixo de threads.
+
+    Cada thread mantém a sua conexão SQLite (database.obter_conexao) durante toda
+    a execução, com o cache de páginas e de statements aquecido.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, endereco, trabalhadores=TRABALHADORES, verboso=False):
+        super().__init__(endereco, _Manipulador)
+        self.verboso = verboso
+        self._trabalhadores = ThreadPoolExecutor(trabalhadores, thread_name_prefix="servidor")
+
+    def process_request(self, request, client_address):
+        self._trabalhadores.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._trabalhadores.shutdown(wait=False, cancel_futures=True)
+
+
+def criar_servidor(host="127.0.0.1", porta=PORTA_PADRAO, trabalhadores=TRABALHADORES, verboso=False):
+    """Servidor pronto para serve_forever(). Com porta 0 o sistema escolhe uma porta livre."""
+    return ServidorDocumentos((host, porta), trabalhadores, verboso)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve o banco de documentos para os outros terminais.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Endereço de escuta (padrão: só este computador; 0.0.0.0 para a rede da loja).")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--banco", help="Arquivo do banco (padrão: o mesmo da interface).")
+    parser.add_argument("--trabalhadores", type=int, default=TRABALHADORES, help="Threads de atendimento.")
+    parser.add_argument("--verboso", action="store_true", help="Registrar cada requisição.")
+    args = parser.parse_args(argv)
+
+    if args.banco:
+        database.definir_caminho_banco(args.banco)
+    try:
+        criar_banco()
+    except ErroBanco as e:
+        print(f"{e.titulo}: {e}")
+        return 1
+
+    servidor = criar_servidor(args.host, args.porta, args.trabalhadores, args.verboso)
+    backup = AgendadorBackup()
+    backup.iniciar()
+    print(f"Servindo {database.DB_NAME} em http://{args.host}:{servidor.server_address[1]} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando.")
+    finally:
+        backup.parar()
+        servidor.server_close()
+        fechar_conexoes()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import queue
+import threading
+import tkinter as tk
+
+
+class DespachanteTk:
+    """Entrega callbacks vindos de threads de trabalho para a thread do Tk.
+
+    O Tk não é thread-safe: as threads só colocam (callback, args) numa fila e
+    a thread principal esvazia essa fila periodicamente via `after()`.
+    """
+
+    def __init__(self, master, intervalo_ms=30):
+        self.master = master
+        self.intervalo_ms = intervalo_ms
+        self._fila = queue.Queue()
+        self._agendar()
+
+    def enviar(self, callback, *args):
+        """Agenda `callback(*args)` na thread do Tk. Pode ser chamado de qualquer thread."""
+        self._fila.put((callback, args))
+
+    def _agendar(self):
+        try:
+            self.master.after(self.intervalo_ms, self._processar)
+        except tk.TclError:
+            pass  # Janela já destruída
+
+    def _processar(self):
+        while True:
+            try:
+                callback, args = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Aviso: Erro ao processar retorno em segundo plano: {e}")
+        self._agendar()
+
+
+class ControladorBusca:
+    """Executa consultas numa thread de trabalho, com debounce e descarte de resultados obsoletos.
+
+    - `agendar(*args)`: aguarda `atraso_ms` sem novas chamadas antes de consultar (digitação).
+    - `executar(*args)`: consulta imediatamente (rolagem da lista, botão Atualizar).
+
+    Só a consulta mais recente é executada; pedidos que ainda não começaram são
+    descartados e resultados de consultas substituídas nunca chegam a `aplicar`.
+    """
+
+    def __init__(self, master, despachante, consultar, aplicar, ao_erro=None, atraso_ms=250):
+        self.master = master
+        self.despachante = despachante
+        self.consultar = consultar
+        self.aplicar = aplicar
+        self.ao_erro = ao_erro
+        self.atraso_ms = atraso_ms
+
+        self._geracao = 0
+        self._after_id = None
+        self._pedido = None
+        self._cond = threading.Condition()
+
+        threading.Thread(target=self._trabalhar, name="busca", daemon=True).start()
+
+    def agendar(self, *args):
+        self._cancelar_agendamento()
+        self._after_id = self.master.after(self.atraso_ms, lambda: self.executar(*args))
+
+    def executar(self, *args):
+        self._cancelar_agendamento()
+        with self._cond:
+            self._geracao += 1
+            self._pedido = (self._geracao, args)
+            self._cond.notify()
+
+    def _cancelar_agendamento(self):
+        if self._after_id is not None:
+            try:
+                self.master.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _trabalhar(self):
+        while True:
+            with self._cond:
+                while self._pedido is None:
+                    self._cond.wait()
+                geracao, args = self._pedido
+                self._pedido = None
+
+            try:
+                resultado = self.consultar(*args)
+            except Exception as e:
+                self.despachante.enviar(self._entregar_erro, geracao, e)
+            else:
+                self.despachante.enviar(self._entregar, geracao, resultado)
+
+    def _entregar(self, geracao, resultado):
+        if geracao != self._geracao:
+            return  # Substituída por uma busca mais nova
+        self.aplicar(resultado)
+
+    def _entregar_erro(self, geracao, erro):
+        if geracao != self._geracao:
+            return
+        if self.ao_erro:
+            self.ao_erro(erro)
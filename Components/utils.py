@@ -1,6 +1,8 @@
 import os
 import sys
-from tkinter import messagebox
+from datetime import date, datetime
+
+from .config import PASTA_OS, PDF_SOB_DEMANDA
 
 
 def abrir_arquivo(caminho):
@@ -19,6 +21,8 @@ def abrir_arquivo(caminho):
             subprocess.Popen([caminho], shell=True)
         except Exception as e2:
             try:
+                from tkinter import messagebox
+
                 messagebox.showerror(
                     "Erro",
                     f"Não foi possível abrir o arquivo:\n{caminho}\n\nErro: {str(e2)}",
@@ -27,6 +31,16 @@ def abrir_arquivo(caminho):
                 print(f"Erro ao abrir arquivo {caminho}: {str(e2)}")
 
 
+def caminho_pdf_documento(tipo_documento, numero):
+    """Caminho do PDF de um documento em PASTA_OS (ex.: OS-0042 -> OS_DIPCELL/OS_0042.pdf)."""
+    return os.path.join(PASTA_OS, f"{tipo_documento}_{numero.split('-')[1]}.pdf")
+
+
+def arquivo_documento(tipo_documento, numero):
+    """Valor da coluna arquivo: o caminho em PASTA_OS, ou vazio com PDF_SOB_DEMANDA."""
+    return "" if PDF_SOB_DEMANDA else caminho_pdf_documento(tipo_documento, numero)
+
+
 def parse_monetario_to_float(txt):
     if not txt:
         return 0.0
@@ -38,6 +52,52 @@ def formatar_monetario(v):
     return f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+def monetario_para_centavos(txt):
+    """ "1.234,56" -> 123456. Retorna None se o texto não for um valor válido."""
+    if txt is None:
+        return None
+    try:
+        return int(round(parse_monetario_to_float(str(txt).strip()) * 100))
+    except ValueError:
+        return None
+
+
+def centavos_para_monetario(centavos):
+    return formatar_monetario((centavos or 0) / 100)
+
+
+def data_br_para_iso(txt):
+    """ "31/01/2024" -> "2024-01-31". Retorna None para vazio, "S/Garantia" ou data inválida."""
+    if not txt:
+        return None
+    try:
+        return datetime.strptime(str(txt).strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def normalizar_data_iso(data):
+    """Aceita date/datetime, "dd/mm/YYYY" ou "YYYY-MM-DD" e retorna "YYYY-MM-DD"."""
+    if isinstance(data, datetime):
+        return data.date().isoformat()
+    if isinstance(data, date):
+        return data.isoformat()
+    texto = str(data).strip()
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida: {data}")
+
+
+def data_iso_para_br(txt):
+    """ "2024-01-31" -> "31/01/2024". Retorna "" para vazio."""
+    if not txt:
+        return ""
+    return datetime.strptime(txt, "%Y-%m-%d").strftime("%d/%m/%Y")
+
+
 def aplicar_mascara_tel(raw):
     nums = "".join(ch for ch in raw if ch.isdigit())
     if len(nums) <= 2:
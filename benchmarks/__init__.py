@@ -0,0 +1 @@
+"""Benchmarks reprodutíveis do sistema sobre bases sintéticas (`python -m benchmarks`)."""
@@ -0,0 +1,164 @@
+"""Executa os benchmarks sem interface gráfica e grava os resultados em JSON.
+
+    python -m benchmarks --tamanhos 10000,100000 --saida resultados.json
+    python -m benchmarks --comparar antes.json depois.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from Components.database import criar_banco, definir_caminho_banco, fechar_conexoes
+
+from . import cenarios
+from .dados import preparar_base
+
+FORMATO_RESULTADO = 1
+PASTA_PADRAO = os.path.join(tempfile.gettempdir(), "dipcell_benchmarks")
+
+# Métricas comparadas por --comparar: (nome, maior é melhor)
+_METRICAS = (("mediana_ms", False), ("p95_ms", False), ("por_segundo", True))
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ambiente():
+    return {
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def executar(tamanhos, semente, pasta, nomes, repeticoes, escritas, pdfs, recriar=False):
+    resultados = {}
+    for quantidade in tamanhos:
+        print(f"Base com {quantidade} documentos...", file=sys.stderr)
+        inicio = time.perf_counter()
+        caminho = preparar_base(pasta, quantidade, semente, recriar)
+        definir_caminho_banco(caminho)
+        criar_banco()  # Bases em cache geradas antes de uma migração de esquema
+        por_tamanho = {"preparo_segundos": round(time.perf_counter() - inicio, 1)}
+        try:
+            ctx = cenarios.Contexto(quantidade, semente, repeticoes, escritas, pdfs)
+            for nome in nomes:
+                print(f"  {nome}", file=sys.stderr)
+                por_tamanho[nome] = cenarios.CENARIOS[nome](ctx)
+        finally:
+            fechar_conexoes()
+        resultados[str(quantidade)] = por_tamanho
+    return resultados
+
+
+def _metricas_planas(resultado, prefixo=""):
+    """{'100000/busca/nome_comum/mediana_ms': valor, ...} para as métricas comparáveis."""
+    planas = {}
+    for chave, valor in resultado.items():
+        if isinstance(valor, dict):
+            planas.update(_metricas_planas(valor, f"{prefixo}{chave}/"))
+        elif chave in dict(_METRICAS) and isinstance(valor, (int, float)):
+            planas[f"{prefixo}{chave}"] = valor
+    return planas
+
+
+def comparar(caminho_antes, caminho_depois):
+    with open(caminho_antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(caminho_depois, encoding="utf-8") as f:
+        depois = json.load(f)
+
+    print(f"antes:  {antes['ambiente'].get('commit')}  ({antes['gerado_em']})")
+    print(f"depois: {depois['ambiente'].get('commit')}  ({depois['gerado_em']})")
+    metricas_antes = _metricas_planas(antes["resultados"])
+    metricas_depois = _metricas_planas(depois["resultados"])
+    maior_melhor = dict(_METRICAS)
+    for chave in sorted(metricas_antes.keys() & metricas_depois.keys()):
+        a, d = metricas_antes[chave], metricas_depois[chave]
+        if not a:
+            continue
+        razao = d / a
+        melhorou = razao > 1 if maior_melhor[chave.rsplit("/", 1)[1]] else razao < 1
+        print(f"{chave:<60} {a:>12.3f} {d:>12.3f} {razao:>7.2f}x {'+' if melhorou else '-'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Mede busca, paginação, numeração, gravação e PDFs sobre bases sintéticas.",
+    )
+    parser.add_argument("--tamanhos", default="10000,100000",
+                        help="Quantidades de documentos, separadas por vírgula (padrão: 10000,100000)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados sintéticos")
+    parser.add_argument("--cenarios", default=",".join(cenarios.CENARIOS),
+                        help="Cenários a executar, separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=30, help="Repetições por medição")
+    parser.add_argument("--escritas", type=int, default=200,
+                        help="Documentos inseridos/atualizados nos cenários de escrita")
+    parser.add_argument("--pdfs", type=int, default=20, help="Documentos renderizados no cenário pdf")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="Pasta das bases geradas (reaproveitadas)")
+    parser.add_argument("--recriar", action="store_true", help="Gera as bases de novo mesmo se existirem")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: saída padrão)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"),
+                        help="Compara dois arquivos de resultados em vez de medir")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return 0
+
+    nomes = [n.strip() for n in args.cenarios.split(",") if n.strip()]
+    desconhecidos = [n for n in nomes if n not in cenarios.CENARIOS]
+    if desconhecidos:
+        parser.error(f"cenários desconhecidos: {', '.join(desconhecidos)}")
+    try:
+        tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+    except ValueError:
+        parser.error("--tamanhos deve ser uma lista de inteiros")
+
+    resultado = {
+        "formato": FORMATO_RESULTADO,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": ambiente(),
+        "parametros": {
+            "tamanhos": tamanhos,
+            "semente": args.semente,
+            "repeticoes": args.repeticoes,
+            "escritas": args.escritas,
+            "pdfs": args.pdfs,
+            "cenarios": nomes,
+        },
+        "resultados": executar(tamanhos, args.semente, args.pasta, nomes,
+                               args.repeticoes, args.escritas, args.pdfs, args.recriar),
+    }
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(f"Resultados gravados em {args.saida}", file=sys.stderr)
+    else:
+        print(texto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
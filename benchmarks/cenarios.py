@@ -0,0 +1,312 @@
+"""Cenários medidos pelos benchmarks.
+
+Cada cenário recebe um `Contexto` (base já aberta via definir_caminho_banco) e
+retorna um dict serializável em JSON. Tempos em milissegundos; vazões em
+operações por segundo.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from Components.database import (
+    count_documents,
+    fetch_document,
+    get_next_document_number,
+    insert_document,
+    invalidar_caches,
+    list_documents,
+    list_documents_page,
+    obter_conexao,
+    update_document,
+)
+from Components.paginacao import ListaVirtual, Paginador
+from Components.relatorios import resumo_financeiro
+from Components.utils import formatar_monetario
+
+from .dados import DATA_FINAL, gerar_documentos
+
+TAMANHO_PAGINA = 50
+
+
+class Contexto:
+    """Parâmetros de uma execução e amostras de registros existentes na base."""
+
+    def __init__(self, quantidade, semente=42, repeticoes=30, escritas=200, pdfs=20):
+        self.quantidade = quantidade
+        self.semente = semente
+        self.repeticoes = repeticoes
+        self.escritas = escritas
+        self.pdfs = pdfs
+        self.rng = random.Random(semente)
+
+        conn = obter_conexao()
+        ids = [r[0] for r in conn.execute("SELECT id FROM os ORDER BY id")]
+        self.total = len(ids)
+        # Amostra sorteada com a semente: as mesmas linhas em toda execução
+        sorteados = self.rng.sample(ids, min(500, len(ids)))
+        self.amostra = [
+            tuple(conn.execute(
+                "SELECT numero, tipo_documento, imei FROM os WHERE id=?", (i,)
+            ).fetchone())
+            for i in sorteados
+        ]
+
+
+def estatisticas(tempos):
+    """Resumo de uma lista de durações em segundos."""
+    ordenados = sorted(tempos)
+    p95 = ordenados[min(len(ordenados) - 1, int(round(0.95 * (len(ordenados) - 1))))]
+    return {
+        "n": len(ordenados),
+        "mediana_ms": round(statistics.median(ordenados) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "media_ms": round(statistics.fmean(ordenados) * 1000, 3),
+        "min_ms": round(ordenados[0] * 1000, 3),
+        "max_ms": round(ordenados[-1] * 1000, 3),
+    }
+
+
+def cronometrar(funcao, repeticoes, preparar=None, aquecimento=1):
+    """Executa `funcao` `repeticoes` vezes (após o aquecimento) e resume os tempos.
+
+    `preparar`, se dado, roda antes de cada execução fora da medição (ex.: esvaziar caches).
+    """
+    for _ in range(aquecimento):
+        if preparar:
+            preparar()
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return estatisticas(tempos)
+
+
+def vazao(operacoes, segundos):
+    return {
+        "operacoes": operacoes,
+        "segundos": round(segundos, 3),
+        "por_segundo": round(operacoes / segundos, 1) if segundos else None,
+    }
+
+
+def busca(ctx):
+    """count_documents + primeira página para termos típicos, com caches frios."""
+    numero, _, imei = ctx.amostra[0]
+    imei = next((i for _, _, i in ctx.amostra if i), imei)
+    termos = {
+        "nome_comum": "maria",
+        "prefixo_sobrenome": "silv",
+        "sem_acento": "joao",
+        "modelo": "galaxy",
+        "imei_parcial": (imei or "")[:8],
+        "numero": numero,
+        "sem_resultado": "zzzzzz",
+    }
+    resultado = {}
+    for nome, termo in termos.items():
+        def consultar(termo=termo):
+            count_documents(termo)
+            list_documents_page(termo, TAMANHO_PAGINA)
+        medidas = cronometrar(consultar, ctx.repeticoes, preparar=invalidar_caches)
+        medidas["termo"] = termo
+        medidas["resultados"] = count_documents(termo)
+        resultado[nome] = medidas
+    return resultado
+
+
+def paginacao(ctx):
+    """list_documents com OFFSET versus keyset (Paginador) e janelas da ListaVirtual."""
+    resultado = {}
+    paginas = max(1, ctx.total // TAMANHO_PAGINA)
+    for fracao in (0, 0.5, 0.9):
+        pagina = int(paginas * fracao) + 1
+        rotulo = f"{int(fracao * 100)}pct"
+        resultado[f"offset_{rotulo}"] = cronometrar(
+            lambda: list_documents("", TAMANHO_PAGINA, (pagina - 1) * TAMANHO_PAGINA),
+            ctx.repeticoes,
+        )
+        resultado[f"keyset_salto_{rotulo}"] = cronometrar(
+            lambda: Paginador(TAMANHO_PAGINA).carregar("", pagina), ctx.repeticoes
+        )
+
+    paginador = Paginador(TAMANHO_PAGINA)
+    estado = {"pagina": 1}
+
+    def proxima():
+        estado["pagina"] = paginador.carregar("", estado["pagina"])[0] + 1
+    resultado["keyset_sequencial"] = cronometrar(proxima, ctx.repeticoes)
+
+    lista = ListaVirtual()
+    rng = random.Random(ctx.semente)
+    resultado["lista_virtual_aleatoria"] = cronometrar(
+        lambda: lista.janela("", rng.randrange(ctx.total or 1), 30), ctx.repeticoes
+    )
+    return resultado
+
+
+def numeracao(ctx):
+    """get_next_document_number, chamado a cada abertura do formulário."""
+    return {
+        tipo: cronometrar(lambda tipo=tipo: get_next_document_number(tipo), ctx.repeticoes * 10)
+        for tipo in ("OS", "VENDA")
+    }
+
+
+def insercao(ctx):
+    """insert_document um a um (uma transação por documento, como no formulário)."""
+    documentos = list(gerar_documentos(ctx.escritas, ctx.semente + 1))
+    for dados in documentos:
+        dados.pop("numero")
+    inicio = time.perf_counter()
+    tempos = []
+    for dados in documentos:
+        t = time.perf_counter()
+        insert_document(dados)
+        tempos.append(time.perf_counter() - t)
+    resultado = vazao(len(documentos), time.perf_counter() - inicio)
+    resultado.update(estatisticas(tempos))
+    return resultado
+
+
+def atualizacao(ctx):
+    """update_document de situação e valor em registros aleatórios."""
+    rng = random.Random(ctx.semente)
+    alvos = [rng.choice(ctx.amostra) for _ in range(ctx.escritas)]
+    inicio = time.perf_counter()
+    tempos = []
+    for numero, tipo, _ in alvos:
+        campos = {
+            "situacao": rng.choice(("CONCLUÍDA", "EM ANDAMENTO")),
+            "valor": formatar_monetario(rng.randint(2000, 350000) / 100),
+        }
+        t = time.perf_counter()
+        update_document(numero, tipo, campos)
+        tempos.append(time.perf_counter() - t)
+    resultado = vazao(len(alvos), time.perf_counter() - inicio)
+    resultado.update(estatisticas(tempos))
+    return resultado
+
+
+def leitura(ctx):
+    """fetch_document com o cache de registros frio e quente."""
+    rng = random.Random(ctx.semente)
+
+    def sortear():
+        numero, tipo, _ = rng.choice(ctx.amostra)
+        fetch_document(numero, tipo)
+
+    numero, tipo, _ = ctx.amostra[0]
+    return {
+        "frio": cronometrar(sortear, ctx.repeticoes * 10, preparar=invalidar_caches),
+        "quente": cronometrar(lambda: fetch_document(numero, tipo), ctx.repeticoes * 10),
+    }
+
+
+def resumo(ctx):
+    """resumo_financeiro do último mês, do último ano e de todo o histórico."""
+    periodos = {
+        "mes": ("01/06/2025", DATA_FINAL.strftime("%d/%m/%Y")),
+        "ano": ("01/07/2024", DATA_FINAL.strftime("%d/%m/%Y")),
+        "tudo": ("01/01/2000", DATA_FINAL.strftime("%d/%m/%Y")),
+    }
+    return {
+        nome: cronometrar(lambda p=periodo: resumo_financeiro(*p), max(5, ctx.repeticoes // 3))
+        for nome, periodo in periodos.items()
+    }
+
+
+def pdf(ctx):
+    """Documentos renderizados por segundo, gravando numa pasta temporária."""
+    try:
+        from Components.pdf_generator import argumentos_de_registro, renderizar_documento
+    except ImportError as e:
+        return {"ignorado": f"Dependência ausente: {e.name}"}
+
+    registros = [fetch_document(numero, tipo) for numero, tipo, _ in ctx.amostra[:ctx.pdfs]]
+    tamanhos = []
+    tempos = []
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        for i, registro in enumerate(registros):
+            destino = os.path.join(pasta, f"{i}.pdf")
+            t = time.perf_counter()
+            renderizar_documento(*argumentos_de_registro(registro), destino=destino)
+            tempos.append(time.perf_counter() - t)
+            tamanhos.append(os.path.getsize(destino))
+        resultado = vazao(len(registros), time.perf_counter() - inicio)
+    resultado.update(estatisticas(tempos))
+    resultado["tamanho_medio_kb"] = round(statistics.fmean(tamanhos) / 1024, 1)
+    return resultado
+
+
+def servidor(ctx):
+    """Leituras e gravações pelo servidor HTTP local (Components.servidor) contra localhost.
+
+    Compara três "terminais" (threads) gravando ao mesmo tempo pelo servidor com os
+    mesmos três gravando direto no arquivo, cada um com a sua conexão.
+    """
+    from Components import cliente
+    from Components.database import fechar_conexao_da_thread
+    from Components.servidor import criar_servidor
+
+    srv = criar_servidor("127.0.0.1", 0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    cliente.definir_servidor(f"http://127.0.0.1:{srv.server_address[1]}")
+    rng = random.Random(ctx.semente)
+
+    def sortear():
+        numero, tipo, _ = rng.choice(ctx.amostra)
+        cliente.fetch_document(numero, tipo)
+
+    def gravar_em_paralelo(inserir, terminais=3):
+        documentos = list(gerar_documentos(ctx.escritas, ctx.semente + 2))
+        for dados in documentos:
+            dados.pop("numero")
+
+        def terminal(parte):
+            for dados in parte:
+                inserir(dados)
+            fechar_conexao_da_thread()
+            cliente.fechar_conexao_da_thread()
+
+        threads = [threading.Thread(target=terminal, args=(documentos[i::terminais],)) for i in range(terminais)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return vazao(len(documentos), time.perf_counter() - inicio)
+
+    try:
+        return {
+            "leitura": cronometrar(sortear, ctx.repeticoes * 10),
+            "busca": cronometrar(lambda: cliente.list_documents_page("silva", TAMANHO_PAGINA), ctx.repeticoes),
+            "insercao_3_terminais": gravar_em_paralelo(cliente.insert_document),
+            "insercao_3_terminais_direto": gravar_em_paralelo(insert_document),
+        }
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        cliente.fechar_conexao_da_thread()
+
+
+# Ordem de execução: leituras antes das escritas, para não medir a base alterada
+CENARIOS = {
+    "busca": busca,
+    "paginacao": paginacao,
+    "numeracao": numeracao,
+    "leitura": leitura,
+    "resumo": resumo,
+    "pdf": pdf,
+    "insercao": insercao,
+    "atualizacao": atualizacao,
+    "servidor": servidor,
+}
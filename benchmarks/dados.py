@@ -0,0 +1,193 @@
+"""Dados sintéticos realistas e reprodutíveis para os benchmarks.
+
+A mesma semente gera sempre os mesmos documentos, então bases de tamanhos e
+commits diferentes podem ser comparadas.
+"""
+
+import json
+import os
+import random
+import shutil
+from datetime import date, timedelta
+
+from Components.database import criar_banco, definir_caminho_banco, fechar_conexoes, obter_conexao
+from Components.importacao import APELIDOS, importar_linhas
+from Components.utils import aplicar_mascara_tel, formatar_monetario
+
+# Data mais recente dos documentos gerados (fixa, para a base não depender do dia)
+DATA_FINAL = date(2025, 6, 30)
+ANOS_DE_HISTORICO = 5
+
+PRIMEIROS_NOMES = (
+    "Maria", "José", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo", "Adriana",
+    "Lucas", "Juliana", "Marcos", "Patrícia", "Luiz", "Aline", "Gabriel", "Fernanda",
+    "Rafael", "Camila", "Pedro", "Márcia", "Daniel", "Sandra", "Bruno", "Letícia",
+    "Felipe", "Vanessa", "Rodrigo", "Simone", "Thiago", "Luciana", "Matheus", "Cláudia",
+    "Gustavo", "Beatriz", "Eduardo", "Débora", "Vinícius", "Raimunda", "Sebastião",
+)
+SOBRENOMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira",
+    "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes",
+    "Soares", "Fernandes", "Vieira", "Barbosa", "Rocha", "Dias", "Nascimento", "Andrade",
+    "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas", "Cardoso", "Ramos",
+    "Gonçalves", "Santana", "Teixeira", "Araújo", "Conceição", "Cavalcanti", "Magalhães",
+)
+DDDS = (11, 12, 13, 19, 21, 24, 27, 31, 41, 47, 48, 51, 61, 62, 71, 81, 85, 91, 92, 98)
+MODELOS = (
+    "Samsung Galaxy A12", "Samsung Galaxy A32", "Samsung Galaxy S21", "Samsung Galaxy M31",
+    "Motorola Moto G8", "Motorola Moto G20", "Motorola Moto E7", "Motorola Edge 20",
+    "Xiaomi Redmi Note 9", "Xiaomi Redmi Note 11", "Xiaomi Poco X3", "Xiaomi Redmi 9A",
+    "iPhone 8", "iPhone XR", "iPhone 11", "iPhone 12", "iPhone 13 Pro",
+    "LG K41S", "LG K62", "Asus Zenfone 8", "Realme C25", "Positivo Twist 4",
+)
+PRODUTOS_VENDA = (
+    "Película 3D", "Capinha Anti-impacto", "Carregador Turbo 20W", "Cabo USB-C 1m",
+    "Fone Bluetooth", "Cartão de Memória 64GB", "Suporte Veicular", "Power Bank 10000mAh",
+)
+PROBLEMAS = (
+    "Tela quebrada", "Não liga", "Não carrega", "Bateria viciada", "Touch falhando",
+    "Caiu na água", "Alto-falante sem som", "Microfone não funciona", "Câmera embaçada",
+    "Conector de carga com mau contato", "Reinicia sozinho", "Sem sinal de operadora",
+)
+ACESSORIOS = ("", "", "Capinha", "Carregador", "Capinha e película", "Chip", "Cartão de memória")
+CHECKLIST_ITENS = (
+    "Tela Display", "Touch Screen", "Teclas", "Sensores de Proximidade", "Bluetooth", "Wi-Fi",
+    "Ligações", "Alto Falante", "Câmera", "Microfone", "Conector Carregador",
+    "Conector Cartão de Memória", "Sim Card", "Outros (Opcional - p/ defeitos internos)",
+)
+SITUACOES = ("EM ABERTO", "EM ANDAMENTO", "CONCLUÍDA", "NÃO PAGO", "CANCELADA")
+PESOS_SITUACOES = (8, 7, 78, 4, 3)
+METODOS = ("CARTÃO", "DINHEIRO", "PIX", "PARCELADO NO CREDIÁRIO")
+PESOS_METODOS = (35, 20, 35, 10)
+
+
+def _imei(rng):
+    """IMEI de 15 dígitos com dígito verificador de Luhn válido."""
+    corpo = [rng.randint(0, 9) for _ in range(14)]
+    soma = 0
+    for i, d in enumerate(corpo):
+        if i % 2 == 1:
+            d *= 2
+            if d > 9:
+                d -= 9
+        soma += d
+    return "".join(map(str, corpo)) + str((10 - soma % 10) % 10)
+
+
+def _data_br(d):
+    return d.strftime("%d/%m/%Y")
+
+
+def gerar_documentos(quantidade, semente=42, inicio_numeracao=1):
+    """Gera `quantidade` documentos como dicts com as colunas de texto da tabela os."""
+    rng = random.Random(semente)
+    sequencias = {"OS": inicio_numeracao - 1, "VENDA": inicio_numeracao - 1}
+    dias_historico = 365 * ANOS_DE_HISTORICO
+
+    for _ in range(quantidade):
+        tipo = "OS" if rng.random() < 0.7 else "VENDA"
+        sequencias[tipo] += 1
+        entrada = DATA_FINAL - timedelta(days=rng.randrange(dias_historico))
+        situacao = rng.choices(SITUACOES, PESOS_SITUACOES)[0]
+        metodo = rng.choices(METODOS, PESOS_METODOS)[0]
+        if tipo == "OS" and metodo == "PARCELADO NO CREDIÁRIO":
+            metodo = "PIX"  # Crediário só existe em vendas
+        valor = rng.randint(2000, 350000) / 100
+
+        saida = ""
+        garantia = "S/Garantia"
+        tipo_garantia = "Com Garantia" if rng.random() < 0.85 else "Sem Garantia"
+        dias_garantia = rng.choice((30, 90)) if tipo_garantia == "Com Garantia" else 0
+        if situacao == "CONCLUÍDA":
+            saida = _data_br(entrada + timedelta(days=rng.randrange(15)))
+            if dias_garantia:
+                garantia = _data_br(entrada + timedelta(days=dias_garantia))
+
+        parcelas = 1
+        detalhes_parcelas = ""
+        if metodo == "PARCELADO NO CREDIÁRIO":
+            parcelas = rng.randint(2, 6)
+            lista = []
+            for i in range(1, parcelas + 1):
+                vencimento = entrada + timedelta(days=30 * i)
+                lista.append({
+                    "numero": i,
+                    "vencimento": _data_br(vencimento),
+                    "valor": formatar_monetario(valor / parcelas),
+                    "status": "PG" if vencimento < DATA_FINAL and rng.random() < 0.8 else "N/PG",
+                })
+            detalhes_parcelas = json.dumps(lista)
+
+        if tipo == "OS":
+            modelo = rng.choice(MODELOS)
+            checklist = ";".join(
+                f"{item}:{'Sim' if rng.random() < 0.2 else 'Não'}" for item in CHECKLIST_ITENS
+            )
+            problemas = rng.choice(PROBLEMAS)
+            imei = _imei(rng)
+            senha = str(rng.randint(0, 999999)).zfill(6) if rng.random() < 0.6 else ""
+        else:
+            modelo = rng.choice(PRODUTOS_VENDA)
+            checklist = problemas = imei = senha = ""
+
+        celular = f"{rng.choice(DDDS)}9{rng.randint(0, 99999999):08d}"
+        yield {
+            "numero": f"{tipo}-{sequencias[tipo]:04d}",
+            "tipo_documento": tipo,
+            "cliente": f"{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+            "telefone": aplicar_mascara_tel(celular),
+            "modelo": modelo,
+            "imei": imei,
+            "senha": senha,
+            "acessorios": rng.choice(ACESSORIOS),
+            "problemas": problemas,
+            "situacao": situacao,
+            "valor": formatar_monetario(valor),
+            "entrada": _data_br(entrada),
+            "saida": saida,
+            "garantia": garantia,
+            "tipo_garantia": tipo_garantia,
+            "metodo_pagamento": metodo,
+            "checklist": checklist,
+            "dias_garantia": dias_garantia,
+            "parcelas": parcelas,
+            "detalhes_parcelas": detalhes_parcelas,
+        }
+
+
+def construir_base(caminho, quantidade, semente=42):
+    """Cria em `caminho` uma base com `quantidade` documentos, pelo caminho de importação em lote."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    definir_caminho_banco(caminho)
+    criar_banco()
+    campos = list(APELIDOS)
+    linhas = (
+        (n, [str(doc.get(campo, "")) for campo in campos])
+        for n, doc in enumerate(gerar_documentos(quantidade, semente), start=1)
+    )
+    resumo = importar_linhas(campos, linhas)
+    obter_conexao().execute("ANALYZE")
+    fechar_conexoes()  # O checkpoint ao fechar deixa tudo no arquivo principal
+    return resumo
+
+
+def preparar_base(pasta, quantidade, semente=42, recriar=False):
+    """Retorna o caminho de uma cópia de trabalho da base do tamanho pedido.
+
+    A base original fica em cache na `pasta` (é cara de gerar); os cenários
+    gravam numa cópia, então toda execução parte dos mesmos dados.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    original = os.path.join(pasta, f"base_{quantidade}_{semente}.db")
+    if recriar or not os.path.exists(original):
+        construir_base(original, quantidade, semente)
+
+    trabalho = os.path.join(pasta, f"trabalho_{quantidade}.db")
+    for sufixo in ("-wal", "-shm"):
+        if os.path.exists(trabalho + sufixo):
+            os.remove(trabalho + sufixo)
+    shutil.copyfile(original, trabalho)
+    return trabalho
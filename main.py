@@ -1,12 +1,54 @@
+import sys
+import time
+
+_INICIO = time.perf_counter()
+
+from tkinter import messagebox
+
 import customtkinter as ctk
+from Components import metricas
+from Components.backup import AgendadorBackup
 from Components.config import init_customtkinter
-from Components.database import criar_banco
+from Components.backend import REMOTO, preparar
+from Components.database import ErroBanco, fechar_conexoes
 from Components.gui import SistemaOS
 
+
+def _etapa(etapas, nome, funcao, *args):
+    """Executa uma etapa da inicialização guardando quanto tempo ela levou."""
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    etapas.append((nome, time.perf_counter() - inicio))
+    return resultado
+
+
+def _relatar_inicio(etapas):
+    """Chamado quando a janela fica ociosa pela primeira vez (já desenhada)."""
+    etapas.append(("total", time.perf_counter() - _INICIO))
+    for nome, segundos in etapas:
+        metricas.registrar(f"inicio.{nome}", segundos)
+    print("Inicialização: " + ", ".join(f"{nome} {segundos * 1000:.0f} ms" for nome, segundos in etapas))
+
+
 if __name__ == "__main__":
-    criar_banco()
-    ctk_module = init_customtkinter()
-    
-    app = ctk_module.CTk()
-    SistemaOS(app)
-    app.mainloop()
\ No newline at end of file
+    etapas = [("importacoes", time.perf_counter() - _INICIO)]
+    try:
+        _etapa(etapas, "banco", preparar)
+    except ErroBanco as e:
+        messagebox.showerror(e.titulo, str(e))
+        sys.exit(1)
+    ctk_module = _etapa(etapas, "tema", init_customtkinter)
+
+    app = _etapa(etapas, "janela", ctk_module.CTk)
+    _etapa(etapas, "telas", SistemaOS, app)
+    app.after_idle(_relatar_inicio, etapas)
+
+    # Quem abre o banco faz o backup; com servidor, o backup roda no servidor
+    backup = AgendadorBackup()
+    if not REMOTO:
+        backup.iniciar()
+    try:
+        app.mainloop()
+    finally:
+        backup.parar()
+        fechar_conexoes()
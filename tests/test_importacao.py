@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from Components import database
+from Components.importacao import importar
+
+
+class ImportacaoTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        database.definir_caminho_banco(os.path.join(self.pasta.name, "teste.db"))
+        database.criar_banco()
+
+    def tearDown(self):
+        database.fechar_conexoes()
+        self.pasta.cleanup()
+
+    def _origem(self, conteudo):
+        caminho = os.path.join(self.pasta.name, "origem.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        return caminho
+
+    def test_coluna_extra_no_fim_da_linha(self):
+        caminho = self._origem("cliente;valor;entrada;observacao\nAna;10,00;01/02/2024;foo\n")
+
+        resultado = importar(caminho)
+
+        self.assertEqual((resultado["importados"], resultado["rejeitados"]), (1, 0))
+        registro = database.fetch_document("OS-0001", "OS")
+        self.assertEqual((registro["cliente"], registro["valor"]), ("Ana", "10,00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
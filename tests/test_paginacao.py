@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from Components import database
+from Components.documentos import montar_documento
+from Components.paginacao import ListaVirtual
+
+
+class _BancoComTresDocumentos(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "teste.db")
+        database.definir_caminho_banco(self.caminho)
+        database.criar_banco()
+        for cliente in ("Ana", "Bia", "Caio"):
+            database.insert_document(montar_documento(cliente, "(11) 99999-0000", "Moto G", "100,00"))
+
+    def tearDown(self):
+        database.fechar_conexoes()
+        self.pasta.cleanup()
+
+    def _inserir_por_outro_terminal(self):
+        conn = sqlite3.connect(self.caminho)
+        with conn:
+            conn.execute(
+                "INSERT INTO os (numero, tipo_documento, cliente, telefone, modelo, situacao, valor) "
+                "VALUES ('OS-0004', 'OS', 'Davi', '(11) 98888-0000', 'iPhone', 'EM ABERTO', '50,00')"
+            )
+        conn.close()
+
+
+class GravacaoExternaTest(_BancoComTresDocumentos):
+    """Documentos gravados por outro terminal (outra conexão) aparecem na Lista."""
+
+    def test_total_e_janela_veem_gravacao_externa(self):
+        lista = ListaVirtual(tamanho_bloco=10)
+        self.assertEqual(database.count_documents(""), 3)
+        self.assertEqual(lista.janela("", 0, 10)[1][0]["numero"], "OS-0003")
+
+        self._inserir_por_outro_terminal()
+
+        self.assertEqual(database.count_documents(""), 4)
+        inicio, rows, total = lista.janela("", 0, 10)
+        self.assertEqual(total, 4)
+        self.assertEqual(rows[0]["numero"], "OS-0004")
+        self.assertEqual(lista.janela_em_cache("", 0, 10)[1][0]["numero"], "OS-0004")
+
+    def test_registro_em_cache_e_relido_apos_gravacao_externa(self):
+        self.assertEqual(database.fetch_document("OS-0001", "OS")["situacao"], "EM ABERTO")
+        conn = sqlite3.connect(self.caminho)
+        with conn:
+            conn.execute("UPDATE os SET situacao='CANCELADA' WHERE numero='OS-0001'")
+        conn.close()
+        self.assertEqual(database.fetch_document("OS-0001", "OS")["situacao"], "CANCELADA")
+
+    def test_escritas_de_outras_threads_nao_descartam_o_cache(self):
+        database.fetch_document("OS-0001", "OS")
+        database.fetch_document("OS-0002", "OS")
+
+        def editar():
+            database.update_document("OS-0003", "OS", {"situacao": "CONCLUÍDA"})
+            database.fetch_document("OS-0003", "OS")
+            database.fechar_conexao_da_thread()
+
+        thread = threading.Thread(target=editar)
+        thread.start()
+        thread.join()
+
+        database.fetch_document("OS-0001", "OS")
+        self.assertEqual(database.estatisticas_cache_registros()["registros"], 3)
+        self.assertEqual(database.fetch_document("OS-0003", "OS")["situacao"], "CONCLUÍDA")
+
+
+class SubstituirRegistroTest(_BancoComTresDocumentos):
+    """Uma edição local troca só a linha no cache da Lista; outras escritas obrigam a reler."""
+
+    def _editar(self, situacao):
+        database.update_document("OS-0002", "OS", {"situacao": situacao})
+        return database.versao_da_ultima_escrita(), database.fetch_document("OS-0002", "OS")
+
+    def test_edicao_local_substitui_a_linha(self):
+        lista = ListaVirtual(tamanho_bloco=10)
+        lista.janela("", 0, 10)
+        versao_escrita, registro = self._editar("CONCLUÍDA")
+
+        self.assertTrue(lista.substituir_registro("", registro, versao_escrita))
+        self.assertEqual(lista.janela_em_cache("", 0, 10)[1][1]["situacao"], "CONCLUÍDA")
+
+    def test_gravacao_externa_apos_a_edicao_obriga_a_reler(self):
+        lista = ListaVirtual(tamanho_bloco=10)
+        lista.janela("", 0, 10)
+        versao_escrita, registro = self._editar("CONCLUÍDA")
+        self._inserir_por_outro_terminal()
+
+        self.assertFalse(lista.substituir_registro("", registro, versao_escrita))
+
+
+if __name__ == "__main__":
+    unittest.main()
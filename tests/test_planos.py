@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+from Components import database
+from Components.planos import verificar_planos
+
+
+class PlanosTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        database.definir_caminho_banco(os.path.join(self.pasta.name, "teste.db"))
+        database.criar_banco()
+
+    def tearDown(self):
+        database.fechar_conexoes()
+        self.pasta.cleanup()
+
+    def test_nenhuma_consulta_sem_indice(self):
+        resultado = verificar_planos()
+
+        self.assertTrue(resultado)
+        sem_indice = [(r["operacao"], r["sql"], r["problemas"]) for r in resultado if r["problemas"]]
+        self.assertEqual(sem_indice, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
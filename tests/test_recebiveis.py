@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from Components import database
+from Components.documentos import CREDIARIO, montar_documento
+from Components.recebiveis import (
+    listar_parcelas_vencidas, listar_recebiveis, marcar_parcela_paga, parcelas_do_documento
+)
+
+
+class RecebiveisTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        database.definir_caminho_banco(os.path.join(self.pasta.name, "teste.db"))
+        database.criar_banco()
+        self.numero = database.insert_document(montar_documento(
+            "Cliente", "(11) 99999-0000", "Galaxy A12", "300,00", tipo_documento="VENDA",
+            entrada="10/03/2025", metodo_pagamento=CREDIARIO, parcelas=3,
+        ))
+
+    def tearDown(self):
+        database.fechar_conexoes()
+        self.pasta.cleanup()
+
+    def test_venda_cancelada_nao_tem_recebiveis(self):
+        self.assertEqual(len(listar_recebiveis("01/01/2025", "31/12/2025")), 3)
+        database.update_document(self.numero, "VENDA", {"situacao": "CANCELADA"})
+        self.assertEqual(listar_recebiveis("01/01/2025", "31/12/2025"), [])
+        self.assertEqual(listar_recebiveis("01/01/2025", "31/12/2025", somente_abertas=False), [])
+        self.assertEqual(listar_parcelas_vencidas("31/12/2025"), [])
+
+    def test_pagamento_atualiza_documento(self):
+        antes = database.fetch_document(self.numero, "VENDA")
+        self.assertTrue(marcar_parcela_paga(self.numero, "VENDA", 2, "15/05/2025"))
+
+        depois = database.fetch_document(self.numero, "VENDA")
+        status = [p["status"] for p in json.loads(depois["detalhes_parcelas"])]
+        self.assertEqual(status, ["N/PG", "PG", "N/PG"])
+        self.assertEqual(depois["versao"], antes["versao"] + 1)
+        self.assertEqual(len(listar_recebiveis("01/01/2025", "31/12/2025")), 2)
+
+        self.assertTrue(marcar_parcela_paga(self.numero, "VENDA", 2, pago=False))
+        status = [p["status"] for p in json.loads(database.fetch_document(self.numero, "VENDA")["detalhes_parcelas"])]
+        self.assertEqual(status, ["N/PG", "N/PG", "N/PG"])
+        self.assertFalse(marcar_parcela_paga(self.numero, "VENDA", 9))
+
+    def test_edicao_de_crediario_parcialmente_pago(self):
+        marcar_parcela_paga(self.numero, "VENDA", 1, "10/04/2025")
+        detalhes = database.fetch_document(self.numero, "VENDA")["detalhes_parcelas"]
+
+        # Mesmas parcelas (só o status vem do formulário): o pagamento continua
+        database.update_document(self.numero, "VENDA", {"cliente": "Cliente 2", "detalhes_parcelas": detalhes})
+        self.assertEqual([p["pago"] for p in parcelas_do_documento(self.numero, "VENDA")], [True, False, False])
+
+        # Valor replanejado: as parcelas mudam e nenhuma fica como paga
+        novo = montar_documento(
+            "Cliente", "(11) 99999-0000", "Galaxy A12", "600,00", tipo_documento="VENDA",
+            entrada="10/03/2025", metodo_pagamento=CREDIARIO, parcelas=3,
+        )
+        database.update_document(self.numero, "VENDA", {
+            "valor": novo["valor"], "detalhes_parcelas": novo["detalhes_parcelas"],
+        })
+        parcelas = parcelas_do_documento(self.numero, "VENDA")
+        self.assertEqual([p["valor_centavos"] for p in parcelas], [20000, 20000, 20000])
+        self.assertEqual([(p["pago"], p["data_pagamento"]) for p in parcelas], [(False, "")] * 3)
+        self.assertEqual(len(listar_recebiveis("01/01/2025", "31/12/2025")), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from Components import database
+from Components.documentos import montar_documento
+from Components.relatorios import resumo_financeiro
+
+
+class ResumoFinanceiroTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        database.definir_caminho_banco(os.path.join(self.pasta.name, "teste.db"))
+        database.criar_banco()
+
+    def tearDown(self):
+        database.fechar_conexoes()
+        self.pasta.cleanup()
+
+    def _inserir(self, valor, situacao, metodo_pagamento="PIX"):
+        database.insert_document(montar_documento(
+            "Cliente", "(11) 99999-0000", "Galaxy A12", valor,
+            situacao=situacao, entrada="10/03/2025", metodo_pagamento=metodo_pagamento,
+        ))
+
+    def test_receita_conta_so_documentos_concluidos(self):
+        self._inserir("150,00", "CONCLUÍDA")
+        self._inserir("1.000,00", "NÃO PAGO")
+        self._inserir("500,00", "EM ABERTO")
+        self._inserir("80,00", "EM ANDAMENTO", metodo_pagamento="DINHEIRO")
+
+        resumo = resumo_financeiro("01/03/2025", "31/03/2025")
+
+        self.assertEqual(resumo["receita_centavos"], 15000)
+        self.assertEqual(resumo["quantidade"], 1)
+        self.assertEqual(resumo["ticket_medio_centavos"], 15000)
+        self.assertEqual(
+            [(i["metodo_pagamento"], i["quantidade"], i["receita_centavos"]) for i in resumo["por_pagamento"]],
+            [("PIX", 1, 15000)],
+        )
+        self.assertEqual(
+            resumo["por_situacao"],
+            {"CONCLUÍDA": 1, "NÃO PAGO": 1, "EM ABERTO": 1, "EM ANDAMENTO": 1},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()